@@ -0,0 +1,225 @@
+import Repository, ScanPipeline, SlitherScanner, FindingsWriter, DetectorRegistry, RepoMirror, WorkerPool
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+"""
+    Scans many repositories in a pipeline of two bounded stages:
+
+    clone    -> clone_workers threads clone the repositories (through their mirrors) into their own workspace
+                and put them in a queue of at most queue_size cloned repositories. When the queue is full
+                the clones wait, so the disk usage stays bounded while the analysis catches up.
+    analysis -> analysis_threads threads take the cloned repositories from the queue and analyze their contracts
+                in one WorkerPool of analysis_workers processes shared by all the repositories,
+                so the processes stay busy from one repository to the next. The processes are replaced
+                after max_tasks analyses and stopped over memory_limit bytes, so the scan stays in its memory budget.
+
+    Every repository gets a severity report and a JSON Lines file of its findings in <workspace_dir>/reports,
+and summary() aggregates the results of all the repositories.
+"""
+
+# Put in the queue once per analysis thread, when every repository was cloned
+END_OF_CLONES = None
+
+# Readable and unique directory name of a repository: its name and a hash of its URL
+def workspace_name(repo_url):
+    name = repo_url.strip().rstrip("/").split("/")[-1]
+    if name.endswith(".git"):
+        name = name[:-len(".git")]
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", name) or "repository"
+    return f"{name}-{hashlib.sha1(repo_url.strip().encode()).hexdigest()[:8]}"
+
+# Repository URLs of a file, one per line (empty lines and # comments are skipped, duplicates removed)
+def read_url_list(path):
+    with open(path, "r", encoding="utf-8") as url_file:
+        urls = [line.strip() for line in url_file]
+    return list(dict.fromkeys(url for url in urls if url != "" and not url.startswith("#")))
+
+class BatchScanner:
+    def __init__(self, workspace_dir=None, clone_workers=4, analysis_workers=None, analysis_threads=2, queue_size=4,
+                 project_mode=False, use_cache=True, profile=DetectorRegistry.DEFAULT_PROFILE, include=(), exclude=(),
+                 include_files=(), exclude_files=(), all_files=False, quiet=True, keep_workspaces=False,
+                 max_tasks=WorkerPool.DEFAULT_MAX_TASKS, memory_limit=None, contract_timeout=None, scan_timeout=None):
+        self.workspace_dir = workspace_dir if workspace_dir is not None else os.path.join(os.getcwd(), "Workspaces")
+        self.reports_dir = os.path.join(self.workspace_dir, "reports")
+
+        # Stage sizes: the clones are network / disk bound, the analysis is CPU bound
+        self.clone_workers = clone_workers
+        self.analysis_workers = analysis_workers if analysis_workers is not None else os.cpu_count() or 1
+        self.analysis_threads = analysis_threads
+        self.queue_size = queue_size
+
+        # Recycling and memory limit of the analysis processes (see WorkerPool)
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+
+        # Seconds after which an analysis is stopped, and after which the analysis of a repository is stopped
+        self.contract_timeout = contract_timeout
+        self.scan_timeout = scan_timeout
+
+        # Same options as a single scan
+        self.project_mode = project_mode
+        self.use_cache = use_cache
+        self.profile = profile
+        self.include = include
+        self.exclude = exclude
+        self.include_files = include_files
+        self.exclude_files = exclude_files
+        self.all_files = all_files
+        self.quiet = quiet
+
+        # The workspace of a repository is removed once it was analyzed, unless it is kept
+        self.keep_workspaces = keep_workspaces
+
+        self.options = ScanPipeline.scan_options(project_mode, profile, include, exclude, include_files, exclude_files, all_files)
+        self.elapsed = 0.0
+
+    # Scans the repositories and returns one result dict per repository, in the given order
+    def run(self, repo_urls):
+        start = time.time()
+        os.makedirs(self.reports_dir, exist_ok=True)
+        # The detectors are selected once, an unknown profile fails before anything is cloned
+        DetectorRegistry.select(self.profile, self.include, self.exclude)
+
+        results = [None] * len(repo_urls)
+        cloned = queue.Queue(maxsize=self.queue_size)
+
+        with WorkerPool.WorkerPool(self.analysis_workers, self.max_tasks, self.memory_limit, self.contract_timeout) as executor:
+            analysis_threads = [threading.Thread(target=self.analysis_stage, args=(cloned, executor, results))
+                                for _ in range(self.analysis_threads)]
+            for analysis_thread in analysis_threads:
+                analysis_thread.start()
+
+            with ThreadPoolExecutor(max_workers=self.clone_workers) as clone_pool:
+                for index, repo_url in enumerate(repo_urls):
+                    clone_pool.submit(self.clone_stage, index, repo_url, cloned)
+
+            for _ in analysis_threads:
+                cloned.put(END_OF_CLONES)
+            for analysis_thread in analysis_threads:
+                analysis_thread.join()
+
+        self.elapsed = time.time() - start
+        return results
+
+    # Clones one repository into its workspace (nothing is cloned if its commit was already scanned)
+    def clone_stage(self, index, repo_url, cloned):
+        clone_dir = os.path.join(self.workspace_dir, workspace_name(repo_url))
+        item = {"index": index, "repository": repo_url, "workspace": clone_dir,
+                "mirror": None, "stored_files": None, "error": None, "clone_seconds": 0.0}
+        clone_start = time.time()
+        try:
+            if self.use_cache:
+                item["mirror"], _, item["stored_files"] = ScanPipeline.stored_scan(repo_url, self.options)
+            else:
+                item["mirror"] = RepoMirror.RepoMirror(repo_url)
+
+            if item["stored_files"] is None and Repository.clone(repo_url, item["mirror"], clone_dir) is False:
+                item["error"] = "The cloning process failed."
+        except Exception as e:
+            item["error"] = f"An error occurred while cloning: {e}"
+
+        item["clone_seconds"] = round(time.time() - clone_start, 2)
+        cloned.put(item) # waits while queue_size cloned repositories are waiting for the analysis
+
+    def analysis_stage(self, cloned, executor, results):
+        while True:
+            item = cloned.get()
+            if item is END_OF_CLONES:
+                return
+            try:
+                results[item["index"]] = self.analyze(item, executor)
+            except Exception as e:
+                results[item["index"]] = self.failed_result(item, f"An error occurred during the analysis: {e}")
+
+    def failed_result(self, item, error):
+        return {"repository": item["repository"], "error": error, "clone_seconds": item["clone_seconds"]}
+
+    def analyze(self, item, executor):
+        if item["error"] is not None:
+            return self.failed_result(item, item["error"])
+
+        analysis_start = time.time()
+        clone_dir = item["workspace"]
+        name = os.path.basename(clone_dir)
+        writer = FindingsWriter.JsonLinesWriter(os.path.join(self.reports_dir, name + ".jsonl"), clone_dir)
+        try:
+            if item["stored_files"] is not None:
+                scanner = SlitherScanner.SlitherScanner(writer=writer, quiet=self.quiet)
+                contracts = list(item["stored_files"])
+                scanned = ScanPipeline.restore_scan(scanner, item["stored_files"], clone_dir)
+            else:
+                contracts = Repository.find_contracts(clone_dir, self.include_files, self.exclude_files, not self.all_files)
+                scanner = ScanPipeline.build_scanner(clone_dir, self.analysis_workers, self.project_mode, self.use_cache,
+                                                     self.profile, self.include, self.exclude,
+                                                     writer=writer, quiet=self.quiet, executor=executor,
+                                                     scan_timeout=self.scan_timeout)
+                scanned = scanner.scan(contracts)
+
+            for _ in scanned:
+                pass
+        finally:
+            writer.close()
+
+        report_path = os.path.join(self.reports_dir, name + ".txt")
+        scanner.generate_severity_report(report_path)
+        if item["stored_files"] is None:
+            ScanPipeline.store_scan(item["repository"], scanner, clone_dir, self.options, round(time.time() - analysis_start, 2))
+            if not self.keep_workspaces:
+                shutil.rmtree(clone_dir, ignore_errors=True)
+
+        return {
+            "repository": item["repository"],
+            "contracts": len(contracts),
+            "failed_contracts": len(scanner.failed_contracts),
+            "timed_out_contracts": len(scanner.timed_out_contracts),
+            "findings": len(scanner.findings),
+            "stars": scanner.stars,
+            "score": scanner.score,
+            "severity_frequency": dict(scanner.severity_type_frequency),
+            "peak_memory_mb": round(max(scanner.peak_memory.values(), default=0) / WorkerPool.MEGABYTE, 1),
+            "from_stored_scan": item["stored_files"] is not None,
+            "report": report_path,
+            "findings_file": writer.output_file.name,
+            "clone_seconds": item["clone_seconds"],
+            "analysis_seconds": round(time.time() - analysis_start, 2)
+        }
+
+    # Aggregate of the results of run()
+    def summary(self, results):
+        scanned = [result for result in results if result is not None and "error" not in result]
+        failed = [result for result in results if result is None or "error" in result]
+
+        severity_frequency = dict()
+        stars = {str(star) : 0 for star in range(6)}
+        for result in scanned:
+            stars[str(result["stars"])] += 1
+            for severity, frequency in result["severity_frequency"].items():
+                severity_frequency[severity] = severity_frequency.get(severity, 0) + frequency
+
+        return {
+            "repositories": len(results),
+            "scanned": len(scanned),
+            "failed": len(failed),
+            "from_stored_scan": sum(1 for result in scanned if result["from_stored_scan"]),
+            "contracts": sum(result["contracts"] for result in scanned),
+            "findings": sum(result["findings"] for result in scanned),
+            "severity_frequency": severity_frequency,
+            "repositories_by_stars": stars,
+            "peak_memory_mb": max((result.get("peak_memory_mb", 0.0) for result in scanned), default=0.0),
+            "elapsed_seconds": round(self.elapsed, 2),
+            "repositories_per_minute": round(len(scanned) * 60 / self.elapsed, 2) if self.elapsed > 0 else 0.0
+        }
+
+    # Writes the results and the summary to <workspace_dir>/reports/batch_summary.json, returns its path
+    def write_summary(self, results):
+        summary_path = os.path.join(self.reports_dir, "batch_summary.json")
+        with open(summary_path, "w", encoding="utf-8") as summary_file:
+            json.dump({"summary": self.summary(results), "repositories": results}, summary_file, indent=2)
+        return summary_path
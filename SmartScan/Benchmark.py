@@ -0,0 +1,316 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import time
+
+import SyntheticCorpus, DetectorRegistry
+
+"""
+Benchmark suite of SmartScan: generates a synthetic corpus (see SyntheticCorpus), serves it from a local
+bare repository and times every stage of a scan on it:
+
+clone     -> GitHubImport clone of the corpus (a fresh clone on every run)
+discovery -> Repository.find_contracts on the clone (the discovery behind RepoPath)
+analysis  -> SlitherScanner.solidity_analysis of the first --analysis-files contracts
+report    -> SlitherScanner.generate_severity_report of the analysis
+highlight -> CodeArea.highlightCurrentLine on a large file with synthetic findings (offscreen Qt)
+
+    python Benchmark.py --files 200 --output benchmark_results.json
+    python Benchmark.py --baseline benchmark_baseline.json --update-baseline
+    python Benchmark.py --baseline benchmark_baseline.json --threshold 0.2
+
+Every stage is run --repeat times, its median time is compared with the baseline: a stage is a regression
+when it is more than threshold (ratio) and more than NOISE_SECONDS slower.
+A stage that can't run (e.g. Slither or PySide6 not installed) is reported with its error and not compared.
+
+Exit codes: 0 -> no regression, 1 -> regression against the baseline, 2 -> the benchmark could not run
+"""
+
+STAGES = ["clone", "discovery", "analysis", "report", "highlight"]
+
+# Version of the results file, results of another version are not compared
+BENCHMARK_FORMAT = 1
+
+DEFAULT_THRESHOLD = 0.25
+
+# Slowdowns under this many seconds are measurement noise, not regressions
+NOISE_SECONDS = 0.01
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_ERROR = 2
+
+class Benchmark:
+    def __init__(self, work_dir=None, files=100, lines=150, import_depth=3, libraries=2, library_files=5, seed=0,
+                 repeat=3, analysis_files=5, highlight_lines=100000, highlight_moves=200, stages=STAGES):
+        self.work_dir = os.path.abspath(work_dir if work_dir is not None else os.path.join(os.getcwd(), "BenchmarkWork"))
+        self.corpus = {"files": files, "lines": lines, "import_depth": import_depth, "libraries": libraries,
+                       "library_files": library_files, "seed": seed}
+        self.repeat = repeat
+        self.analysis_files = analysis_files
+        self.highlight_lines = highlight_lines
+        self.highlight_moves = highlight_moves
+        self.stages = [stage for stage in STAGES if stage in stages]
+
+        self.clone_dir = os.path.join(self.work_dir, "clone")
+        self.repo_url = None
+        self.contracts = []
+        self.scanner = None
+
+    # Generates the corpus, runs the stages and returns the results (see write_results)
+    def run(self):
+        corpus_dir = os.path.join(self.work_dir, "corpus")
+        SyntheticCorpus.generate(corpus_dir, **self.corpus)
+        self.repo_url, commit = SyntheticCorpus.publish(corpus_dir, os.path.join(self.work_dir, "corpus.git"))
+
+        results = {
+            "format": BENCHMARK_FORMAT,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+            "corpus": dict(self.corpus, commit=commit),
+            "stages": dict()
+        }
+
+        # Every stage works on the output of the previous ones (the clone, its contracts, the analysis)
+        for stage in self.stages:
+            print(f"Benchmarking {stage}...")
+            try:
+                results["stages"][stage] = getattr(self, "benchmark_" + stage)()
+            except Exception as e:
+                results["stages"][stage] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"  {stage} could not run: {e}")
+                continue
+            print(f"  median {results['stages'][stage]['median']:.4f} s")
+
+        return results
+
+    # Runs setup then function repeat times (only function is timed, its output is silenced),
+    # returns the times and the result of the last run
+    def measure(self, function, setup=None):
+        times = []
+        result = None
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = function()
+                times.append(time.perf_counter() - start)
+        return times, result
+
+    def stage_result(self, times, **details):
+        return dict({"seconds": times, "median": statistics.median(times), "min": min(times)}, **details)
+
+    def benchmark_clone(self):
+        import GitHubImport
+
+        def remove_clone():
+            shutil.rmtree(self.clone_dir, ignore_errors=True)
+
+        times, git_hub_import = self.measure(lambda: GitHubImport.GitHubImport(self.repo_url, self.clone_dir), remove_clone)
+        if not git_hub_import.clone_result:
+            raise RuntimeError("the corpus could not be cloned")
+        return self.stage_result(times)
+
+    def benchmark_discovery(self):
+        import Repository
+
+        # Without the clone stage, the corpus is discovered in its working tree
+        root_dir = self.clone_dir if os.path.isdir(self.clone_dir) else os.path.join(self.work_dir, "corpus")
+        times, self.contracts = self.measure(lambda: Repository.find_contracts(root_dir))
+        return self.stage_result(times, contracts=len(self.contracts))
+
+    def benchmark_analysis(self):
+        import SlitherScanner
+
+        if len(self.contracts) == 0:
+            raise RuntimeError("no contracts to analyze (the discovery stage did not run)")
+        contracts = self.contracts[:self.analysis_files]
+
+        def analyze():
+            scanner = SlitherScanner.SlitherScanner(detectors=DetectorRegistry.select(DetectorRegistry.DEFAULT_PROFILE), quiet=True)
+            for contract in contracts:
+                scanner.solidity_analysis(contract)
+            return scanner
+
+        times, self.scanner = self.measure(analyze)
+        if len(self.scanner.failed_contracts) > 0:
+            raise RuntimeError(f"{len(self.scanner.failed_contracts)} contract(s) could not be analyzed")
+        return self.stage_result(times, contracts=len(contracts), findings=len(self.scanner.findings))
+
+    def benchmark_report(self):
+        if self.scanner is None:
+            raise RuntimeError("no analysis to report (the analysis stage did not run)")
+        report_path = os.path.join(self.work_dir, "security_report.txt")
+        times, _ = self.measure(lambda: self.scanner.generate_severity_report(report_path))
+        return self.stage_result(times)
+
+    # Time of highlight_moves cursor moves over a large file, the highlights are built again on every run
+    def benchmark_highlight(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtGui import QTextCursor
+        import CodeArea
+
+        application = QApplication.instance() or QApplication([])
+        large_file = os.path.join(self.work_dir, "LargeContract.sol")
+        SyntheticCorpus.generate_large_file(large_file, self.highlight_lines, self.corpus["seed"])
+        with open(large_file, "r", encoding="utf-8") as source_file:
+            text = source_file.read()
+
+        code_area = CodeArea.CodeArea()
+        code_area.setPlainText(text)
+        errors = synthetic_errors(code_area.blockCount(), self.corpus["seed"])
+        document = code_area.document()
+        lines = [(move * 7919) % code_area.blockCount() for move in range(self.highlight_moves)]
+
+        def move_cursor():
+            for line in lines:
+                code_area.setTextCursor(QTextCursor(document.findBlockByNumber(line))) # highlights the line
+            application.processEvents()
+
+        times, _ = self.measure(move_cursor, lambda: code_area.setErrors(errors))
+        return self.stage_result(times, lines=code_area.blockCount(), errors=len(errors), moves=len(lines))
+
+# One finding every 20 lines on average, spanning 1 to 10 lines (the same ones for the same seed)
+def synthetic_errors(line_count, seed=0):
+    import SecurityVulnerability
+
+    rng = random.Random(seed)
+    severities = ["Low", "Medium", "High", "Critical", "Informational"]
+    errors = []
+    for _ in range(line_count // 20):
+        first_line = rng.randrange(1, line_count + 1)
+        errors.append(SecurityVulnerability.Error(first_line, min(first_line + rng.randrange(10), line_count),
+                                                  "Synthetic finding", rng.choice(severities), "synthetic", "High"))
+    return errors
+
+def write_results(results, path):
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+"""
+    Compares the median time of every stage with the baseline, returns one row per stage:
+{"stage", "baseline", "current", "ratio", "status"} with status "ok", "regression", "improvement" or "skipped"
+(stage missing or failed in one of them). stage_thresholds overrides the threshold of some stages.
+"""
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, stage_thresholds=None):
+    stage_thresholds = stage_thresholds or dict()
+    rows = []
+    for stage in STAGES:
+        current = results["stages"].get(stage, {})
+        previous = baseline["stages"].get(stage, {})
+        if "median" not in current or "median" not in previous:
+            if stage in results["stages"] or stage in baseline["stages"]:
+                rows.append({"stage": stage, "baseline": previous.get("median"), "current": current.get("median"),
+                             "ratio": None, "status": "skipped"})
+            continue
+
+        stage_threshold = stage_thresholds.get(stage, threshold)
+        ratio = current["median"] / previous["median"] if previous["median"] > 0 else 1.0
+        status = "ok"
+        if ratio > 1 + stage_threshold and current["median"] - previous["median"] > NOISE_SECONDS:
+            status = "regression"
+        elif ratio < 1 - stage_threshold and previous["median"] - current["median"] > NOISE_SECONDS:
+            status = "improvement"
+        rows.append({"stage": stage, "baseline": previous["median"], "current": current["median"],
+                     "ratio": ratio, "status": status})
+    return rows
+
+def comparison_table(rows):
+    lines = [f"{'Stage':<12} {'Baseline (s)':>14} {'Current (s)':>14} {'Ratio':>8}  Status"]
+    for row in rows:
+        baseline = f"{row['baseline']:.4f}" if row["baseline"] is not None else "-"
+        current = f"{row['current']:.4f}" if row["current"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        lines.append(f"{row['stage']:<12} {baseline:>14} {current:>14} {ratio:>8}  {row['status']}")
+    return "\n".join(lines)
+
+# "highlight=0.5,analysis=0.3" -> {"highlight": 0.5, "analysis": 0.3}
+def parse_stage_thresholds(text):
+    stage_thresholds = dict()
+    for item in DetectorRegistry.parse_list(text):
+        stage, _, value = item.partition("=")
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}', expected one of: {', '.join(STAGES)}")
+        stage_thresholds[stage] = float(value)
+    return stage_thresholds
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smartscan-benchmark", description="SmartScan benchmark suite on a synthetic Solidity corpus")
+    parser.add_argument("--files", type=int, default=100, help="contracts of the corpus (default: 100)")
+    parser.add_argument("--lines", type=int, default=150, help="lines of every contract (default: 150)")
+    parser.add_argument("--import-depth", type=int, default=3, help="length of the import chains between the contracts (default: 3)")
+    parser.add_argument("--libraries", type=int, default=2, help="vendored libraries in lib/ (default: 2)")
+    parser.add_argument("--library-files", type=int, default=5, help="files of every vendored library (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus generator (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every stage, the median is kept (default: 3)")
+    parser.add_argument("--analysis-files", type=int, default=5, help="contracts analyzed by the analysis stage (default: 5)")
+    parser.add_argument("--highlight-lines", type=int, default=100000, help="lines of the large file of the highlight stage (default: 100000)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument("--work-dir", metavar="DIR", help="directory of the corpus and the clone (default: BenchmarkWork)")
+    parser.add_argument("--output", metavar="PATH", default="benchmark_results.json", help="results file (default: benchmark_results.json)")
+    parser.add_argument("--baseline", metavar="PATH", help="results of a previous run to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"slowdown ratio counted as a regression (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--stage-threshold", default="", help="comma separated per stage thresholds (e.g. \"highlight=0.5\")")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        stages = DetectorRegistry.parse_list(args.stages)
+        unknown = [stage for stage in stages if stage not in STAGES]
+        if len(unknown) > 0:
+            raise ValueError(f"Unknown stage(s) {', '.join(unknown)}, expected: {', '.join(STAGES)}")
+        stage_thresholds = parse_stage_thresholds(args.stage_threshold)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return EXIT_ERROR
+
+    benchmark = Benchmark(args.work_dir, args.files, args.lines, args.import_depth, args.libraries, args.library_files,
+                          args.seed, args.repeat, args.analysis_files, args.highlight_lines, stages=stages)
+    try:
+        results = benchmark.run()
+    except (OSError, RuntimeError, ValueError) as e: # e.g. git not installed
+        print(f"Error: {e}")
+        return EXIT_ERROR
+
+    write_results(results, args.output)
+    print(f"Results: {args.output}")
+
+    if args.baseline is None:
+        return EXIT_OK
+    if args.update_baseline or not os.path.isfile(args.baseline):
+        write_results(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return EXIT_OK
+
+    baseline = load_results(args.baseline)
+    if baseline.get("format") != BENCHMARK_FORMAT:
+        print(f"The baseline {args.baseline} has another format, run with --update-baseline")
+        return EXIT_ERROR
+    if {key: value for key, value in baseline["corpus"].items() if key != "commit"} != benchmark.corpus:
+        print("Warning: the baseline was measured on another corpus, the comparison is not meaningful")
+
+    rows = compare(results, baseline, args.threshold, stage_thresholds)
+    print(comparison_table(rows))
+    regressions = [row["stage"] for row in rows if row["status"] == "regression"]
+    if len(regressions) > 0:
+        print(f"Regression in: {', '.join(regressions)}")
+        return EXIT_REGRESSION
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
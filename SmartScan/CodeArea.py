@@ -1,8 +1,18 @@
 from PySide6.QtWidgets import QApplication, QTextEdit, QWidget, QPlainTextEdit, QScrollBar
 from PySide6.QtGui import QPainter, QTextCharFormat, QTextCursor, QTextFormat, QColor, QWheelEvent, QKeyEvent
-from PySide6.QtCore import Qt, QRect, QSize, QPoint
+from PySide6.QtCore import Qt, QRect, QSize, QPoint, QTimer
 
-import ErrorWindow
+import ErrorWindow, IntervalIndex
+import codecs
+import mmap
+import time
+
+# Severities highlighted in the code and shown in the ErrorWindow
+HIGHLIGHTED_SEVERITIES = {"Low", "Medium", "High", "Critical"}
+
+# Files from this size on are memory-mapped and loaded in chunks from the event loop
+LARGE_FILE_SIZE = 1024 * 1024
+LOAD_CHUNK_SIZE = 256 * 1024
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -19,6 +29,16 @@ class CodeArea(QPlainTextEdit):  # use QPlainTextEdit instead of QTextEdit for e
     def __init__(self):
         super().__init__()
         self.file_to_errors_mapping = dict()
+        self.error_index = IntervalIndex.IntervalIndex() # errors of the opened file by line
+        self.affected_ranges = [] # merged line ranges of the errors of the opened file
+        self.error_highlights = None # cached selections of affected_ranges
+
+        # State of the chunked loading of a large file (see loadLargeFile)
+        self.large_file = None # mmap of the file being loaded
+        self.large_file_offset = 0
+        self.large_file_decoder = None
+        self.large_file_load_id = 0
+        self.large_file_load_start = 0
         self.ErrorWindow = ErrorWindow.ErrorWindow()
         self.lineNumberArea = LineNumberArea(self)
 
@@ -38,6 +58,105 @@ class CodeArea(QPlainTextEdit):  # use QPlainTextEdit instead of QTextEdit for e
 
         self.zoom = 0  # Track zoom level
 
+    # Sets the errors of the opened file and indexes them by line, once per file
+    def setErrors(self, errors):
+        self.file_to_errors_mapping = errors
+        self.error_index = IntervalIndex.IntervalIndex(
+            (error.first_line, error.last_line, error) for error in errors if error.severity in HIGHLIGHTED_SEVERITIES
+        )
+        self.affected_ranges = IntervalIndex.merge_ranges(
+            (error.first_line, error.last_line) for error in errors if error.severity in HIGHLIGHTED_SEVERITIES
+        )
+        self.error_highlights = None
+
+    def setPlainText(self, text):
+        self.stopLargeFileLoad()
+        self.error_highlights = None # the cursors of the highlights belong to the previous content
+        super().setPlainText(text)
+
+    """
+        Large-file mode: the file is memory-mapped and its content is appended to the document
+    in chunks of about LOAD_CHUNK_SIZE bytes, cut after a line break. The first chunk is shown at once,
+    the others are appended from the event loop, so the window stays responsive while the document grows.
+    """
+    def loadLargeFile(self, path):
+        self.setPlainText("")
+        with open(path, "rb") as large_file:
+            self.large_file = mmap.mmap(large_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.large_file_offset = 0
+        self.large_file_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.large_file_load_id += 1
+        self.large_file_load_start = time.perf_counter()
+
+        # Edits of the loading are not undoable
+        self.document().setUndoRedoEnabled(False)
+        self.loadNextChunk(self.large_file_load_id)
+
+    def isLoading(self):
+        return self.large_file is not None
+
+    def loadNextChunk(self, load_id):
+        if self.large_file is None or load_id != self.large_file_load_id: # another file was opened since
+            return
+
+        end = min(self.large_file_offset + LOAD_CHUNK_SIZE, len(self.large_file))
+        if end < len(self.large_file):
+            line_end = self.large_file.rfind(b"\n", self.large_file_offset, end)
+            if line_end != -1:
+                end = line_end + 1
+
+        is_last = end == len(self.large_file)
+        text = self.large_file_decoder.decode(self.large_file[self.large_file_offset:end], final=is_last)
+        self.large_file_offset = end
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text.replace("\r\n", "\n"))
+
+        # The highlights of the lines added by the chunk
+        self.error_highlights = None
+        self.highlightCurrentLine()
+
+        if is_last:
+            print(f"Loaded {len(self.large_file)} bytes in {time.perf_counter() - self.large_file_load_start:.3f} second(s)")
+            self.stopLargeFileLoad()
+            return
+        QTimer.singleShot(0, lambda: self.loadNextChunk(load_id))
+
+    def stopLargeFileLoad(self):
+        if self.large_file is None:
+            return
+        self.large_file.close()
+        self.large_file = None
+        self.large_file_decoder = None
+        self.document().setUndoRedoEnabled(True)
+
+    # Yellow highlight of the affected lines, one selection per merged range.
+    # Built once per opened file, the selection cursors then follow the edits of the document
+    def errorHighlights(self):
+        if self.error_highlights is not None:
+            return self.error_highlights
+
+        self.error_highlights = []
+        affectedLineColor = QColor(160, 160, 0) # yellow
+        document = self.document()
+        for first_line, last_line in self.affected_ranges:
+            first_block = document.findBlockByNumber(first_line - 1)
+            if not first_block.isValid():
+                continue
+            last_block = document.findBlockByNumber(min(last_line, document.blockCount()) - 1)
+
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(affectedLineColor)
+            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            cursor = QTextCursor(first_block)
+            cursor.setPosition(last_block.position() + last_block.length() - 1, QTextCursor.KeepAnchor)
+            selection.cursor = cursor
+            self.error_highlights.append(selection)
+
+        return self.error_highlights
+
     def wheelEvent(self, event: QWheelEvent):
         if event.modifiers() & Qt.ControlModifier:
             if event.angleDelta().y() > 0:
@@ -128,6 +247,7 @@ class CodeArea(QPlainTextEdit):  # use QPlainTextEdit instead of QTextEdit for e
 
     # Highlights the line the cursor is currently on and the ones with vulnerabilities
     # And updates the current error if the cursor is on an error
+    # Only the current line selection is created here, the vulnerability highlights are cached per file
     def highlightCurrentLine(self):
         extraSelections = []
 
@@ -139,57 +259,12 @@ class CodeArea(QPlainTextEdit):  # use QPlainTextEdit instead of QTextEdit for e
             selection.cursor = self.textCursor()
             selected_line = selection.cursor.blockNumber() + 1
             selection.cursor.clearSelection()
-            extraSelections.append(selection)
 
-            if not self.file_to_errors_mapping:
-                return
+            # The current line is drawn last, over the highlight of the affected lines
+            extraSelections = self.errorHighlights() + [selection]
 
-            # Highlight the affected lines
-            affectedLineColor = QColor(160, 160, 0) # yellow
-            for error in self.file_to_errors_mapping:
-                if error.severity not in {"Low", "Medium", "High", "Critical"}:
-                    continue
-                errorStart = error.first_line
-                errorEnd = error.last_line
-                selection = QTextEdit.ExtraSelection()
-                selection.format.setBackground(affectedLineColor)
-                selection.format.setProperty(QTextFormat.FullWidthSelection, True)
-                selection.cursor = self.textCursor()
-                selection.cursor.clearSelection()
-                selection.cursor.movePosition(QTextCursor.Start)
-                selection.cursor.movePosition(QTextCursor.Down, QTextCursor.MoveAnchor, errorStart - 1)
-
-                for line in range(errorStart - 1, errorEnd):
-                    if line == selected_line - 1:
-                        continue
-                    block = self.document().findBlockByNumber(line)
-                    if block.isValid():
-                        selection = QTextEdit.ExtraSelection()
-                        selection.format.setBackground(affectedLineColor)
-                        selection.format.setProperty(QTextFormat.FullWidthSelection, True)
-
-                        cursor = QTextCursor(block)
-                        selection.cursor = cursor
-                        selection.cursor.clearSelection()
-
-                        extraSelections.append(selection)
-
-            error_found = False
-
-            for error in self.file_to_errors_mapping:
-                if error.severity not in {"Low", "Medium", "High", "Critical"}:
-                    continue
-                elif selected_line >= error.first_line and selected_line <= error.last_line:
-                    content = f"Current line: {selected_line}\n\n"
-                    content += f"Error in lines: {error.first_line} - {error.last_line}\n\n"
-                    content += "Description: " + error.description + '\n'
-                    content += "Severity: " + error.severity
-                    self.ErrorWindow.error_description_box.setPlainText(content)
-                    error_found = True
-                    break
-
-            if not error_found:
-                content = "No error in this line."
-                self.ErrorWindow.error_description_box.setPlainText(content)
+            # Every error covering the line, overlapping ones included
+            if self.file_to_errors_mapping:
+                self.ErrorWindow.show_errors(selected_line, self.error_index.at(selected_line))
 
         self.setExtraSelections(extraSelections)
\ No newline at end of file
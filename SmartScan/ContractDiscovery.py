@@ -0,0 +1,227 @@
+from pathlib import Path
+import os
+import re
+import time
+
+"""
+Finds the Solidity sources of a repository with os.scandir, without walking the directories
+that only hold dependencies, build outputs or caches (node_modules, lib, out, artifacts, ...).
+
+    The walk is limited to the source roots of the build configuration (foundry.toml `src`,
+hardhat.config `paths.sources`) when they exist, the .gitignore files are honored and
+the test / mock / script contracts are skipped unless they are included again.
+"""
+
+# Directories never walked, wherever they are
+PRUNED_DIRS = {
+    ".git", ".hg", ".svn", ".idea", ".vscode", ".venv", "venv", "__pycache__",
+    "node_modules", ".deps", "artifacts", "cache", "cache_forge", "out", "build", "broadcast",
+    "crytic-export", "coverage", "typechain", "typechain-types", "forge-std"
+}
+
+# Foundry dependencies (git submodules), pruned next to a foundry.toml or a .gitmodules
+FOUNDRY_LIBRARY_DIR = "lib"
+
+# Test, mock and deployment script contracts, skipped unless an include glob matches them
+DEFAULT_EXCLUDE_GLOBS = [
+    "**/test/**", "**/tests/**", "**/mock/**", "**/mocks/**", "**/script/**", "**/scripts/**",
+    "*.t.sol", "*.s.sol", "Mock*.sol", "*Mock.sol"
+]
+
+FOUNDRY_SRC_PATTERN = re.compile(r'^\s*src\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+HARDHAT_SOURCES_PATTERN = re.compile(r'\bsources\s*:\s*["\']([^"\']+)["\']')
+
+HARDHAT_CONFIG_FILES = ["hardhat.config.js", "hardhat.config.ts", "hardhat.config.cjs", "hardhat.config.mjs"]
+
+# Regular expression of a glob: "**/" any directories, "*" and "?" never match "/"
+def glob_regex(pattern):
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+        elif pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+        elif pattern[index] == "*":
+            regex += "[^/]*"
+            index += 1
+        elif pattern[index] == "?":
+            regex += "[^/]"
+            index += 1
+        else:
+            regex += re.escape(pattern[index])
+            index += 1
+    return regex
+
+# A glob without "/" (e.g. "*.t.sol", "mocks/") matches the name at any depth, like in .gitignore,
+# and a trailing "/" matches everything in the directory
+def compile_glob(pattern):
+    pattern = pattern.strip().replace("\\", "/")
+    if "/" not in pattern.rstrip("/"):
+        pattern = "**/" + pattern
+    if pattern.endswith("/"):
+        pattern += "**"
+    return re.compile(glob_regex(pattern.lstrip("/")))
+
+def read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as text_file:
+            return text_file.read()
+    except OSError:
+        return None
+
+# Relative source directories declared in foundry.toml and hardhat.config.* (with their defaults)
+def source_roots(root_dir):
+    roots = []
+
+    foundry_config = read_text(os.path.join(root_dir, "foundry.toml"))
+    if foundry_config is not None:
+        match = FOUNDRY_SRC_PATTERN.search(foundry_config)
+        roots.append(match.group(1) if match else "src")
+
+    for config_name in HARDHAT_CONFIG_FILES:
+        hardhat_config = read_text(os.path.join(root_dir, config_name))
+        if hardhat_config is not None:
+            match = HARDHAT_SOURCES_PATTERN.search(hardhat_config)
+            roots.append(match.group(1) if match else "contracts")
+            break
+
+    roots = [os.path.normpath(root) for root in roots]
+    return [root for root in dict.fromkeys(roots) if os.path.isdir(os.path.join(root_dir, root))]
+
+"""
+    Rules of the .gitignore files met during the walk. Every directory gets the rules of its parents
+plus its own .gitignore, the last matching rule wins and "!" rules include a path again.
+"""
+class GitIgnore:
+    def __init__(self, rules=()):
+        self.rules = list(rules) # (regex, negated, directories only)
+
+    # Returns the rules to use in directory (self if it has no .gitignore)
+    def extended(self, directory, relative_dir):
+        content = read_text(os.path.join(directory, ".gitignore"))
+        if content is None:
+            return self
+
+        base = "" if relative_dir == "" else re.escape(relative_dir) + "/"
+        rules = list(self.rules)
+        for line in content.splitlines():
+            line = line.rstrip()
+            if line == "" or line.startswith("#"):
+                continue
+
+            negated = line.startswith("!")
+            pattern = line[1:] if negated else line
+            directories_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if pattern == "":
+                continue
+
+            # A pattern with a "/" is relative to the .gitignore, otherwise it matches at any depth
+            anchored = "/" in pattern
+            regex = base + ("" if anchored else "(?:.*/)?") + glob_regex(pattern.lstrip("/"))
+            rules.append((re.compile(regex), negated, directories_only))
+        return GitIgnore(rules)
+
+    def ignored(self, relative_path, is_dir):
+        ignored = False
+        for regex, negated, directories_only in self.rules:
+            if directories_only and not is_dir:
+                continue
+            if regex.fullmatch(relative_path):
+                ignored = not negated
+        return ignored
+
+class ContractDiscovery:
+    def __init__(self, root_dir, include=(), exclude=(), default_excludes=True):
+        self.root_dir = os.path.abspath(str(root_dir))
+        self.include = [compile_glob(pattern) for pattern in include if pattern.strip()]
+        self.exclude = [compile_glob(pattern) for pattern in exclude if pattern.strip()]
+        self.default_exclude = [compile_glob(pattern) for pattern in DEFAULT_EXCLUDE_GLOBS] if default_excludes else []
+
+        self.contracts = []
+        self.roots = []
+        self.directories = 0    # directories walked
+        self.entries = 0        # files and directories seen
+        self.pruned = 0         # directories not walked
+        self.excluded = 0       # Solidity files skipped by a glob
+        self.elapsed = 0.0
+
+    # True if the Solidity file (relative posix path) is kept
+    def selected(self, relative_path):
+        if any(regex.fullmatch(relative_path) for regex in self.exclude):
+            return False
+        if len(self.include) > 0:
+            return any(regex.fullmatch(relative_path) for regex in self.include)
+        return not any(regex.fullmatch(relative_path) for regex in self.default_exclude)
+
+    # True if no file under the directory can be selected, so it doesn't need to be walked
+    def excluded_directory(self, relative_dir):
+        if len(self.include) > 0:
+            return any(regex.fullmatch(relative_dir + "/") for regex in self.exclude)
+        return any(regex.fullmatch(relative_dir + "/") for regex in self.exclude + self.default_exclude)
+
+    # Walks the repository and returns the sorted Solidity files (Path objects)
+    def run(self):
+        start = time.perf_counter()
+
+        # The include globs may point outside of the source roots, the whole repository is walked then
+        self.roots = source_roots(self.root_dir) if len(self.include) == 0 else []
+        root_gitignore = GitIgnore().extended(self.root_dir, "")
+        to_visit = [(os.path.join(self.root_dir, root), root.replace(os.sep, "/"), root_gitignore) for root in self.roots]
+        if len(to_visit) == 0:
+            to_visit = [(self.root_dir, "", GitIgnore())]
+
+        contracts = []
+        while to_visit:
+            directory, relative_dir, gitignore = to_visit.pop()
+            gitignore = gitignore.extended(directory, relative_dir)
+            self.directories += 1
+
+            try:
+                with os.scandir(directory) as scan:
+                    entries = list(scan)
+            except OSError:
+                continue
+            self.entries += len(entries)
+            has_dependencies = any(entry.name in ("foundry.toml", ".gitmodules") for entry in entries)
+
+            for entry in entries:
+                relative_path = entry.name if relative_dir == "" else relative_dir + "/" + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if (entry.name in PRUNED_DIRS
+                            or (entry.name == FOUNDRY_LIBRARY_DIR and has_dependencies)
+                            or gitignore.ignored(relative_path, True)
+                            or self.excluded_directory(relative_path)):
+                        self.pruned += 1
+                        continue
+                    to_visit.append((entry.path, relative_path, gitignore))
+
+                elif entry.name.endswith(".sol") and entry.is_file():
+                    if gitignore.ignored(relative_path, False) or not self.selected(relative_path):
+                        self.excluded += 1
+                        continue
+                    contracts.append(entry.path)
+
+        self.contracts = [Path(contract) for contract in sorted(contracts)]
+        self.elapsed = time.perf_counter() - start
+        return self.contracts
+
+    def report(self):
+        roots = ", ".join(self.roots) if len(self.roots) > 0 else "."
+        return (f"Discovery: {len(self.contracts)} Solidity file(s) found in {self.elapsed:.3f} second(s) "
+                f"(source roots: {roots}, {self.directories} directories walked, {self.entries} entries seen, "
+                f"{self.pruned} directories pruned, {self.excluded} file(s) excluded)")
+
+    def stats(self):
+        return {
+            "contracts": len(self.contracts),
+            "source_roots": self.roots,
+            "directories": self.directories,
+            "entries": self.entries,
+            "pruned_directories": self.pruned,
+            "excluded_files": self.excluded,
+            "elapsed_seconds": round(self.elapsed, 3)
+        }
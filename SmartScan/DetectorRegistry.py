@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+"""
+Detector profiles, from the cheapest to the most complete:
+fast     -> only the high impact detectors (quick triage)
+standard -> high, medium and low impact detectors
+full     -> every Slither detector (informational and optimization ones included)
+"""
+PROFILES = {
+    "fast"     : {"HIGH"},
+    "standard" : {"HIGH", "MEDIUM", "LOW"},
+    "full"     : None
+}
+
+DEFAULT_PROFILE = "full"
+
+# All the Slither detector classes, looked up once per process
+@lru_cache(maxsize=None)
+def detector_classes():
+    # Slither is imported on first use, so the profiles can be listed without loading it
+    from slither.detectors import all_detectors
+    from slither.detectors.abstract_detector import AbstractDetector
+    import inspect
+
+    detectors_ = [getattr(all_detectors, name) for name in dir(all_detectors)]
+    return tuple(d for d in detectors_ if inspect.isclass(d) and issubclass(d, AbstractDetector) and d is not AbstractDetector)
+
+@lru_cache(maxsize=None)
+def detectors_by_name():
+    return {detector_cls.ARGUMENT : detector_cls for detector_cls in detector_classes()}
+
+def impact_name(detector_cls):
+    return detector_cls.IMPACT.name
+
+# True if the entry is the detector name (e.g. "reentrancy-eth") or its impact (e.g. "high")
+def matches(detector_cls, entry):
+    entry = entry.strip().lower()
+    return entry == detector_cls.ARGUMENT.lower() or entry == impact_name(detector_cls).lower()
+
+"""
+    Returns the sorted names of the detectors to run: the detectors of the profile,
+plus the ones matching an include entry, minus the ones matching an exclude entry.
+The include / exclude entries are detector names or impacts (high, medium, low, informational, optimization).
+"""
+def select(profile=DEFAULT_PROFILE, include=(), exclude=()):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown detector profile '{profile}', expected one of: {', '.join(PROFILES)}")
+
+    impacts = PROFILES[profile]
+    selected = []
+    for detector_cls in detector_classes():
+        in_profile = impacts is None or impact_name(detector_cls) in impacts
+        included = any(matches(detector_cls, entry) for entry in include)
+        excluded = any(matches(detector_cls, entry) for entry in exclude)
+        if (in_profile or included) and not excluded:
+            selected.append(detector_cls.ARGUMENT)
+
+    return sorted(selected)
+
+# Splits a comma separated list from the command line ("reentrancy-eth, low") into entries
+def parse_list(text):
+    return [entry.strip() for entry in text.split(",") if entry.strip()]
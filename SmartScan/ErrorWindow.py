@@ -18,4 +18,26 @@ class ErrorWindow(QMainWindow):
         layout.addWidget(self.error_description_box)
 
         content = "Click any affected line of code and the error description will show here."
+        self.error_description_box.setPlainText(content)
+
+    # Shows all the errors covering the selected line
+    def show_errors(self, selected_line, errors):
+        if len(errors) == 0:
+            self.error_description_box.setPlainText("No error in this line.")
+            return
+
+        content = f"Current line: {selected_line}\n\n"
+        if len(errors) > 1:
+            content += f"{len(errors)} errors in this line\n\n"
+
+        descriptions = []
+        for error in errors:
+            description = f"Error in lines: {error.first_line} - {error.last_line}\n\n"
+            description += "Description: " + error.description + '\n'
+            description += "Severity: " + error.severity
+            if error.detector:
+                description += '\n' + f"Detector: {error.detector} (confidence: {error.confidence})"
+            descriptions.append(description)
+
+        content += ("\n\n" + "-" * 20 + "\n\n").join(descriptions)
         self.error_description_box.setPlainText(content)
\ No newline at end of file
@@ -1,10 +1,96 @@
 from PySide6.QtWidgets import (QTreeView, QFileSystemModel)
-from PySide6.QtCore import QDir
-from PySide6.QtGui import QFileOpenEvent
+from PySide6.QtCore import QDir, Qt, QIdentityProxyModel
+from PySide6.QtGui import QFileOpenEvent, QColor
 
-class FileTree(QTreeView):
+import os
+
+# Files listed in the tree (the directories are always listed, their content is read when they are expanded)
+NAME_FILTERS = ["*.sol", "security_report.txt"]
+
+# Files opened by a double click besides the Solidity files
+OPENABLE_FILES = ["security_report.txt", "API_KEY.txt"]
+
+# Severities counted in the badges, most severe first
+BADGE_SEVERITIES = ["Critical", "High", "Medium", "Low"]
+
+BADGE_COLORS = {
+    "Critical" : QColor(200, 0, 0),
+    "High"     : QColor(220, 60, 0),
+    "Medium"   : QColor(200, 140, 0),
+    "Low"      : QColor(160, 160, 0)
+}
+
+# Normalized form of a file path, so the paths of the scan and the ones of the file model match
+# (no file system access: it is computed for every painted item)
+def path_key(path):
+    return os.path.normcase(os.path.abspath(str(path)))
+
+"""
+    Identity proxy over the QFileSystemModel that adds a severity badge to the analyzed files:
+the number of findings of every severity after the file name, colored by the most severe one.
 
+    The results of every contract (the contract as found by the scan, its errors and its affected lines)
+are kept by normalized path, so a file of the tree finds its results in O(1).
+"""
+class SeverityBadgeModel(QIdentityProxyModel):
     def __init__(self):
+        super().__init__()
+        self.results = dict() # path_key -> (contract, errors, affected lines)
+        self.badges = dict()  # path_key -> [(severity, count)], only for files with findings
+
+    def set_results(self, contract, errors, affected_lines):
+        key = path_key(contract)
+        self.results[key] = (contract, errors, affected_lines)
+
+        counts = dict()
+        for error in errors:
+            counts[error.severity] = counts.get(error.severity, 0) + 1
+        badge = [(severity, counts[severity]) for severity in BADGE_SEVERITIES if counts.get(severity, 0) > 0]
+        if len(badge) > 0:
+            self.badges[key] = badge
+        else:
+            self.badges.pop(key, None)
+        self.refresh(str(contract))
+
+    def clear_results(self):
+        paths = [contract for contract, _, _ in self.results.values()]
+        self.results = dict()
+        self.badges = dict()
+        for path in paths:
+            self.refresh(str(path))
+
+    # (contract, errors, affected lines) of the file, None if it was not analyzed
+    def results_of(self, path):
+        return self.results.get(path_key(path))
+
+    # Repaints the item of the file, if the file model has already loaded it
+    def refresh(self, path):
+        source_model = self.sourceModel()
+        if source_model is None:
+            return
+        source_index = source_model.index(path.replace(os.sep, "/"))
+        if source_index.isValid():
+            index = self.mapFromSource(source_index)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.ForegroundRole, Qt.ToolTipRole])
+
+    def data(self, index, role=Qt.DisplayRole):
+        value = super().data(index, role)
+        if index.column() != 0 or role not in (Qt.DisplayRole, Qt.ForegroundRole, Qt.ToolTipRole) or len(self.badges) == 0:
+            return value
+
+        badge = self.badges.get(path_key(self.sourceModel().filePath(self.mapToSource(index))))
+        if badge is None:
+            return value
+
+        if role == Qt.DisplayRole:
+            return f"{value}  [" + " ".join(f"{severity[0]}{count}" for severity, count in badge) + "]"
+        if role == Qt.ForegroundRole:
+            return BADGE_COLORS[badge[0][0]]
+        return ", ".join(f"{count} {severity}" for severity, count in badge)
+
+class FileTree(QTreeView):
+
+    def __init__(self, root_dir=None):
         super().__init__()
         self.setStyleSheet("""
             QTreeView {
@@ -19,32 +105,60 @@ class FileTree(QTreeView):
         """)
         self.setHeaderHidden(True)
 
+        # The file model only reads a directory when it is shown (expanded), and only lists the files of NAME_FILTERS
         self.file_model = QFileSystemModel()
-        self.file_model.setRootPath(QDir.currentPath())  # Set the root path to the current directory
-        self.setModel(self.file_model)
-        self.setRootIndex(self.file_model.index(QDir.currentPath()))  # Display the current directory
+        self.file_model.setFilter(QDir.AllDirs | QDir.Files | QDir.NoDotAndDotDot)
+        self.file_model.setNameFilters(NAME_FILTERS)
+        self.file_model.setNameFilterDisables(False) # hide the other files instead of greying them out
+        self.file_model.setOption(QFileSystemModel.DontUseCustomDirectoryIcons)
+
+        self.badge_model = SeverityBadgeModel()
+        self.badge_model.setSourceModel(self.file_model)
+        self.setModel(self.badge_model)
         self.setHeaderHidden(True) # hide the headers
 
         # Show the file/directory names only
         for column in range(1, self.file_model.columnCount()):
             self.hideColumn(column)
 
-        self.affected_lines_mapping = dict()
+        # Nothing is listed until the scanned repository exists
+        self.root_dir = None
+        if root_dir is not None and os.path.isdir(root_dir):
+            self.set_root(root_dir)
+
+    # Shows the scanned repository (only its content is listed and watched)
+    def set_root(self, root_dir):
+        root_dir = os.path.abspath(root_dir)
+        if root_dir == self.root_dir:
+            return
+        self.root_dir = root_dir
+        source_root = self.file_model.setRootPath(root_dir)
+        self.setRootIndex(self.badge_model.mapFromSource(source_root))
+
+    def set_results(self, contract, errors, affected_lines):
+        self.badge_model.set_results(contract, errors, affected_lines)
+
+    def clear_results(self):
+        self.badge_model.clear_results()
+
+    # (contract, errors, affected lines) of the file, None if it was not analyzed
+    def results_of(self, path):
+        return self.badge_model.results_of(path)
 
     def on_file_selected(self, index):
-        file_path = self.file_model.filePath(index)
+        file_path = self.file_model.filePath(self.badge_model.mapToSource(index))
 
         file_path_split = file_path.split("/")
 
         file_name = file_path_split[len(file_path_split) - 1]
 
-        if file_name == "security_report.txt" or file_name == "API_KEY.txt":
+        if file_name in OPENABLE_FILES:
             return file_path
 
         if len(file_name.split(".")) < 2:
             return ""
 
-        file_extension = file_name.split(".")[1]
+        file_extension = file_name.split(".")[-1]
 
         if file_extension == "sol":
             return file_path
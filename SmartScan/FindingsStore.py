@@ -0,0 +1,278 @@
+import Fingerprint
+from collections import Counter
+import json
+import os
+import re
+import sqlite3
+import time
+
+"""
+    Local SQLite database of every scan: the repository, its commit, the scan options and results,
+the scanned files and their findings (line range, detector, impact, confidence, description).
+
+    scans      one row per scan (complete = no contract failed, timed out or was cancelled)
+    files      the scanned files of a scan, by path relative to the repository ('/' separated)
+    findings   the findings of the files, indexed by file, severity, detector and fingerprint
+
+    A previous scan is read back with a single query instead of analyzing the repository again,
+and the findings are filtered by the database indexes (see query()). Two scans are compared by the
+fingerprints of their findings (see Fingerprint and diff()), not by their line numbers.
+The database can be used from several threads and processes: every thread opens its own FindingsStore.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    repository TEXT NOT NULL,
+    commit_hash TEXT,
+    root_dir TEXT NOT NULL,
+    options TEXT NOT NULL,
+    started REAL NOT NULL,
+    elapsed REAL,
+    complete INTEGER NOT NULL,
+    contracts INTEGER NOT NULL,
+    stars INTEGER,
+    score REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    UNIQUE (scan_id, path)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    first_line INTEGER NOT NULL,
+    last_line INTEGER NOT NULL,
+    severity TEXT NOT NULL,
+    detector TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    description TEXT NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_repository ON scans (repository, commit_hash);
+CREATE INDEX IF NOT EXISTS findings_file ON findings (file_id);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (scan_id, severity);
+CREATE INDEX IF NOT EXISTS findings_detector ON findings (scan_id, detector);
+"""
+
+# Shortest prefix of a commit hash accepted to find its scan (like the abbreviated hashes of git)
+MIN_COMMIT_PREFIX = 7
+
+COMMIT_PATTERN = re.compile(r'[0-9a-f]{%d,40}' % MIN_COMMIT_PREFIX)
+
+# Columns of the findings that can be filtered on, besides the file
+FILTER_COLUMNS = ("severity", "detector", "confidence")
+
+def default_path():
+    return os.path.join(os.getcwd(), "SmartScan.db")
+
+# The options are compared as text, so they are written with sorted keys
+def options_text(options):
+    return json.dumps(options, sort_keys=True)
+
+# Path of a scanned file relative to the repository, the same on every platform
+def relative_path(path, root_dir):
+    return os.path.relpath(str(path), str(root_dir)).replace(os.sep, "/")
+
+# Fingerprints of the findings of a scanned file (read once for all its findings)
+def fingerprints(path, findings):
+    try:
+        with open(str(path), "rb") as source_file:
+            scopes = Fingerprint.SourceScopes(source_file.read().decode("utf-8", errors="replace"))
+    except OSError:
+        return [Fingerprint.fallback_fingerprint(detector, description)
+                for _, _, description, _, detector, _ in findings]
+    return [Fingerprint.finding_fingerprint(scopes, first_line, last_line, detector)
+            for first_line, last_line, _, _, detector, _ in findings]
+
+class FindingsStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path if db_path is not None else default_path()
+        # Waits for the writes of the other threads / processes instead of failing
+        self.connection = sqlite3.connect(self.db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL") # the readers don't wait for a scan being written
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+
+    # Adds the fingerprints to a database written before they existed (computed from the descriptions,
+    # the sources of the old scans may be gone)
+    def migrate(self):
+        columns = [row["name"] for row in self.connection.execute("PRAGMA table_info(findings)")]
+        with self.connection:
+            if "fingerprint" not in columns:
+                self.connection.execute("ALTER TABLE findings ADD COLUMN fingerprint TEXT")
+                rows = self.connection.execute("SELECT id, detector, description FROM findings").fetchall()
+                self.connection.executemany("UPDATE findings SET fingerprint = ? WHERE id = ?",
+                                            ((Fingerprint.fallback_fingerprint(detector, description), finding_id)
+                                             for finding_id, detector, description in rows))
+            self.connection.execute("CREATE INDEX IF NOT EXISTS findings_fingerprint ON findings (scan_id, fingerprint)")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    # Stores the findings of a scan (scanner.findings) in a single transaction, returns the id of the scan
+    def record_scan(self, repository, commit, options, scanner, root_dir, elapsed=None, started=None):
+        complete = (len(scanner.failed_contracts) == 0 and len(scanner.cancelled_contracts) == 0 and
+                    len(scanner.timed_out_contracts) == 0)
+        paths = scanner.findings.paths()
+        with self.connection:
+            scan_id = self.connection.execute(
+                "INSERT INTO scans (repository, commit_hash, root_dir, options, started, elapsed, complete, contracts, stars, score) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (repository, commit, os.path.abspath(str(root_dir)), options_text(options),
+                 started if started is not None else time.time(), elapsed, int(complete), len(paths),
+                 getattr(scanner, "stars", None), getattr(scanner, "score", None))).lastrowid
+
+            for path in paths:
+                file_id = self.connection.execute("INSERT INTO files (scan_id, path) VALUES (?, ?)",
+                                                  (scan_id, relative_path(path, root_dir))).lastrowid
+                findings = scanner.findings.file_findings(path)
+                if len(findings) == 0:
+                    continue
+                self.connection.executemany(
+                    "INSERT INTO findings (scan_id, file_id, first_line, last_line, description, severity, detector, confidence, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((scan_id, file_id) + tuple(finding) + (fingerprint,) for finding, fingerprint
+                     in zip(findings, fingerprints(path, findings))))
+        return scan_id
+
+    # Newest scan of the same repository with the same options done before the scan (None if there is none)
+    def previous_scan(self, scan_id):
+        row = self.connection.execute(
+            "SELECT previous.id FROM scans AS scan JOIN scans AS previous ON previous.repository = scan.repository "
+            "AND previous.options = scan.options AND previous.id < scan.id WHERE scan.id = ? "
+            "ORDER BY previous.id DESC LIMIT 1", (scan_id,)).fetchone()
+        return row["id"] if row is not None else None
+
+    # Id of the newest scan of the repository on the commit, given by its hash or a prefix of at least
+    # MIN_COMMIT_PREFIX hexadecimal characters (None if there is none).
+    # Raises a ValueError for another reference, or a prefix of several scanned commits.
+    def scan_of_commit(self, repository, commit):
+        commit = commit.strip().lower()
+        if not COMMIT_PATTERN.fullmatch(commit):
+            raise ValueError(f"{commit} is not a commit hash (at least {MIN_COMMIT_PREFIX} hexadecimal characters).")
+        rows = self.connection.execute(
+            "SELECT commit_hash, MAX(id) FROM scans WHERE repository = ? AND commit_hash LIKE ? GROUP BY commit_hash",
+            (repository, commit + "%")).fetchall()
+        if len(rows) > 1:
+            raise ValueError(f"{commit} matches several scanned commits: {', '.join(row[0][:12] for row in rows)}.")
+        return rows[0][1] if len(rows) == 1 else None
+
+    # The scans, newest first (of one repository if given)
+    def scans(self, repository=None, limit=None):
+        query = "SELECT * FROM scans"
+        parameters = []
+        if repository is not None:
+            query += " WHERE repository = ?"
+            parameters.append(repository)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return [dict(row) for row in self.connection.execute(query, parameters)]
+
+    # The scan as a dict, None if it doesn't exist
+    def scan(self, scan_id):
+        row = self.connection.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    # Id of the newest scan of the repository (None if it was never scanned)
+    def latest_scan(self, repository):
+        row = self.connection.execute("SELECT id FROM scans WHERE repository = ? ORDER BY id DESC LIMIT 1",
+                                      (repository,)).fetchone()
+        return row["id"] if row is not None else None
+
+    # Id of the newest complete scan of the commit with the same options (None if there is none)
+    def find_scan(self, repository, commit, options):
+        if commit is None:
+            return None
+        row = self.connection.execute(
+            "SELECT id FROM scans WHERE repository = ? AND commit_hash = ? AND options = ? AND complete = 1 "
+            "ORDER BY id DESC LIMIT 1", (repository, commit, options_text(options))).fetchone()
+        return row["id"] if row is not None else None
+
+    # {relative path : findings} of a scan, in the order the files were scanned (files without findings included)
+    def files(self, scan_id):
+        files = dict()
+        rows = self.connection.execute(
+            "SELECT files.path, findings.first_line, findings.last_line, findings.description, findings.severity, "
+            "findings.detector, findings.confidence FROM files LEFT JOIN findings ON findings.file_id = files.id "
+            "WHERE files.scan_id = ? ORDER BY files.id, findings.id", (scan_id,))
+        for path, *finding in rows:
+            findings = files.setdefault(path, [])
+            if finding[0] is not None:
+                findings.append(tuple(finding))
+        return files
+
+    # (relative path, finding) of the findings of a scan matching every given value (None = any),
+    # e.g. query(scan_id, severity="High", detector="reentrancy-eth")
+    def query(self, scan_id, path=None, severity=None, detector=None, confidence=None):
+        query = ("SELECT files.path, findings.first_line, findings.last_line, findings.description, findings.severity, "
+                 "findings.detector, findings.confidence FROM findings JOIN files ON files.id = findings.file_id "
+                 "WHERE findings.scan_id = ?")
+        parameters = [scan_id]
+        if path is not None:
+            query += " AND files.path = ?"
+            parameters.append(path)
+        for column, value in zip(FILTER_COLUMNS, (severity, detector, confidence)):
+            if value is not None:
+                query += f" AND findings.{column} = ?"
+                parameters.append(value)
+        query += " ORDER BY files.id, findings.id"
+        return [(row[0], tuple(row[1:])) for row in self.connection.execute(query, parameters)]
+
+    # {value : number of findings} of a column of the findings of a scan (severity, detector or confidence)
+    def count_by(self, scan_id, column):
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown findings column: {column}")
+        rows = self.connection.execute(f"SELECT {column}, COUNT(*) FROM findings WHERE scan_id = ? GROUP BY {column}",
+                                       (scan_id,))
+        return {value : count for value, count in rows}
+
+    # [(fingerprint, relative path, finding)] of the findings of a scan, in the order they were found
+    def fingerprinted_findings(self, scan_id):
+        rows = self.connection.execute(
+            "SELECT findings.fingerprint, files.path, findings.first_line, findings.last_line, findings.description, "
+            "findings.severity, findings.detector, findings.confidence FROM findings JOIN files ON files.id = findings.file_id "
+            "WHERE findings.scan_id = ? ORDER BY findings.id", (scan_id,))
+        return [(row[0], row[1], tuple(row[2:])) for row in rows]
+
+    # Compares the findings of two scans (e.g. two commits) by their fingerprints:
+    # {"introduced": [(relative path, finding)] only in head, "fixed": only in base, "unchanged": in both (as in head)}
+    # A fingerprint found n times in base matches at most n findings of head (and the other way around).
+    def diff(self, base_scan_id, head_scan_id):
+        base = self.fingerprinted_findings(base_scan_id)
+        head = self.fingerprinted_findings(head_scan_id)
+
+        changes = {"introduced": [], "fixed": [], "unchanged": []}
+        base_left = Counter(fingerprint for fingerprint, _, _ in base)
+        for fingerprint, path, finding in head:
+            if base_left[fingerprint] > 0:
+                base_left[fingerprint] -= 1
+                changes["unchanged"].append((path, finding))
+            else:
+                changes["introduced"].append((path, finding))
+
+        head_left = Counter(fingerprint for fingerprint, _, _ in head)
+        for fingerprint, path, finding in base:
+            if head_left[fingerprint] > 0:
+                head_left[fingerprint] -= 1
+            else:
+                changes["fixed"].append((path, finding))
+        return changes
+
+    def delete_scan(self, scan_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
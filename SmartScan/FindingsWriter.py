@@ -0,0 +1,108 @@
+import json
+import os
+
+"""
+    Streaming output of the findings, written while the contracts are analyzed:
+jsonl -> one JSON object per finding and per line (JSON Lines)
+sarif -> a SARIF 2.1.0 log (the results are written one by one, the rules at the end)
+
+    The findings are not kept in memory, they go through a buffered file that is flushed after
+every contract, so other tools can read the results of the analyzed contracts before the scan finishes.
+"""
+
+FORMATS = ["jsonl", "sarif"]
+
+BUFFER_SIZE = 1024 * 1024
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# SARIF level of every Slither impact
+SARIF_LEVELS = {
+    "Critical"      : "error",
+    "High"          : "error",
+    "Medium"        : "warning",
+    "Low"           : "note",
+    "Informational" : "note",
+    "Optimization"  : "note"
+}
+
+class JsonLinesWriter:
+    def __init__(self, path, root_dir=None):
+        self.root_dir = root_dir
+        self.output_file = open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+        self.count = 0
+
+    # Path of the contract relative to the scanned directory, with "/" separators
+    def relative_path(self, contract):
+        contract = str(contract)
+        if self.root_dir is not None:
+            contract = os.path.relpath(contract, str(self.root_dir))
+        return contract.replace(os.sep, "/")
+
+    # Writes the findings of one contract ((first_line, last_line, description, severity, detector, confidence) tuples)
+    def write_contract(self, contract, findings):
+        file_name = self.relative_path(contract)
+        for finding in findings:
+            self.write_finding(file_name, finding)
+            self.count += 1
+        self.output_file.flush()
+
+    def write_finding(self, file_name, finding):
+        first_line, last_line, description, severity, detector, confidence = finding
+        record = {
+            "file": file_name,
+            "first_line": first_line,
+            "last_line": last_line,
+            "severity": severity,
+            "detector": detector,
+            "confidence": confidence,
+            "description": description
+        }
+        self.output_file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.output_file.close()
+
+class SarifWriter(JsonLinesWriter):
+    def __init__(self, path, root_dir=None):
+        super().__init__(path, root_dir)
+        self.rules = dict() # detector -> index in the rules of the driver (only the detectors that found something)
+        self.output_file.write('{"$schema": ' + json.dumps(SARIF_SCHEMA) + ', "version": "2.1.0", "runs": [{"results": [\n')
+
+    def write_finding(self, file_name, finding):
+        first_line, last_line, description, severity, detector, confidence = finding
+        rule_index = self.rules.setdefault(detector, len(self.rules))
+        result = {
+            "ruleId": detector,
+            "ruleIndex": rule_index,
+            "level": SARIF_LEVELS.get(severity, "warning"),
+            "message": {"text": description},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": file_name, "uriBaseId": "%SRCROOT%"},
+                    "region": {"startLine": first_line, "endLine": last_line}
+                }
+            }],
+            "properties": {"severity": severity, "confidence": confidence}
+        }
+        separator = "" if self.count == 0 else ",\n"
+        self.output_file.write(separator + json.dumps(result))
+
+    def close(self):
+        rules = [{"id": detector, "name": detector, "shortDescription": {"text": detector}} for detector in self.rules]
+        tool = {"driver": {"name": "SmartScan", "rules": rules}}
+        self.output_file.write('\n], "tool": ' + json.dumps(tool) + '}]}\n')
+        super().close()
+
+# Opens the writer of the format ("jsonl" or "sarif")
+def open_writer(output_format, path, root_dir=None):
+    if output_format == "sarif":
+        return SarifWriter(path, root_dir)
+    if output_format == "jsonl":
+        return JsonLinesWriter(path, root_dir)
+    raise ValueError(f"Unknown output format '{output_format}', expected one of: {', '.join(FORMATS)}")
+
+# Output format from the file extension (.sarif / .sarif.json -> sarif, anything else -> jsonl)
+def format_of(path):
+    name = os.path.basename(path).lower()
+    return "sarif" if name.endswith(".sarif") or name.endswith(".sarif.json") else "jsonl"
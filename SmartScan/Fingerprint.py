@@ -0,0 +1,99 @@
+import hashlib
+import re
+
+"""
+    Stable fingerprints of the findings, used to match the findings of two scans (see FindingsStore.diff).
+
+    A fingerprint is a hash of the detector, the code of the finding (its lines without comments
+and whitespace) and the function (or modifier) enclosing it, qualified by its contract.
+Line numbers and paths are left out, so a finding keeps its fingerprint when code is added above it
+or its file is moved, and gets a new one when its code or its function changes.
+"""
+
+# Comments and string literals ("..." and '...', with escapes), matched from left to right
+# so a // in a string is not a comment and a quote in a comment is not a string
+COMMENT_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.DOTALL)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# contract Vault is Base {    library Math {    interface IERC20 {
+CONTRACT_PATTERN = re.compile(r'\b(?:abstract\s+)?(?:contract|library|interface)\s+(\w+)')
+
+# function withdraw(    modifier onlyOwner    constructor(    fallback(    receive(
+FUNCTION_PATTERN = re.compile(r'\b(?:function\s+(\w+)|modifier\s+(\w+)|(constructor|fallback|receive)\s*\()')
+
+# Code of a span of lines, without comments and whitespace (the strings are kept)
+def normalize(code):
+    return WHITESPACE_PATTERN.sub("", COMMENT_PATTERN.sub(lambda match: match.group(0) if match.group(0)[0] in "\"'" else "", code))
+
+# Source with the comments removed and the strings emptied, keeping its line breaks
+# (the keywords in a revert message or a comment don't declare anything)
+def strip_comments_and_strings(source):
+    def replace(match):
+        text = match.group(0)
+        line_breaks = "".join(character for character in text if character in "\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+        return ('""' if text[0] in "\"'" else "") + line_breaks
+    return COMMENT_PATTERN.sub(replace, source)
+
+"""
+    Enclosing contract and function of every line of a Solidity source, found in a single pass
+by following the braces, once the comments and the strings are removed.
+"""
+class SourceScopes:
+    def __init__(self, source):
+        self.lines = source.splitlines()
+        self.scopes = [] # line index -> "Contract.function", "Contract" or ""
+
+        depth = 0
+        contract, contract_depth = "", None
+        function, function_depth = "", None
+        pending_contract, pending_function = None, None # declared, waiting for their opening brace
+        for code in strip_comments_and_strings(source).splitlines():
+            match = CONTRACT_PATTERN.search(code)
+            if match:
+                pending_contract = match.group(1)
+            match = FUNCTION_PATTERN.search(code)
+            if match:
+                pending_function = next(name for name in match.groups() if name is not None)
+
+            # A line belongs to the function it declares
+            self.scopes.append(self.scope_name(contract if pending_contract is None else pending_contract,
+                                               function if pending_function is None else pending_function))
+
+            for character in code:
+                if character == "{":
+                    depth += 1
+                    if pending_contract is not None:
+                        contract, contract_depth, pending_contract = pending_contract, depth, None
+                    elif pending_function is not None:
+                        function, function_depth, pending_function = pending_function, depth, None
+                elif character == "}":
+                    if function_depth is not None and depth == function_depth:
+                        function, function_depth = "", None
+                    if contract_depth is not None and depth == contract_depth:
+                        contract, contract_depth = "", None
+                    depth -= 1
+                elif character == ";" and pending_function is not None:
+                    pending_function = None # declaration without a body (interface, abstract function)
+
+    def scope_name(self, contract, function):
+        return f"{contract}.{function}" if function else contract
+
+    # Scope of a line (1-based, like the lines of the findings)
+    def scope(self, line):
+        return self.scopes[line - 1] if 0 < line <= len(self.scopes) else ""
+
+    # Code of the lines first_line to last_line (1-based, included)
+    def code(self, first_line, last_line):
+        return "\n".join(self.lines[max(first_line - 1, 0):last_line])
+
+def fingerprint(detector, normalized_code, scope):
+    return hashlib.sha1(f"{detector}\0{scope}\0{normalized_code}".encode("utf-8")).hexdigest()[:20]
+
+# Fingerprint of a finding of the source (SourceScopes), from its detector and its lines
+def finding_fingerprint(scopes, first_line, last_line, detector):
+    return fingerprint(detector, normalize(scopes.code(first_line, last_line)), scopes.scope(first_line))
+
+# Fingerprint of a finding whose source can't be read: its detector and its description without the line numbers
+def fallback_fingerprint(detector, description):
+    return fingerprint(detector, normalize(re.sub(r'#\d+(-\d+)?', "", description)), "")
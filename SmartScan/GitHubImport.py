@@ -1,11 +1,12 @@
 from genericpath import exists
-import github
 import subprocess
+import shutil
+import stat
 import os
 
 class GitHubImport():
 
-    def __init__(self, repo_path):
+    def __init__(self, repo_path, clone_dir=None):
         # GitHub API token (for authentication)
         # Necesarry when working with private repos
 
@@ -21,24 +22,20 @@ class GitHubImport():
         # Repository details
         self.REPO_PATH = repo_path # "https://github.com/MariusChiarEl/Blockchain-project.git"
 
+        # Directory to clone the repository into
+        self.clone_dir = clone_dir if clone_dir is not None else os.path.join(os.getcwd(), "ClonedRepo")
+
         self.clone_result = self.clone_repo()
 
     def clone_repo(self):
-        git_hub = github.Github()
-
-        # remove cloned repo if already exists
-        clone_dir = os.path.join(os.getcwd(), "ClonedRepo")
-        if os.path.exists(clone_dir):
-            os.system('rmdir /S /Q "{}"'.format(clone_dir))
-
-        os.mkdir(path=clone_dir)
-
-        # Directory to clone the repository into
-        clone_dir = os.path.join(clone_dir)
-
         # Clone the repository using git command
         try:
-            subprocess.run(["git", "clone", self.REPO_PATH, clone_dir], check=True)
+            if self.is_reusable_clone():
+                # same repository: only fetch the latest commit and check it out
+                self.update_clone()
+            else:
+                self.remove_clone()
+                self.shallow_clone()
             print("Repository cloned successfully!")
             return True
         except subprocess.CalledProcessError as e:
@@ -47,3 +44,60 @@ class GitHubImport():
         except Exception as e:
             print(f"An error occurred: {e}")
             return False
+
+    # True if clone_dir already holds a clone of the same repository URL
+    def is_reusable_clone(self):
+        if not os.path.isdir(os.path.join(self.clone_dir, ".git")):
+            return False
+
+        remote = subprocess.run(["git", "-C", self.clone_dir, "remote", "get-url", "origin"],
+                                capture_output=True, text=True)
+        return remote.returncode == 0 and remote.stdout.strip() == self.REPO_PATH.strip()
+
+    # remove cloned repo if already exists
+    def remove_clone(self):
+        if os.path.exists(self.clone_dir):
+            shutil.rmtree(self.clone_dir, onerror=make_writable_and_retry)
+
+    """
+        Shallow (latest commit only), blob-filtered clone: the file contents are downloaded
+    only for the files that are checked out, and the sparse checkout only checks out
+    the Solidity sources and the build configuration files.
+    """
+    def shallow_clone(self):
+        subprocess.run(["git", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", "--single-branch",
+                        self.REPO_PATH, self.clone_dir], check=True)
+        self.set_sparse_checkout()
+        subprocess.run(["git", "-C", self.clone_dir, "checkout", "--quiet"], check=True)
+
+    def update_clone(self):
+        subprocess.run(["git", "-C", self.clone_dir, "fetch", "--depth", "1", "--filter=blob:none", "origin", "HEAD"], check=True)
+        self.set_sparse_checkout()
+        subprocess.run(["git", "-c", "advice.detachedHead=false", "-C", self.clone_dir, "checkout", "--quiet", "--force", "FETCH_HEAD"], check=True)
+
+    # Written directly to .git/info/sparse-checkout, so it works with older git versions too
+    def set_sparse_checkout(self):
+        subprocess.run(["git", "-C", self.clone_dir, "config", "core.sparseCheckout", "true"], check=True)
+
+        sparse_checkout_path = os.path.join(self.clone_dir, ".git", "info", "sparse-checkout")
+        os.makedirs(os.path.dirname(sparse_checkout_path), exist_ok=True)
+        with open(sparse_checkout_path, "w", encoding="utf-8") as sparse_checkout_file:
+            sparse_checkout_file.write("\n".join(SPARSE_CHECKOUT_PATTERNS) + "\n")
+
+# Files checked out from the repository: Solidity sources and the files describing how to build them
+SPARSE_CHECKOUT_PATTERNS = [
+    "*.sol",
+    "foundry.toml",
+    "remappings.txt",
+    "hardhat.config.*",
+    "truffle-config.js",
+    "truffle.js",
+    "package.json",
+    ".gitignore",
+    ".gitmodules"
+]
+
+# git marks its object files as read-only, which makes rmtree fail on Windows
+def make_writable_and_retry(function, path, _):
+    os.chmod(path, stat.S_IWRITE)
+    function(path)
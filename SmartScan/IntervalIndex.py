@@ -0,0 +1,73 @@
+"""
+    Centered interval tree over the (first line, last line) ranges of the findings of a file.
+
+    Built once when the file is opened, it returns every finding covering a line in O(log n + k)
+(k findings returned), instead of going through all the findings of the file on every cursor move.
+Every node keeps the intervals containing its center, sorted by first line and by last line,
+the intervals entirely before the center go to the left child and the ones after it to the right child.
+"""
+class IntervalNode:
+    def __init__(self, center, intervals, left, right):
+        self.center = center
+        self.by_first = sorted(intervals, key=lambda interval: interval[0])
+        self.by_last = sorted(intervals, key=lambda interval: interval[1], reverse=True)
+        self.left = left
+        self.right = right
+
+class IntervalIndex:
+    # intervals: iterable of (first line, last line, value)
+    def __init__(self, intervals=()):
+        # The position is kept so the values are returned in the order they were given
+        items = [(first, last, position, value) for position, (first, last, value) in enumerate(intervals)]
+        self.size = len(items)
+        self.root = self.build(items)
+
+    def build(self, items):
+        if len(items) == 0:
+            return None
+
+        # The median endpoint splits the intervals in two halves of similar size
+        endpoints = sorted([item[0] for item in items] + [item[1] for item in items])
+        center = endpoints[len(endpoints) // 2]
+
+        before = [item for item in items if item[1] < center]
+        after = [item for item in items if item[0] > center]
+        overlapping = [item for item in items if item[0] <= center <= item[1]]
+        return IntervalNode(center, overlapping, self.build(before), self.build(after))
+
+    # Values of every interval covering line, in the order they were given
+    def at(self, line):
+        found = []
+        node = self.root
+        while node is not None:
+            if line < node.center:
+                for item in node.by_first:
+                    if item[0] > line:
+                        break
+                    found.append(item)
+                node = node.left
+            elif line > node.center:
+                for item in node.by_last:
+                    if item[1] < line:
+                        break
+                    found.append(item)
+                node = node.right
+            else:
+                found.extend(node.by_first)
+                break
+
+        found.sort(key=lambda item: item[2])
+        return [item[3] for item in found]
+
+    def __len__(self):
+        return self.size
+
+# Merges overlapping and adjacent (first line, last line) ranges, returns them sorted
+def merge_ranges(ranges):
+    merged = []
+    for first, last in sorted(ranges):
+        if len(merged) > 0 and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return [(first, last) for first, last in merged]
@@ -0,0 +1,56 @@
+from pathlib import Path
+import hashlib
+import os
+import subprocess
+
+"""
+    Local bare mirror of a repository, kept between scans and keyed by the repository URL.
+
+    The mirror is a shallow bare clone of the default branch: it is updated with a single
+`git fetch --depth 1` and ClonedRepo is cloned from it, so the network is only used for the new commits.
+The findings of the scans are kept in the FindingsStore with the commit they belong to,
+so a repository without new commits is not checked out nor analyzed again.
+"""
+class RepoMirror:
+    def __init__(self, repo_url, mirrors_dir=None):
+        self.repo_url = repo_url.strip()
+        self.mirrors_dir = mirrors_dir if mirrors_dir is not None else os.path.join(os.getcwd(), "Mirrors")
+
+        name = hashlib.sha1(self.repo_url.encode()).hexdigest()[:16]
+        self.mirror_dir = os.path.join(self.mirrors_dir, name + ".git")
+
+    # URL the working clone is cloned from (file:// so shallow and filtered clones work)
+    def url(self):
+        return Path(self.mirror_dir).as_uri()
+
+    # Commit the remote HEAD points to, without downloading anything (None if the remote can't be reached)
+    def resolve_commit(self):
+        result = subprocess.run(["git", "ls-remote", self.repo_url, "HEAD"], capture_output=True, text=True)
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        return result.stdout.split()[0]
+
+    # Creates the mirror or fetches the latest commit of the default branch into it
+    def update(self):
+        if not os.path.isdir(self.mirror_dir):
+            os.makedirs(self.mirrors_dir, exist_ok=True)
+            subprocess.run(["git", "clone", "--bare", "--depth", "1", "--single-branch", self.repo_url, self.mirror_dir], check=True)
+            # allow the blob-filtered clone of ClonedRepo from the mirror
+            subprocess.run(["git", "-C", self.mirror_dir, "config", "uploadpack.allowFilter", "true"], check=True)
+            return
+
+        branch = subprocess.run(["git", "-C", self.mirror_dir, "symbolic-ref", "HEAD"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        subprocess.run(["git", "-C", self.mirror_dir, "fetch", "--depth", "1", "origin", f"+HEAD:{branch}"], check=True)
+
+# True if the working clone has commit checked out, without local changes
+def is_clean_checkout(clone_dir, commit):
+    if commit is None or head_commit(clone_dir) != commit:
+        return False
+    status = subprocess.run(["git", "-C", str(clone_dir), "status", "--porcelain"], capture_output=True, text=True)
+    return status.returncode == 0 and status.stdout.strip() == ""
+
+# Commit checked out in a working clone
+def head_commit(clone_dir):
+    result = subprocess.run(["git", "-C", str(clone_dir), "rev-parse", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
@@ -1,9 +1,8 @@
-from PySide6.QtWidgets import (QWidget, QHBoxLayout, QLineEdit, QPushButton)
+from PySide6.QtWidgets import (QWidget, QHBoxLayout, QLineEdit, QPushButton, QProgressBar, QSpinBox, QCheckBox, QComboBox)
 from PySide6.QtCore import QDir
 
-import GitHubImport
+import Repository, DetectorRegistry
 
-from pathlib import Path
 import os
 
 class RepoPath(QWidget):
@@ -18,25 +17,51 @@ class RepoPath(QWidget):
         self.text_input.setPlaceholderText("Enter the GitHub repository path...")
         self.bottom_layout.addWidget(self.text_input)
 
+        # Number of processes used for the analysis (1 = serial)
+        self.workers_input = QSpinBox()
+        self.workers_input.setPrefix("Workers: ")
+        self.workers_input.setRange(1, os.cpu_count() or 1)
+        self.workers_input.setValue(os.cpu_count() or 1)
+        self.bottom_layout.addWidget(self.workers_input)
+
+        # Compile the whole repository once instead of every contract separately
+        self.project_mode_input = QCheckBox("Project mode")
+        self.project_mode_input.setToolTip("Compile the repository once (Hardhat / Foundry / Truffle), or once per solc version for a plain directory.\nUnchecked, every contract is compiled on its own.")
+        self.bottom_layout.addWidget(self.project_mode_input)
+
+        # Detector profile (fast = high impact only, standard, full)
+        self.profile_input = QComboBox()
+        self.profile_input.addItems(list(DetectorRegistry.PROFILES.keys()))
+        self.profile_input.setCurrentText(DetectorRegistry.DEFAULT_PROFILE)
+        self.profile_input.setToolTip("Detector profile: fast (high impact only), standard (high, medium, low) or full")
+        self.bottom_layout.addWidget(self.profile_input)
+
         # Button (QPushButton)
         self.run_button = QPushButton("Analyze")
         self.bottom_layout.addWidget(self.run_button)
+
+        # Progress bar (only visible while a scan is running)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.bottom_layout.addWidget(self.progress_bar)
         self.failed = False
 
     def on_run_button_clicked(self):
         """Event for run_button press"""
 
-        git_hub_import = GitHubImport.GitHubImport(self.text_input.text())
-        if git_hub_import.clone_result is False: # in case of failure
-            self.failed = True
-        clone_dir = os.path.join(os.getcwd(), "ClonedRepo")
-
-        dir = Path(clone_dir)
+        self.failed, contracts = Repository.fetch_contracts(self.text_input.text())
+        return contracts
 
-        contracts = []
-        for contract in dir.rglob("*.sol"):
-            contracts.append(contract)
+    def show_cloning(self):
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0) # busy indicator, the number of contracts is not known yet
+        self.progress_bar.setFormat("Cloning...")
 
-        return contracts
+    def show_progress(self, scanned, total, eta):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(scanned)
+        minutes, seconds = divmod(int(eta), 60)
+        self.progress_bar.setFormat(f"%v / %m contracts - ETA {minutes}m {seconds}s")
 
-    
\ No newline at end of file
+    def hide_progress(self):
+        self.progress_bar.setVisible(False)
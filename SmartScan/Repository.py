@@ -0,0 +1,43 @@
+import GitHubImport, ContractDiscovery
+
+from pathlib import Path
+import os
+import subprocess
+
+# Clone and contract discovery steps of a scan (no GUI code, used by both the GUI and the command line)
+
+# Directory the repository is cloned into
+def clone_directory():
+    return os.path.join(os.getcwd(), "ClonedRepo")
+
+# Clones the repository into clone_dir (default: clone_directory()), returns False on failure
+# With a RepoMirror, the mirror is updated first and the repository is cloned from it
+def clone(repo_url, mirror=None, clone_dir=None):
+    if mirror is not None:
+        try:
+            mirror.update()
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to update the repository mirror: {e}")
+            return False
+        repo_url = mirror.url()
+
+    git_hub_import = GitHubImport.GitHubImport(repo_url, clone_dir if clone_dir is not None else clone_directory())
+    return git_hub_import.clone_result
+
+# Walks the cloned repository (or root_dir), returns the ContractDiscovery with the files found and the walk statistics
+def discover_contracts(root_dir=None, include=(), exclude=(), default_excludes=True):
+    dir = Path(root_dir if root_dir is not None else clone_directory())
+
+    discovery = ContractDiscovery.ContractDiscovery(dir, include, exclude, default_excludes)
+    discovery.run()
+    print(discovery.report())
+    return discovery
+
+# Returns the Solidity files of the cloned repository (or of root_dir)
+def find_contracts(root_dir=None, include=(), exclude=(), default_excludes=True):
+    return discover_contracts(root_dir, include, exclude, default_excludes).contracts
+
+# Clones the repository and returns (failed, contracts)
+def fetch_contracts(repo_url):
+    failed = clone(repo_url) is False # in case of failure
+    return failed, find_contracts()
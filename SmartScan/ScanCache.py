@@ -0,0 +1,177 @@
+import SolidityImports, SecurityVulnerability
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+from functools import lru_cache
+
+"""
+    Persistent, content-addressed cache of the findings of each contract.
+
+    The key of a contract is a hash of: its source, the sources of all the files it imports
+(transitively), the solc version, the Slither version, the detector set, the analysis mode and the findings format.
+If none of them changed, the stored findings are returned and the contract is neither compiled nor analyzed.
+The key also holds the path of the contract relative to root_dir, and the descriptions of Slither (which hold the
+paths of the files) are stored relative to root_dir and rebased on the root_dir of the scan reading them back,
+so the repositories sharing the cache (batch workspaces) never get the paths of another repository.
+
+    Every entry is a JSON file in cache_dir. When the cache grows over max_size bytes,
+the least recently used entries (oldest modification time, refreshed on every hit) are removed.
+"""
+# Stands for the root directory of the scan in the stored descriptions
+ROOT_PLACEHOLDER = "<root>"
+
+class ScanCache:
+    def __init__(self, cache_dir=None, max_size=256 * 1024 * 1024, root_dir=None):
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(os.getcwd(), "ScanCache")
+        self.max_size = max_size
+        self.import_resolver = SolidityImports.ImportResolver(root_dir)
+        self.root_dir = os.path.abspath(str(root_dir)) if root_dir is not None else None
+        self.root_pattern = root_pattern(self.root_dir) if root_dir is not None else None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_size = sum(size for _, size, _ in self.entries())
+        if self.total_size > self.max_size:
+            self.evict()
+
+        self.hits = 0
+        self.misses = 0
+
+    # compiler: version of the solc the contract is compiled with (None = the solc on the PATH)
+    def key(self, path, detector_names, mode="contract", compiler=None):
+        sha = hashlib.sha256()
+        sha.update(f"solc={compiler or solc_version()}\nslither={slither_version()}\nmode={mode}\n".encode())
+        sha.update(f"format={SecurityVulnerability.FINDINGS_FORMAT}\n".encode())
+        sha.update(("detectors=" + ",".join(sorted(detector_names)) + "\n").encode())
+
+        # The same source at another path of the repository has other descriptions
+        path = os.path.normpath(str(path))
+        if self.root_dir is not None:
+            sha.update(f"path={os.path.relpath(os.path.abspath(path), self.root_dir).replace(os.sep, '/')}\n".encode())
+
+        # The source and its imported files are hashed by their content, the unresolved imports by their name
+        for source_path in [path] + self.import_resolver.transitive_imports(path):
+            sha.update(hashlib.sha256(self.import_resolver.source(source_path)).digest())
+            _, unresolved = self.import_resolver.direct_imports(source_path)
+            for import_path in unresolved:
+                sha.update(f"unresolved={import_path}\n".encode())
+
+        return sha.hexdigest()
+
+    # Returns the stored findings or None (counts the hit / miss)
+    def load(self, key):
+        findings_list = self.load_all([key])
+        return None if findings_list is None else findings_list[0]
+
+    # Returns the stored findings of every key, or None if any of them is missing
+    def load_all(self, keys):
+        entry_paths = [os.path.join(self.cache_dir, key + ".json") for key in keys]
+        findings_list = []
+        try:
+            for entry_path in entry_paths:
+                with open(entry_path, "r", encoding="utf-8") as entry_file:
+                    findings_list.append([self.rebase(finding) for finding in json.load(entry_file)["findings"]])
+        except (OSError, ValueError, KeyError):
+            self.misses += len(keys)
+            return None
+
+        for entry_path in entry_paths:
+            os.utime(entry_path)
+        self.hits += len(keys)
+        return findings_list
+
+    # Writes the entry through its own temporary file, so the scans sharing the cache directory (batch threads,
+    # other processes) can store the same key at the same time. A failed write only costs a cache miss later.
+    def store(self, key, findings):
+        entry_path = os.path.join(self.cache_dir, key + ".json")
+        try:
+            previous_size = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+            descriptor, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            try:
+                with os.fdopen(descriptor, "w", encoding="utf-8") as entry_file:
+                    json.dump({"findings": [self.relativize(finding) for finding in findings]}, entry_file)
+                os.replace(temporary_path, entry_path)
+            except BaseException:
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+                raise
+            size = os.path.getsize(entry_path)
+        except OSError as e:
+            print(f"The scan cache entry could not be written: {e}")
+            return
+
+        # An overwritten entry only changes the size by the difference (evict() counts the directory again)
+        self.total_size += size - previous_size
+        if self.total_size > self.max_size:
+            self.evict()
+
+    # Finding with root_dir replaced by ROOT_PLACEHOLDER in its description
+    def relativize(self, finding):
+        finding = tuple(finding)
+        if self.root_dir is None:
+            return finding
+        return finding[:2] + (self.root_pattern.sub(ROOT_PLACEHOLDER, finding[2]),) + finding[3:]
+
+    # Finding read back from an entry, with ROOT_PLACEHOLDER replaced by root_dir
+    def rebase(self, finding):
+        finding = tuple(finding)
+        if self.root_dir is None or ROOT_PLACEHOLDER not in finding[2]:
+            return finding
+        return finding[:2] + (finding[2].replace(ROOT_PLACEHOLDER, self.root_dir),) + finding[3:]
+
+    # (modification time, size, path) of every entry
+    def entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    # Removes the least recently used entries until the cache fits in max_size
+    def evict(self):
+        entries = sorted(self.entries())
+        self.total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in entries:
+            if self.total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+                self.total_size -= size
+            except OSError:
+                pass
+
+    def report(self):
+        return f"Cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+# Matches a root directory at the start of a path in the descriptions: absolute, or relative to the working
+# directory (as given to Slither), with the separators of the platform or '/', and followed by a separator
+def root_pattern(root_dir):
+    forms = {root_dir}
+    try:
+        forms.add(os.path.relpath(root_dir))
+    except ValueError: # on another drive (Windows)
+        pass
+    forms |= {form.replace(os.sep, "/") for form in forms}
+    forms = sorted((form for form in forms if form not in ("", ".")), key=len, reverse=True)
+    return re.compile(r'(?<![\w.\-/\\])(?:' + "|".join(re.escape(form) for form in forms) + r')(?=[/\\])')
+
+@lru_cache(maxsize=None)
+def solc_version():
+    try:
+        output = subprocess.run(["solc", "--version"], capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    match = re.search(r"Version:\s*(\S+)", output)
+    return match.group(1) if match else "unknown"
+
+@lru_cache(maxsize=None)
+def slither_version():
+    from importlib import metadata # slow to import, only needed with a cache
+
+    try:
+        return metadata.version("slither-analyzer")
+    except metadata.PackageNotFoundError:
+        return "unknown"
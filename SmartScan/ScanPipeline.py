@@ -0,0 +1,67 @@
+import SlitherScanner, ScanCache, DetectorRegistry, RepoMirror, SecurityVulnerability, SolcResolver, WorkerPool, FindingsStore
+
+from pathlib import Path
+
+# Builds the SlitherScanner for a scan of root_dir with the options chosen in the GUI or on the command line
+# The contracts are analyzed in worker processes, replaced after max_tasks analyses or over memory_limit bytes,
+# an analysis is stopped after contract_timeout seconds and the whole scan after scan_timeout seconds
+def build_scanner(root_dir, workers=1, project_mode=False, use_cache=True,
+                  profile=DetectorRegistry.DEFAULT_PROFILE, include=(), exclude=(), profiler=None,
+                  writer=None, quiet=False, executor=None, max_tasks=WorkerPool.DEFAULT_MAX_TASKS, memory_limit=None,
+                  contract_timeout=None, scan_timeout=None):
+    project_dir = root_dir if project_mode else None
+    cache = ScanCache.ScanCache(root_dir=root_dir) if use_cache else None
+    detectors = DetectorRegistry.select(profile, include, exclude)
+    # Without installed compilers every contract is compiled with the solc on the PATH
+    solc_resolver = None
+    if len(SolcResolver.installed_compilers()) > 0:
+        solc_resolver = SolcResolver.SolcResolver(root_dir, cache.import_resolver if cache is not None else None)
+    return SlitherScanner.SlitherScanner(workers=workers, project_dir=project_dir, cache=cache,
+                                         detectors=detectors, profiler=profiler, writer=writer, quiet=quiet,
+                                         executor=executor, solc_resolver=solc_resolver,
+                                         max_tasks=max_tasks, memory_limit=memory_limit,
+                                         contract_timeout=contract_timeout, scan_timeout=scan_timeout)
+
+# The scan options that change the findings (a stored scan is only reused with the same options)
+def scan_options(project_mode=False, profile=DetectorRegistry.DEFAULT_PROFILE, include=(), exclude=(),
+                 include_files=(), exclude_files=(), all_files=False):
+    return {"findings_format": SecurityVulnerability.FINDINGS_FORMAT, "project_mode": project_mode, "profile": profile, "include": sorted(include), "exclude": sorted(exclude),
+            "include_files": sorted(include_files), "exclude_files": sorted(exclude_files), "all_files": all_files}
+
+# Returns the RepoMirror of the repository, its current commit and the findings stored for that commit
+# (None when the repository has new commits, was never scanned or can't be reached)
+def stored_scan(repo_url, options):
+    mirror = RepoMirror.RepoMirror(repo_url)
+    commit = mirror.resolve_commit()
+    if commit is None:
+        return mirror, None, None
+    with FindingsStore.FindingsStore() as store:
+        scan_id = store.find_scan(mirror.repo_url, commit, options)
+        return mirror, commit, store.files(scan_id) if scan_id is not None else None
+
+# Merges stored findings into the scanner, yields (contract, errors) like SlitherScanner.scan
+def restore_scan(scanner, files, root_dir):
+    for relative_path, findings in files.items():
+        contract = Path(root_dir) / relative_path
+        yield contract, scanner.merge_findings(contract, findings, None)
+
+# Records the findings of the scan in the FindingsStore with the commit checked out in root_dir, returns the scan id
+# (only complete scans of a commit are restored by stored_scan, the others are kept for the history and the queries)
+def store_scan(repository, scanner, root_dir, options, elapsed=None):
+    with FindingsStore.FindingsStore() as store:
+        return store.record_scan(repository.strip(), RepoMirror.head_commit(root_dir), options, scanner, root_dir, elapsed)
+
+# Line of the report with the changes since the previous scan of the repository with the same options
+# ("" for its first scan), the findings being matched by their fingerprints (see FindingsStore.diff)
+def changes_report(scan_id):
+    with FindingsStore.FindingsStore() as store:
+        previous_scan_id = store.previous_scan(scan_id)
+        if previous_scan_id is None:
+            return ""
+        changes = store.diff(previous_scan_id, scan_id)
+    return (f"Since the previous scan ({previous_scan_id}): {len(changes['introduced'])} introduced, "
+            f"{len(changes['fixed'])} fixed, {len(changes['unchanged'])} unchanged finding(s)\n")
+
+# Bytes of a memory limit given in megabytes on the command line (None = no limit)
+def memory_limit_bytes(megabytes):
+    return int(megabytes * WorkerPool.MEGABYTE) if megabytes else None
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+import csv
+import json
+import time
+
+"""
+Records the wall and CPU time of the scan stages: clone, discovery, and for each contract
+compile (solc through crytic-compile), ir (Slither IR build) and every detector ("detector:<name>"),
+and the peak memory of the analysis of every contract.
+
+StageTimer is used where the work happens (possibly in a worker process) and its records are
+picklable (contract, stage, wall seconds, cpu seconds) tuples that are collected by a ScanProfiler.
+"""
+class StageTimer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []
+
+    @contextmanager
+    def measure(self, contract, stage):
+        if not self.enabled:
+            yield
+            return
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.records.append((str(contract), stage, time.perf_counter() - wall_start, time.process_time() - cpu_start))
+
+class ScanProfiler(StageTimer):
+    def __init__(self):
+        super().__init__(enabled=True)
+        self.memory = dict() # contract -> peak memory of its analysis in bytes
+
+    def add(self, records):
+        self.records.extend(records)
+
+    def add_memory(self, peaks):
+        self.memory.update(peaks)
+
+    # Total time of each stage over all the contracts (all the detector runs of one detector are summed up)
+    def stage_totals(self):
+        totals = dict()
+        for _, stage, wall, cpu in self.records:
+            total = totals.setdefault(stage, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += wall
+            total[2] += cpu
+        return totals
+
+    # Text table of the slowest stages and (contract, stage) pairs, sorted by wall time
+    def table(self, limit=20):
+        lines = [f"{'Stage':<40} {'Runs':>6} {'Wall (s)':>10} {'CPU (s)':>10}"]
+        totals = sorted(self.stage_totals().items(), key=lambda item: item[1][1], reverse=True)
+        for stage, (runs, wall, cpu) in totals[:limit]:
+            lines.append(f"{stage:<40} {runs:>6} {wall:>10.3f} {cpu:>10.3f}")
+
+        lines.append("")
+        lines.append(f"{'Contract':<60} {'Stage':<40} {'Wall (s)':>10} {'CPU (s)':>10}")
+        for contract, stage, wall, cpu in sorted(self.records, key=lambda record: record[2], reverse=True)[:limit]:
+            lines.append(f"{contract[-60:]:<60} {stage:<40} {wall:>10.3f} {cpu:>10.3f}")
+
+        if len(self.memory) > 0:
+            lines.append("")
+            lines.append(f"{'Contract':<60} {'Peak memory (MB)':>17}")
+            for contract, peak in sorted(self.memory.items(), key=lambda item: item[1], reverse=True)[:limit]:
+                lines.append(f"{contract[-60:]:<60} {peak / (1024 * 1024):>17.1f}")
+
+        return "\n".join(lines)
+
+    # Writes every record as a CSV table (sortable in any spreadsheet) and as JSON, with the stage totals
+    def write(self, csv_path="scan_profile.csv", json_path="scan_profile.json"):
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["contract", "stage", "wall_seconds", "cpu_seconds"])
+            for contract, stage, wall, cpu in sorted(self.records, key=lambda record: record[2], reverse=True):
+                writer.writerow([contract, stage, f"{wall:.6f}", f"{cpu:.6f}"])
+
+        profile = {
+            "records": [
+                {"contract": contract, "stage": stage, "wall_seconds": wall, "cpu_seconds": cpu}
+                for contract, stage, wall, cpu in self.records
+            ],
+            "stage_totals": {
+                stage: {"runs": runs, "wall_seconds": wall, "cpu_seconds": cpu}
+                for stage, (runs, wall, cpu) in self.stage_totals().items()
+            },
+            "peak_memory_bytes": self.memory
+        }
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(profile, json_file, indent=2)
@@ -0,0 +1,248 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+import Repository, ScanPipeline, SolidityImports, DetectorRegistry, ScanProfiler, RepoMirror, WorkerPool, FindingsStore
+import datetime
+import json
+import time
+
+# Signals sent by the ScanWorker back to the GUI thread
+# (QRunnable is not a QObject, so it cannot own signals itself)
+class ScanWorkerSignals(QObject):
+    clone_failed = Signal()
+    contracts_found = Signal(int)                 # number of contracts to analyze
+    contract_scanned = Signal(object, list, list) # contract path, its errors, its affected lines
+    progress = Signal(int, int, float)            # scanned contracts, total contracts, ETA in seconds
+    finished = Signal(object, str, float)         # SlitherScanner, severity report, elapsed seconds
+    cancelled = Signal()                          # cancelled before the analysis started
+
+"""
+Runs the clone -> find contracts -> analysis pipeline outside of the GUI thread,
+so the window stays responsive while big repositories are scanned.
+Start it with QThreadPool.globalInstance().start(worker)
+"""
+class ScanWorker(QRunnable):
+    def __init__(self, repo_url, workers=1, project_mode=False, use_cache=True,
+                 profile=DetectorRegistry.DEFAULT_PROFILE, include=(), exclude=(), profiling=False,
+                 include_files=(), exclude_files=(), all_files=False,
+                 max_tasks=WorkerPool.DEFAULT_MAX_TASKS, memory_limit=None, contract_timeout=None, scan_timeout=None):
+        super().__init__()
+        self.repo_url = repo_url
+        self.workers = workers # number of analysis processes
+        self.project_mode = project_mode # compile the whole repository once
+        self.use_cache = use_cache # reuse the findings of unchanged contracts
+
+        # Detector selection (see DetectorRegistry.select)
+        self.profile = profile
+        self.include = include
+        self.exclude = exclude
+
+        # Source files selection (see ContractDiscovery), all_files keeps the test and mock contracts
+        self.include_files = include_files
+        self.exclude_files = exclude_files
+        self.all_files = all_files
+
+        # Record the time of every stage in scan_profile.csv / scan_profile.json
+        self.profiling = profiling
+
+        # Analysis processes replaced after max_tasks analyses, stopped over memory_limit bytes (see WorkerPool)
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+
+        # Seconds after which the analysis of a contract, and the analysis of the repository, are stopped
+        self.contract_timeout = contract_timeout
+        self.scan_timeout = scan_timeout
+
+        # Set by cancel() from the GUI thread
+        self.cancel_requested = False
+        self.scanner = None
+        self.signals = ScanWorkerSignals()
+
+    def run(self):
+        analisys_time_start = time.time()
+
+        profiler = ScanProfiler.ScanProfiler() if self.profiling else None
+        timer = profiler if profiler is not None else ScanProfiler.StageTimer(enabled=False)
+
+        clone_dir = Repository.clone_directory()
+        options = ScanPipeline.scan_options(self.project_mode, self.profile, self.include, self.exclude,
+                                            self.include_files, self.exclude_files, self.all_files)
+        if self.use_cache:
+            mirror, commit, stored_files = ScanPipeline.stored_scan(self.repo_url, options)
+        else:
+            mirror, commit, stored_files = RepoMirror.RepoMirror(self.repo_url), None, None
+
+        # get the smart contracts
+        # (no checkout when the commit of the stored scan is already in ClonedRepo)
+        if stored_files is None or not RepoMirror.is_clean_checkout(clone_dir, commit):
+            with timer.measure("", "clone"):
+                cloned = Repository.clone(self.repo_url, mirror)
+            if cloned is False:
+                self.signals.clone_failed.emit()
+                return
+            if self.cancel_requested:
+                self.signals.cancelled.emit()
+                return
+
+        # No new commits since the last scan: its findings are shown without analyzing again
+        if stored_files is not None:
+            self.restore_stored_scan(stored_files, clone_dir, analisys_time_start)
+            return
+
+        with timer.measure("", "discovery"):
+            discovery = Repository.discover_contracts(clone_dir, self.include_files, self.exclude_files, not self.all_files)
+        contracts = discovery.contracts
+        if self.cancel_requested:
+            self.signals.cancelled.emit()
+            return
+
+        self.signals.contracts_found.emit(len(contracts))
+        if len(contracts) == 0:
+            return
+
+        scanner = self.build_scanner(clone_dir, profiler)
+        self.scanner = scanner
+        if self.cancel_requested: # cancelled while the scanner was built
+            scanner.cancel()
+        scan_time_start = time.time()
+        for index, (contract, errors) in enumerate(scanner.scan(contracts)):
+            affected_lines = scanner.affected_lines_mapping.get(contract, [])
+            self.signals.contract_scanned.emit(contract, errors, affected_lines)
+
+            # Estimate the remaining time from the average time per contract so far
+            scanned = index + 1
+            average_time = (time.time() - scan_time_start) / scanned
+            eta = average_time * (len(contracts) - scanned)
+            self.signals.progress.emit(scanned, len(contracts), eta)
+
+        report = scanner.generate_severity_report()
+        report += discovery.report() + "\n"
+        scan_id = ScanPipeline.store_scan(self.repo_url, scanner, clone_dir, options, round(time.time() - analisys_time_start, 2))
+        report += ScanPipeline.changes_report(scan_id)
+
+        if profiler is not None:
+            profiler.write()
+            print(profiler.table())
+            report += "Stage timings written to scan_profile.csv and scan_profile.json\n"
+
+        elapsed_time = round(time.time() - analisys_time_start, 2)
+        self.signals.finished.emit(scanner, report, elapsed_time)
+
+    # SlitherScanner with the options of the worker (also the one of a restored scan, used by the rescans of the saved files)
+    def build_scanner(self, clone_dir, profiler=None):
+        return ScanPipeline.build_scanner(clone_dir, self.workers, self.project_mode, self.use_cache,
+                                          self.profile, self.include, self.exclude, profiler,
+                                          max_tasks=self.max_tasks, memory_limit=self.memory_limit,
+                                          contract_timeout=self.contract_timeout, scan_timeout=self.scan_timeout)
+
+    # Stops the scan (from the GUI thread): nothing is analyzed after the clone, or the analysis stops
+    # and the results of the contracts analyzed so far are reported
+    def cancel(self):
+        self.cancel_requested = True
+        if self.scanner is not None:
+            self.scanner.cancel()
+
+    def restore_stored_scan(self, files, clone_dir, analisys_time_start):
+        self.signals.contracts_found.emit(len(files))
+        if len(files) == 0:
+            return
+
+        scanner = self.build_scanner(clone_dir)
+        for index, (contract, errors) in enumerate(ScanPipeline.restore_scan(scanner, files, clone_dir)):
+            affected_lines = scanner.affected_lines_mapping.get(contract, [])
+            self.signals.contract_scanned.emit(contract, errors, affected_lines)
+            self.signals.progress.emit(index + 1, len(files), 0)
+
+        report = scanner.generate_severity_report()
+        report += "No new commits since the last scan, the stored findings are shown.\n"
+        elapsed_time = round(time.time() - analisys_time_start, 2)
+        self.signals.finished.emit(scanner, report, elapsed_time)
+
+"""
+Shows a previous scan recorded in the FindingsStore: its findings are read back from the database,
+nothing is cloned nor analyzed. The files are the ones of the directory the scan was done in.
+The scanner of the restored scan gets the detectors and the mode the scan was recorded with
+(and the analysis settings of the window), so the rescans of the saved files match the stored findings.
+"""
+class StoredScanWorker(QRunnable):
+    def __init__(self, scan_id, workers=1, use_cache=True, max_tasks=WorkerPool.DEFAULT_MAX_TASKS, memory_limit=None,
+                 contract_timeout=None, scan_timeout=None):
+        super().__init__()
+        self.scan_id = scan_id
+        self.workers = workers
+        self.use_cache = use_cache
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+        self.contract_timeout = contract_timeout
+        self.scan_timeout = scan_timeout
+        self.signals = ScanWorkerSignals()
+
+    def run(self):
+        load_time_start = time.time()
+        with FindingsStore.FindingsStore() as store:
+            scan = store.scan(self.scan_id)
+            files = store.files(self.scan_id) if scan is not None else dict()
+
+        self.signals.contracts_found.emit(len(files))
+        if len(files) == 0:
+            return
+
+        options = json.loads(scan["options"])
+        scanner = ScanPipeline.build_scanner(scan["root_dir"], self.workers, options.get("project_mode", False), self.use_cache,
+                                             options.get("profile", DetectorRegistry.DEFAULT_PROFILE),
+                                             options.get("include", ()), options.get("exclude", ()), quiet=True,
+                                             max_tasks=self.max_tasks, memory_limit=self.memory_limit,
+                                             contract_timeout=self.contract_timeout, scan_timeout=self.scan_timeout)
+        for index, (contract, errors) in enumerate(ScanPipeline.restore_scan(scanner, files, scan["root_dir"])):
+            affected_lines = scanner.affected_lines_mapping.get(contract, [])
+            self.signals.contract_scanned.emit(contract, errors, affected_lines)
+            self.signals.progress.emit(index + 1, len(files), 0)
+
+        report = scanner.generate_severity_report()
+        started = datetime.datetime.fromtimestamp(scan["started"]).strftime("%Y-%m-%d %H:%M")
+        report += f"Scan {self.scan_id} of {scan['repository']} from {started}, read from the findings store.\n"
+        if not scan["complete"]:
+            report += "Some contracts of this scan failed, timed out or were cancelled.\n"
+        if scan["commit_hash"] is not None and RepoMirror.head_commit(scan["root_dir"]) != scan["commit_hash"]:
+            report += f"{scan['root_dir']} has another commit checked out now, the files may not match the findings.\n"
+        elapsed_time = round(time.time() - load_time_start, 2)
+        self.signals.finished.emit(scanner, report, elapsed_time)
+
+"""
+Analyzes again a saved contract and the contracts importing it, reusing the results of the last scan.
+The old results of these contracts are replaced, the rest of the scan is kept as it is.
+"""
+class RescanWorker(QRunnable):
+    def __init__(self, scanner, saved_contract, contracts, root_dir=None):
+        super().__init__()
+        self.scanner = scanner
+        self.saved_contract = saved_contract
+        self.contracts = contracts
+        self.root_dir = root_dir if root_dir is not None else Repository.clone_directory() # root of the imports and remappings
+        self.signals = ScanWorkerSignals()
+
+    def run(self):
+        rescan_time_start = time.time()
+
+        # finished is always sent, so the GUI gets Analyze back even if a contract of the scan was moved or deleted
+        report = ""
+        try:
+            import_resolver = SolidityImports.ImportResolver(self.root_dir)
+            to_rescan = [self.saved_contract] + import_resolver.importers(self.saved_contract, self.contracts)
+
+            self.scanner.remove_findings(to_rescan)
+            self.scanner.cancelled = False # a previous scan may have been cancelled
+            for index, (contract, errors) in enumerate(self.scanner.scan(to_rescan)):
+                affected_lines = self.scanner.affected_lines_mapping.get(contract, [])
+                self.signals.contract_scanned.emit(contract, errors, affected_lines)
+                self.signals.progress.emit(index + 1, len(to_rescan), 0)
+
+            report = self.scanner.generate_severity_report()
+        except Exception as e:
+            print(f"The saved contract could not be analyzed again: {e}")
+        finally:
+            elapsed_time = round(time.time() - rescan_time_start, 2)
+            self.signals.finished.emit(self.scanner, report, elapsed_time)
+
+    # Stops the analysis (from the GUI thread), the contracts not analyzed again keep no results
+    def cancel(self):
+        self.scanner.cancel()
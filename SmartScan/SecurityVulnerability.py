@@ -1,6 +1,188 @@
+from array import array
+from collections import Counter
+from itertools import compress
+
+# Version of the finding tuples (first_line, last_line, description, severity, detector, confidence)
+# stored in the scan cache and the stored scans, entries of another version are not reused
+FINDINGS_FORMAT = 2
+
+# Columns of the findings indexed by value, so rows() reads the matching rows without going through the table
+INDEXED_COLUMNS = ("severity", "detector", "confidence")
+
+EMPTY_ROWS = array("I")
+
 class Error:
-    def __init__(self, first_line, last_line, description, severity):
+    __slots__ = ("first_line", "last_line", "description", "severity", "detector", "confidence")
+
+    def __init__(self, first_line, last_line, description, severity, detector="", confidence=""):
         self.first_line = first_line
         self.last_line = last_line
         self.description = description
-        self.severity = severity
\ No newline at end of file
+        self.severity = severity
+        self.detector = detector
+        self.confidence = confidence
+
+"""
+    Compact, column oriented table of the findings of a scan.
+
+    Every finding is a row of integer columns (file id, first line, last line and the ids of its
+severity, detector, confidence and description). The strings are stored once in a shared pool, so the
+same description found in many scans of a contract is kept in memory only once.
+Error objects are only created when the findings of a file are asked for.
+The rows of every file and of every severity, detector and confidence are indexed, rows() only reads
+the rows of its most selective filter.
+
+    Removed files (contracts analyzed again) leave dead rows behind, the table is compacted
+when there are more dead rows than live ones.
+"""
+class FindingsTable:
+    def __init__(self):
+        self.files = []          # file id -> path
+        self.file_ids = dict()   # path -> file id
+        self.file_rows = dict()  # file id -> rows of its findings (only for the files in the table)
+
+        self.strings = []        # string id -> string
+        self.string_ids = dict() # string -> string id
+
+        self.file_column = array("I")
+        self.first_line_column = array("I")
+        self.last_line_column = array("I")
+        self.severity_column = array("I")
+        self.detector_column = array("I")
+        self.confidence_column = array("I")
+        self.description_column = array("I")
+        self.live = bytearray()  # 1 for the rows of the files in the table, 0 for removed ones
+        self.dead_rows = 0
+
+        # column name -> {string id -> rows with that value} (removed rows included until compact)
+        self.column_rows = {name : dict() for name in INDEXED_COLUMNS}
+
+    def string_id(self, string):
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(string)
+            self.string_ids[string] = string_id
+        return string_id
+
+    # Adds the file (with no findings yet) if it is not in the table, returns its id
+    def add_file(self, path):
+        file_id = self.file_ids.get(path)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(path)
+            self.file_ids[path] = file_id
+        self.file_rows.setdefault(file_id, array("I"))
+        return file_id
+
+    def add(self, path, first_line, last_line, description, severity, detector="", confidence=""):
+        file_id = self.add_file(path)
+        row = len(self.live)
+        self.file_column.append(file_id)
+        self.first_line_column.append(first_line)
+        self.last_line_column.append(last_line)
+        self.severity_column.append(self.string_id(severity))
+        self.detector_column.append(self.string_id(detector))
+        self.confidence_column.append(self.string_id(confidence))
+        self.description_column.append(self.string_id(description))
+        self.live.append(1)
+        self.file_rows[file_id].append(row)
+        for name in INDEXED_COLUMNS:
+            self.column_rows[name].setdefault(getattr(self, name + "_column")[row], array("I")).append(row)
+        return row
+
+    # Removes the file and its findings (the file can be added again)
+    def remove_file(self, path):
+        file_id = self.file_ids.get(path)
+        if file_id is None or file_id not in self.file_rows:
+            return
+        rows = self.file_rows.pop(file_id)
+        for row in rows:
+            self.live[row] = 0
+        self.dead_rows += len(rows)
+
+        if self.dead_rows > len(self.live) - self.dead_rows:
+            self.compact()
+
+    # Rewrites the columns without the dead rows
+    def compact(self):
+        kept = list(compress(range(len(self.live)), self.live))
+        for name in ("file_column", "first_line_column", "last_line_column", "severity_column",
+                     "detector_column", "confidence_column", "description_column"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in kept)))
+
+        self.live = bytearray(b"\x01" * len(kept))
+        self.dead_rows = 0
+        self.file_rows = {file_id : array("I") for file_id in self.file_rows}
+        for row, file_id in enumerate(self.file_column):
+            self.file_rows[file_id].append(row)
+        self.column_rows = {name : dict() for name in INDEXED_COLUMNS}
+        for name in INDEXED_COLUMNS:
+            value_rows = self.column_rows[name]
+            for row, value_id in enumerate(getattr(self, name + "_column")):
+                value_rows.setdefault(value_id, array("I")).append(row)
+
+    # The files in the table, in the order they were added
+    def paths(self):
+        return [self.files[file_id] for file_id in sorted(self.file_rows)]
+
+    def __contains__(self, path):
+        return self.file_ids.get(path) in self.file_rows
+
+    def __len__(self):
+        return len(self.live) - self.dead_rows
+
+    # (first_line, last_line, description, severity, detector, confidence) of a row
+    def finding(self, row):
+        return (self.first_line_column[row], self.last_line_column[row], self.strings[self.description_column[row]],
+                self.strings[self.severity_column[row]], self.strings[self.detector_column[row]],
+                self.strings[self.confidence_column[row]])
+
+    def error(self, row):
+        return Error(*self.finding(row))
+
+    def file_findings(self, path):
+        file_id = self.file_ids.get(path)
+        return [self.finding(row) for row in self.file_rows.get(file_id, [])]
+
+    def errors(self, path):
+        file_id = self.file_ids.get(path)
+        return [self.error(row) for row in self.file_rows.get(file_id, [])]
+
+    # Live rows matching every given value (None = any), in order, e.g. rows(severity="High", detector="reentrancy-eth")
+    def rows(self, path=None, severity=None, detector=None, confidence=None):
+        filters = [] # (column, value id, rows with the value)
+        if path is not None:
+            file_id = self.file_ids.get(path)
+            filters.append((self.file_column, file_id, self.file_rows.get(file_id, EMPTY_ROWS)))
+        for name, value in (("severity", severity), ("detector", detector), ("confidence", confidence)):
+            if value is not None:
+                value_id = self.string_ids.get(value)
+                filters.append((getattr(self, name + "_column"), value_id, self.column_rows[name].get(value_id, EMPTY_ROWS)))
+
+        if len(filters) == 0:
+            return list(compress(range(len(self.live)), self.live))
+
+        # The rows of the most selective filter are checked against the other filters
+        filters.sort(key=lambda item: len(item[2]))
+        _, _, candidate_rows = filters[0]
+        others = [(column, value_id) for column, value_id, _ in filters[1:]]
+        return [row for row in candidate_rows
+                if self.live[row] and all(column[row] == value_id for column, value_id in others)]
+
+    def count_by(self, column):
+        return Counter(compress(column, self.live))
+
+    # {severity : number of findings}
+    def count_by_severity(self):
+        return {self.strings[string_id] : count for string_id, count in self.count_by(self.severity_column).items()}
+
+    # {detector : number of findings}
+    def count_by_detector(self):
+        return {self.strings[string_id] : count for string_id, count in self.count_by(self.detector_column).items()}
+
+    # {path : number of findings} (files without findings included)
+    def count_by_file(self):
+        counts = self.count_by(self.file_column)
+        return {self.files[file_id] : counts.get(file_id, 0) for file_id in sorted(self.file_rows)}
@@ -1,13 +1,236 @@
-from slither import Slither
-from slither.detectors import all_detectors
-import inspect
-from slither.detectors.abstract_detector import AbstractDetector
-import SecurityVulnerability
+import SecurityVulnerability, DetectorRegistry, ScanProfiler, SolidityImports, WorkerPool
+from concurrent.futures import CancelledError, TimeoutError
+import os
+import time
+
+# Slither and crytic-compile are heavy to import, so they are imported on first use (see warm_up_imports)
+
+# Build configuration files of the frameworks crytic-compile can compile as a whole project
+PROJECT_CONFIG_FILES = ["hardhat.config.js", "hardhat.config.ts", "foundry.toml", "truffle-config.js", "truffle.js"]
+
+# True if the project is built by a framework (it picks its own compiler, the contracts are not grouped by solc version)
+def has_project_config(project_dir):
+    return any(os.path.isfile(os.path.join(project_dir, config_file)) for config_file in PROJECT_CONFIG_FILES)
+
+# Keyword arguments of CryticCompile for the given solc executable (None = the solc on the PATH)
+def compile_options(solc=None):
+    return {"solc": solc} if solc is not None else {}
+
+# Compact finding tuple of a Slither result:
+# (first_line, last_line, description, severity, detector, confidence), None if the result has no source lines
+def finding_of(result):
+    elements = result.get('elements', [])
+    if len(elements) == 0:
+        return None
+
+    lines = elements[0].get("source_mapping", {}).get("lines", [])
+    if len(lines) == 0:
+        return None
+
+    return (lines[0], lines[-1], result.get('description', 'N/A'), result.get('impact', 'N/A'),
+            result.get('check', 'N/A'), result.get('confidence', 'N/A'))
+
+# Registers the given detectors (names, None = all), runs them and returns the flattened list of results
+# With an enabled StageTimer every detector is run and timed separately
+def run_all_detectors(slither, detectors=None, timer=None, contract=""):
+    # The detector classes are looked up once per process by the DetectorRegistry
+    if detectors is None:
+        detector_classes = DetectorRegistry.detector_classes()
+    else:
+        detector_classes = [DetectorRegistry.detectors_by_name()[name] for name in detectors]
+
+    # Register the detectors
+    for detector_cls in detector_classes:
+        slither.register_detector(detector_cls)
+
+    # Run detectors
+    if timer is not None and timer.enabled:
+        slither.load_previous_results()
+        detector_resultss = []
+        for detector in slither.detectors:
+            with timer.measure(contract, "detector:" + detector.ARGUMENT):
+                detector_resultss.append(detector.detect())
+        slither.write_results_to_hide()
+    else:
+        detector_resultss = slither.run_detectors()
+
+    # Flatten the list of results (essentially merges the lists for the found vulnerabilities from each detector)
+    return [item for sublist in detector_resultss for item in sublist]
+
+"""
+    Runs Slither on a single contract and returns compact, picklable findings:
+a list of (first_line, last_line, description, severity, detector, confidence) tuples, an error message
+(None on success) and the stats of the run ({"profile": StageTimer records, empty when profile is False,
+"memory": {contract : peak memory of the analysis in bytes}}).
+The contract is compiled with the given solc executable (None = the solc on the PATH).
+
+    It only uses its arguments, so it can run in a worker process of a process pool
+where each worker builds its own Slither instance.
+"""
+def analyze_contract(path, detectors=None, profile=False, solc=None):
+    findings = []
+    timer = ScanProfiler.StageTimer(profile)
+    stats = {"profile": timer.records, "memory": dict()}
+    try:
+        from slither import Slither
+        from crytic_compile import CryticCompile
+
+        with WorkerPool.measure_peak_memory(stats["memory"], str(path)):
+            with timer.measure(path, "compile"):
+                compilation = CryticCompile(str(path), **compile_options(solc))
+            with timer.measure(path, "ir"):
+                slither = Slither(compilation)
+
+            # Each result dict is released as soon as it was turned into a finding tuple
+            results = run_all_detectors(slither, detectors, timer, path)
+            results.reverse()
+            while results:
+                finding = finding_of(results.pop())
+                if finding is not None:
+                    findings.append(finding)
+
+        return findings, None, stats
+
+    except FileNotFoundError:
+        return findings, f"Error: Solidity file not found.", stats
+    except Exception as e:
+        return findings, f"An error occurred during analysis: {e}", stats
+
+# Imports Slither, crytic-compile and the detectors ahead of the first scan (e.g. on a background thread)
+# (an import error is left for the scan to report)
+def warm_up_imports():
+    try:
+        import slither
+        import crytic_compile
+        DetectorRegistry.detector_classes()
+    except ImportError:
+        pass
+
+# Normalized form of a path, used to match the Slither file names with the found contracts
+def path_key(path):
+    return os.path.normcase(os.path.realpath(str(path)))
+
+# Compiles the whole project (or a group of its contracts) in a single crytic-compile invocation
+def compile_project(project_dir, paths, solc=None):
+    from crytic_compile import CryticCompile
+    from crytic_compile.platform.solc_standard_json import SolcStandardJson
+
+    # Hardhat / Foundry / Truffle projects are compiled by their own framework
+    if has_project_config(project_dir):
+        try:
+            return CryticCompile(str(project_dir))
+        except Exception as e:
+            print(f"The project could not be compiled with its framework ({e}), compiling the Solidity files with solc.")
+
+    # Plain directory: every found contract goes into one solc standard json input
+    # (built from scratch, a string target would be read as a json file or a json text)
+    standard_json = SolcStandardJson()
+    for path in paths:
+        standard_json.add_source_file(os.path.abspath(str(path)))
+
+    # solc runs in the project directory, where the remappings point into node_modules/ and lib/
+    return CryticCompile(standard_json, solc_remaps=SolidityImports.library_remappings(project_dir),
+                         solc_working_dir=os.path.abspath(str(project_dir)), **compile_options(solc))
+
+"""
+    Project mode: compiles the project once, runs the detectors once and splits the findings
+by the file name from their source mapping.
+
+    Returns {path_key(contract) : findings} for the given contracts, an error message (None on success)
+and the stats of the run (same as analyze_contract).
+Findings in files that are not part of the given contracts (e.g. dependencies) are left out.
+"""
+def analyze_project(project_dir, paths, detectors=None, profile=False, solc=None):
+    findings_by_file = {path_key(path) : [] for path in paths}
+    timer = ScanProfiler.StageTimer(profile)
+    stats = {"profile": timer.records, "memory": dict()}
+    try:
+        from slither import Slither
+
+        # The memory of a project analysis is recorded for the project directory
+        with WorkerPool.measure_peak_memory(stats["memory"], str(project_dir)):
+            with timer.measure(project_dir, "compile"):
+                compilation = compile_project(project_dir, paths, solc)
+            with timer.measure(project_dir, "ir"):
+                slither = Slither(compilation)
+
+            results = run_all_detectors(slither, detectors, timer, project_dir)
+            results.reverse()
+            while results:
+                result = results.pop()
+                finding = finding_of(result)
+                if finding is None:
+                    continue
+
+                file_name = result['elements'][0].get("source_mapping", {}).get("filename_absolute")
+                if file_name is None:
+                    continue
+
+                file_findings = findings_by_file.get(path_key(file_name))
+                if file_findings is not None:
+                    file_findings.append(finding)
+
+        return findings_by_file, None, stats
+
+    except Exception as e:
+        return findings_by_file, f"An error occurred during the project analysis: {e}", stats
+
+# Result of analyze_contract / analyze_project when its worker process died or was stopped (see WorkerPool)
+def failed_analysis(function, arguments, error, timed_out=False):
+    stats = {"profile": [], "memory": dict(), "timed_out": timed_out}
+    if function is analyze_project:
+        return {path_key(path) : [] for path in arguments[1]}, error, stats
+    return [], error, stats
 
 class SlitherScanner:
-    def __init__(self):
+    def __init__(self, workers=1, project_dir=None, cache=None, detectors=None, profiler=None, writer=None, quiet=False,
+                 executor=None, solc_resolver=None, max_tasks=None, memory_limit=None, contract_timeout=None,
+                 scan_timeout=None):
         self.affected_lines_mapping = dict()
 
+        # Number of worker processes used by scan(), 1 means one contract at a time
+        self.workers = workers
+
+        # The analysis processes are replaced after max_tasks analyses and stopped over memory_limit bytes
+        # (see WorkerPool). With both None and a single worker, the contracts are analyzed in this process
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+
+        # Seconds after which an analysis (a contract, a compiler group in project mode) is stopped,
+        # and after which the analyses of the whole scan are stopped (None = no limit)
+        self.contract_timeout = contract_timeout
+        self.scan_timeout = scan_timeout
+        self.scan_deadline = None
+        self.scan_timed_out = False
+
+        # Set by cancel(), scan() then stops without the remaining contracts
+        self.cancelled = False
+        self.active_tasks = None # (pool, futures) of the analyses in progress
+
+        # When set, scan() compiles and analyzes the whole project once (project mode)
+        self.project_dir = project_dir
+
+        # ScanCache with the findings of the previous scans (None = no cache)
+        self.cache = cache
+
+        # Names of the detectors to run (see DetectorRegistry.select), None = all
+        self.detectors = detectors
+
+        # ScanProfiler collecting the time of every stage (None = no profiling)
+        self.profiler = profiler
+
+        # FindingsWriter streaming the findings of every merged contract (None = no output file)
+        self.writer = writer
+
+        # No console print for every finding (they cost time on big scans)
+        self.quiet = quiet
+
+        # Process pool shared with other scanners (e.g. by the BatchScanner), used instead of workers when set
+        self.executor = executor
+
+        # SolcResolver picking the installed solc of every contract (None = the solc on the PATH for all of them)
+        self.solc_resolver = solc_resolver
+
         self.severity_score_mapping = {
             "Low"           : 1,
             "Medium"        : 5,
@@ -26,67 +249,263 @@ class SlitherScanner:
             "Optimization"  : 0
         }
 
-        self.errors_list = []
-    
-    def solidity_analysis(self, path):
-        try:
-            slither = Slither(str(path))
-            
-            # Get all detector classes
-            detectors_ = [getattr(all_detectors, name) for name in dir(all_detectors)]
-            detector_classes = [d for d in detectors_ if inspect.isclass(d) and issubclass(d, AbstractDetector)]
-
-            # Register all detectors
-            for detector_cls in detector_classes:
-                slither.register_detector(detector_cls)
-
-            # Run detectors
-            detector_resultss = slither.run_detectors()
-
-            # Flatten the list of results (essentially merges the lists for the found vulnerabilities from each detector)
-            detector_results = [item for sublist in detector_resultss for item in sublist]
-
-            vulnerabilities_found = False
-
-            affected_lines = []
+        # Findings of every analyzed contract (the results of a contract can be replaced after it is analyzed again)
+        self.findings = SecurityVulnerability.FindingsTable()
 
-            for result in detector_results:
-                vulnerabilities_found = True
+        # contracts whose analysis failed (their results are incomplete)
+        self.failed_contracts = []
 
-                # Get the specifications of each vulnerability
+        # contracts whose analysis was stopped by a timeout (also in failed_contracts)
+        self.timed_out_contracts = []
 
-                #detector_name = result.get('check', 'N/A')
-                #confidence = result.get('confidence', 'N/A')
-                severity = result.get('impact', 'N/A')
-                description = result.get('description', 'N/A')
-                elements = result.get('elements', 'N/A')
-
-                source_mapping = elements[0].get("source_mapping", {})
-                lines = source_mapping.get("lines", [])
+        # contracts left out by a cancelled scan
+        self.cancelled_contracts = []
 
+        # Peak memory of the analysis of every contract (of the project directory in project mode), in bytes
+        self.peak_memory = dict()
+    
+    # Analyzes one contract and returns the errors found in it
+    # (findings keeps accumulating the findings of every analyzed contract)
+    def solidity_analysis(self, path):
+        findings, analysis_error, stats = analyze_contract(*self.contract_arguments(path))
+        self.record_stats(stats)
+        return self.merge_findings(path, findings, analysis_error)
+
+    # Arguments of analyze_contract for the contract with the options of this scanner (picklable, for the process pool)
+    # (every contract is compiled on its own, with its solc: only project mode compiles a compiler group at once)
+    def contract_arguments(self, path):
+        return (path, self.detectors, self.profiler is not None, self.compiler_of(path)[1])
+
+    # (version name, solc executable) of the contract, (None, None) for the solc on the PATH
+    # (framework projects are compiled with the compiler of their configuration)
+    def compiler_of(self, path):
+        if self.solc_resolver is None or (self.project_dir is not None and has_project_config(self.project_dir)):
+            return None, None
+        return self.solc_resolver.resolve(path)
+
+    # Contracts of project mode grouped by compiler: [(version name, solc executable, contracts)]
+    def compiler_groups(self, paths):
+        if self.solc_resolver is None or has_project_config(self.project_dir):
+            return [(None, None, list(paths))]
+        return self.solc_resolver.group(paths)
+
+    def record_stats(self, stats):
+        self.peak_memory.update(stats.get("memory", {}))
+        if self.profiler is not None:
+            self.profiler.add(stats["profile"])
+            self.profiler.add_memory(stats.get("memory", {}))
+
+    # Analyzes the contracts and yields (contract, errors) in the order of the given contracts
+    # (a cancelled scan stops yielding, the contracts left out are in cancelled_contracts)
+    def scan(self, paths):
+        paths = list(paths)
+        self.scan_deadline = time.monotonic() + self.scan_timeout if self.scan_timeout is not None else None
+        self.scan_timed_out = False
+        self.cancelled_contracts = [] # left out by a previous cancelled scan, reported with it only
+        if self.project_dir is not None:
+            yield from self.project_analysis(paths)
+            return
+
+        # The contracts found in the cache are neither compiled nor analyzed
+        cache_keys = self.cache_keys(paths, "contract")
+        cached_findings = dict()
+        for path, key in cache_keys.items():
+            findings = self.cache.load(key)
+            if findings is not None:
+                cached_findings[path] = findings
+
+        to_analyze = [path for path in paths if path not in cached_findings]
+        results = self.run_all(analyze_contract, [self.contract_arguments(path) for path in to_analyze])
+
+        for index, path in enumerate(paths):
+            if self.cancelled:
+                self.cancelled_contracts.extend(paths[index:])
+                return
+            if path in cached_findings:
+                yield path, self.merge_findings(path, cached_findings[path], None)
+                continue
+
+            findings, analysis_error, stats = next(results)
+            if self.cancelled: # the analysis was stopped by cancel()
+                self.cancelled_contracts.extend(paths[index:])
+                return
+            self.record_stats(stats)
+            if analysis_error is None and path in cache_keys:
+                self.cache.store(cache_keys[path], findings)
+            if stats.get("timed_out"):
+                self.timed_out_contracts.append(path)
+            yield path, self.merge_findings(path, findings, analysis_error)
+
+    # Stops the scan in progress (from any thread): the running analyses are stopped,
+    # their contracts and the ones not analyzed yet are left out of the results
+    def cancel(self):
+        self.cancelled = True
+        active_tasks = self.active_tasks
+        if active_tasks is not None:
+            pool, futures = active_tasks
+            pool.cancel(futures)
+
+    # True if the analyses run in worker processes (they can only be stopped there)
+    def isolated(self):
+        return (self.workers > 1 or self.max_tasks is not None or self.memory_limit is not None or
+                self.contract_timeout is not None or self.scan_timeout is not None)
+
+    # Seconds left before the deadline of the scan (None = no deadline)
+    def remaining_time(self):
+        if self.scan_deadline is None:
+            return None
+        return max(0.0, self.scan_deadline - time.monotonic())
+
+    # Yields function(*arguments) for each tuple of arguments_list, in order: on the shared executor when set,
+    # on a WorkerPool of self.workers processes, or in this process. The results come back in the submission order,
+    # so the merged result is identical to a serial run
+    def run_all(self, function, arguments_list):
+        if self.executor is not None:
+            yield from self.pool_results(self.executor, function, arguments_list)
+        elif len(arguments_list) > 0 and self.isolated():
+            with WorkerPool.WorkerPool(min(self.workers, len(arguments_list)), self.max_tasks, self.memory_limit,
+                                       self.contract_timeout) as pool:
+                yield from self.pool_results(pool, function, arguments_list)
+        else:
+            for arguments in arguments_list:
+                yield function(*arguments)
+
+    # Submits every call to the pool, yields the results in order
+    # (a call whose worker died, timed out or was cancelled is a failed analysis)
+    def pool_results(self, pool, function, arguments_list):
+        futures = [pool.submit(function, *arguments) for arguments in arguments_list]
+        self.active_tasks = (pool, futures)
+        try:
+            for future, arguments in zip(futures, arguments_list):
+                try:
+                    yield future.result(timeout=self.remaining_time())
+                except WorkerPool.WorkerTimeout as e:
+                    yield failed_analysis(function, arguments, f"Timed out: {e}", timed_out=True)
+                except (TimeoutError, CancelledError, WorkerPool.WorkerCancelled):
+                    if self.cancelled:
+                        yield failed_analysis(function, arguments, "The scan was cancelled.")
+                        continue
+                    # The time budget of the scan ran out: the analyses left are stopped
+                    if not self.scan_timed_out:
+                        self.scan_timed_out = True
+                        print(f"The scan took more than {self.scan_timeout} second(s), the remaining analyses are stopped.")
+                        pool.cancel(futures)
+                    yield failed_analysis(function, arguments, "Timed out: the time budget of the scan ran out.", timed_out=True)
+                except WorkerPool.WorkerError as e:
+                    yield failed_analysis(function, arguments, f"An error occurred during analysis: {e}")
+        finally:
+            self.active_tasks = None
+
+    # Compiles and analyzes project_dir once per compiler group, then yields (contract, errors) for each contract
+    def project_analysis(self, paths):
+        to_analyze = [] # (contracts, solc executable, cache keys) of the groups to compile
+        for version, solc, group_paths in self.compiler_groups(paths):
+            # A group is only skipped when every contract of it is in the cache
+            cache_keys = self.cache_keys(group_paths, "project")
+            if len(cache_keys) == len(group_paths):
+                cached_findings = self.cache.load_all(list(cache_keys.values()))
+                if cached_findings is not None:
+                    for path, findings in zip(cache_keys.keys(), cached_findings):
+                        yield path, self.merge_findings(path, findings, None)
+                    continue
+
+            if version is not None:
+                print(f"Compiling {len(group_paths)} contract(s) with solc {version}")
+            to_analyze.append((group_paths, solc, cache_keys))
+
+        arguments_list = [(self.project_dir, group_paths, self.detectors, self.profiler is not None, solc)
+                          for group_paths, solc, _ in to_analyze]
+        results = self.run_all(analyze_project, arguments_list)
+        for index, ((group_paths, _, cache_keys), (findings_by_file, analysis_error, stats)) in enumerate(zip(to_analyze, results)):
+            if self.cancelled:
+                self.cancelled_contracts.extend(path for group in to_analyze[index:] for path in group[0])
+                return
+            self.record_stats(stats)
+            if analysis_error is not None:
+                print(analysis_error)
+                for path in group_paths:
+                    self.failed_contracts.append(path)
+                    if stats.get("timed_out"):
+                        self.timed_out_contracts.append(path)
+                    yield path, []
+                continue
+
+            for path in group_paths:
+                findings = findings_by_file[path_key(path)]
+                if path in cache_keys:
+                    self.cache.store(cache_keys[path], findings)
+                yield path, self.merge_findings(path, findings, None)
+
+    # Forgets the results of the given contracts, so they can be analyzed again after they were edited
+    def remove_findings(self, paths):
+        for path in paths:
+            for finding in self.findings.file_findings(path):
+                self.severity_type_frequency[finding[3]] -= 1
+            self.findings.remove_file(path)
+            self.affected_lines_mapping.pop(path, None)
+            self.peak_memory.pop(str(path), None)
+            if path in self.failed_contracts:
+                self.failed_contracts.remove(path)
+            if path in self.timed_out_contracts:
+                self.timed_out_contracts.remove(path)
+            if path in self.cancelled_contracts:
+                self.cancelled_contracts.remove(path)
+
+        if self.cache is not None:
+            self.cache.import_resolver.invalidate(paths)
+        if self.solc_resolver is not None:
+            self.solc_resolver.invalidate(paths)
+
+    # Returns {contract : cache key} (empty without a cache, unreadable contracts are left out)
+    def cache_keys(self, paths, mode):
+        cache_keys = dict()
+        if self.cache is None:
+            return cache_keys
+
+        names = self.detectors
+        if names is None:
+            names = [detector_cls.ARGUMENT for detector_cls in DetectorRegistry.detector_classes()]
+
+        for path in paths:
+            try:
+                cache_keys[path] = self.cache.key(path, names, mode, self.compiler_of(path)[0])
+            except OSError:
+                pass
+        return cache_keys
+
+    # Adds the findings of one contract to affected_lines_mapping, severity_type_frequency and findings
+    def merge_findings(self, path, findings, analysis_error):
+        affected_lines = []
+
+        self.findings.add_file(path)
+        for first_line, last_line, description, severity, detector, confidence in findings:
+            if not self.quiet:
                 print("-" * 20)
-
-                affected_lines.append((lines[0], lines[-1]))
-                print(f"Error: {lines[0]} - {lines[-1]}")
-
+                print(f"Error: {first_line} - {last_line}")
                 print(description)
                 print(f"Severity: {severity}")
-                self.severity_type_frequency[severity] += 1
-
                 print("-" * 20)
 
-                error = SecurityVulnerability.Error(lines[0], lines[-1], description, severity)
-                self.errors_list.append(error)
+            affected_lines.append((first_line, last_line))
+            self.severity_type_frequency[severity] += 1
+            self.findings.add(path, first_line, last_line, description, severity, detector, confidence)
 
-            self.affected_lines_mapping.update({path : affected_lines})
+        if self.writer is not None:
+            self.writer.write_contract(path, findings)
 
-            if not vulnerabilities_found:
-                print(f"No vulnerabilities found!")
+        file_errors = self.findings.errors(path)
 
-        except FileNotFoundError:
-            print(f"Error: Solidity file not found.")
-        except Exception as e:
-            print(f"An error occurred during analysis: {e}")
+        if analysis_error is not None:
+            print(analysis_error)
+            self.failed_contracts.append(path)
+            return file_errors
+
+        self.affected_lines_mapping.update({path : affected_lines})
+
+        if len(findings) == 0 and not self.quiet:
+            print(f"No vulnerabilities found!")
+
+        return file_errors
 
     """
         Generates a severity report based on the severity score mapping and frequency of each severity type.
@@ -107,13 +526,14 @@ class SlitherScanner:
         as they can lead to significant security risks. Low and medium severity vulnerabilities "award" the project
         with at most 3 stars.
     """
-    def generate_severity_report(self):
+    def generate_severity_report(self, report_path="security_report.txt"):
         self.stars = 0
         score = 0
 
         for severity, frequency in self.severity_type_frequency.items():
             if frequency > 0:
                 score += frequency * self.severity_score_mapping[severity]
+        self.score = score
 
         critical_vulnerabilities = self.severity_type_frequency["Critical"]
         high_vulnerabilities     = self.severity_type_frequency["High"]
@@ -152,11 +572,22 @@ class SlitherScanner:
 
         report_string += f"Severity frequency: {self.severity_type_frequency}\n"
 
+        # Contracts without complete results
+        if len(self.timed_out_contracts) > 0:
+            report_string += f"Timed out ({len(self.timed_out_contracts)} contract(s), their results are missing):\n"
+            report_string += "".join(f"    {contract}\n" for contract in self.timed_out_contracts)
+        if len(self.cancelled_contracts) > 0:
+            report_string += f"Scan cancelled: {len(self.cancelled_contracts)} contract(s) not analyzed\n"
+
+        if self.cache is not None:
+            report_string += self.cache.report() + "\n"
+            print(self.cache.report())
+
         print(f"Severity rating: {self.stars} stars")
         print(f"Severity Score: {score}")
         print(f"Severity frequency: {self.severity_type_frequency}")
 
-        with open("security_report.txt", "w") as report_file:
+        with open(report_path, "w") as report_file:
             report_file.write(report_string)
 
         return report_string
\ No newline at end of file
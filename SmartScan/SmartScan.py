@@ -1,12 +1,19 @@
-from pathlib import WindowsPath
+import time
+STARTUP_TIME_START = time.perf_counter() # start up time is measured from here to the first paint of the window
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QSplitter, QTreeView, QTextEdit, QFileSystemModel,
-    QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QWidget, QToolBar
+    QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QWidget, QToolBar, QInputDialog
 )
-from PySide6.QtCore import Qt, QDir; from PySide6.QtGui import QAction, QIcon
+from PySide6.QtCore import Qt, QDir, QThreadPool, QTimer; from PySide6.QtGui import QAction, QIcon
 import ErrorWindow
-import FileTree, CodeArea, RepoPath, SlitherScanner
-import time
+import FileTree, CodeArea, RepoPath, ScanWorker, DetectorRegistry, SlitherScanner, ScanPipeline, WorkerPool, Repository, FindingsStore
+import datetime
+import multiprocessing
+import threading
+import argparse
+import os
+import sys
 
 """
 Main window logic: Contains the components: CodeArea, FileTree and RepoPath
@@ -15,9 +22,37 @@ FileTree -> Shows the analyzed project
 RepoPath -> Takes the path to the repository as input
 """
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, use_cache=True, profile=None, include=(), exclude=(), profiling=False,
+                 include_files=(), exclude_files=(), all_files=False,
+                 max_tasks=WorkerPool.DEFAULT_MAX_TASKS, memory_limit=None, contract_timeout=None, scan_timeout=None):
         super().__init__()
 
+        # Reuse the findings of unchanged contracts from the previous scans (disabled with --no-cache)
+        self.use_cache = use_cache
+
+        # Detectors added to / removed from the selected profile (--include / --exclude)
+        self.detector_include = include
+        self.detector_exclude = exclude
+
+        # Globs of the Solidity files to scan / skip, all_files keeps the test and mock contracts
+        self.include_files = include_files
+        self.exclude_files = exclude_files
+        self.all_files = all_files
+
+        # Record the time of every scan stage (--profiling)
+        self.profiling = profiling
+
+        # Analysis processes replaced after max_tasks analyses, stopped over memory_limit bytes (--worker-memory)
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+
+        # Seconds after which the analysis of a contract / of the whole repository is stopped (--contract-timeout / --scan-timeout)
+        self.contract_timeout = contract_timeout
+        self.scan_timeout = scan_timeout
+
+        # The ScanWorker or RescanWorker running, stopped by the Cancel action
+        self.running_worker = None
+
         # Set window title and size
         self.setWindowTitle("SmartScan")
         self.setGeometry(100, 100, 1200, 800)
@@ -35,9 +70,25 @@ class MainWindow(QMainWindow):
 
         action_open_error_window = QAction("Open Error Window", self)
         action_open_error_window.triggered.connect(self.open_error_window)
+
+        # The report is written next to the application, outside of the scanned repository shown in the FileTree
+        action_open_report = QAction("Open Report", self)
+        action_open_report.triggered.connect(self.open_report)
+
+        # Shows a previous scan from the findings store, without cloning nor analyzing
+        action_open_scan = QAction("Open Scan", self)
+        action_open_scan.triggered.connect(self.open_previous_scan)
         
+        # Stops the running scan, the results of the contracts analyzed so far are kept
+        self.action_cancel_scan = QAction("Cancel", self)
+        self.action_cancel_scan.setEnabled(False)
+        self.action_cancel_scan.triggered.connect(self.cancel_scan)
+
         menu_bar.addAction(action_save_current_file)
         menu_bar.addAction(action_open_error_window)
+        menu_bar.addAction(action_open_report)
+        menu_bar.addAction(action_open_scan)
+        menu_bar.addAction(self.action_cancel_scan)
         self.star_actions = list()
 
         star_action1 = QAction(QIcon("red-star.png"), "Star Item 1", self)
@@ -92,14 +143,19 @@ class MainWindow(QMainWindow):
 
         # Add RepoPath
         self.repo_path = RepoPath.RepoPath()
+        if profile is not None:
+            self.repo_path.profile_input.setCurrentText(profile)
 
         left_layout.addWidget(self.repo_path, stretch=0)  # Prevent the bottom row from stretching
 
         # Add the left side to the splitter
         splitter.addWidget(left_container)
 
-        # Add the FileTree to the right side
-        self.file_tree = FileTree.FileTree()
+        # Directory of the shown scan: ClonedRepo, or the directory of a scan opened from the findings store
+        self.scan_root = Repository.clone_directory()
+
+        # Add the FileTree to the right side (the repository of the previous scan until the next one is cloned)
+        self.file_tree = FileTree.FileTree(self.scan_root)
         splitter.addWidget(self.file_tree)
 
         # Add the splitter to the layout
@@ -115,15 +171,107 @@ class MainWindow(QMainWindow):
         self.alreadyZoomed = False
 
         self.file_to_errors_mapping = dict()
+
+        self.currentFilePath = None
         
     def save_current_file(self):
+        if self.currentFilePath is None: # no file is opened
+            return
+        if self.analyzed_code_area.isLoading(): # saving now would truncate the file
+            self.statusBar().showMessage("The file is still loading, save it again once it is loaded.", 5000)
+            return
+
         with open(self.currentFilePath, "w+") as currentFile:
             currentFile.write(self.analyzed_code_area.toPlainText())
         print(f"Current file saved: {self.currentFilePath}")
+
+        # Analyze again the saved contract and the contracts importing it (only after a finished scan)
+        results = self.file_tree.results_of(self.currentFilePath)
+        if self.SlitherScanner is None or results is None:
+            return
+        saved_contract = results[0]
+        if not self.repo_path.run_button.isEnabled(): # a scan is already running
+            return
+
+        self.repo_path.run_button.setEnabled(False)
+        self.rescan_worker = ScanWorker.RescanWorker(self.SlitherScanner, saved_contract, list(self.file_to_errors_mapping.keys()),
+                                                     self.scan_root)
+        self.rescan_worker.signals.contract_scanned.connect(self.on_contract_scanned)
+        self.rescan_worker.signals.finished.connect(self.on_rescan_finished)
+        self.set_running_worker(self.rescan_worker)
+        QThreadPool.globalInstance().start(self.rescan_worker)
         
+    # Called from the first event loop iteration after show(), once the window was painted
+    def on_first_paint(self):
+        startup_time = time.perf_counter() - STARTUP_TIME_START
+        print(f"Time to first paint: {startup_time:.3f} second(s)")
+        self.statusBar().showMessage(f"Started in {startup_time:.2f} second(s)", 10000)
+
+        # Import Slither in the background, so the first Analyze does not wait for it
+        threading.Thread(target=SlitherScanner.warm_up_imports, daemon=True).start()
+
+    # The Cancel action is only enabled while a worker is running
+    def set_running_worker(self, worker):
+        self.running_worker = worker
+        self.action_cancel_scan.setEnabled(worker is not None)
+
+    def cancel_scan(self):
+        if self.running_worker is None:
+            return
+        self.running_worker.cancel()
+        self.action_cancel_scan.setEnabled(False)
+        self.statusBar().showMessage("Cancelling the scan...")
+
     def open_error_window(self):
         self.analyzed_code_area.ErrorWindow.show()
 
+    def open_report(self):
+        report_path = os.path.abspath("security_report.txt")
+        if not os.path.isfile(report_path):
+            self.statusBar().showMessage("No report yet, it is written once a scan is finished.", 5000)
+            return
+        with open(report_path, "r") as report_file:
+            content = report_file.read()
+        self.analyzed_code_area.affected_lines = []
+        self.analyzed_code_area.setErrors([])
+        self.analyzed_code_area.setPlainText(content)
+        self.currentFilePath = report_path
+
+    # Lets the user pick one of the scans of the findings store and shows its results
+    def open_previous_scan(self):
+        if not self.repo_path.run_button.isEnabled(): # a scan is running
+            self.statusBar().showMessage("Wait for the running scan to finish before opening another one.", 5000)
+            return
+
+        with FindingsStore.FindingsStore() as store:
+            scans = store.scans(limit=200)
+        if len(scans) == 0:
+            self.statusBar().showMessage("No scan was recorded yet.", 5000)
+            return
+
+        items = []
+        for scan in scans:
+            started = datetime.datetime.fromtimestamp(scan["started"]).strftime("%Y-%m-%d %H:%M")
+            commit = (scan["commit_hash"] or "")[:8]
+            items.append(f"#{scan['id']}  {started}  {scan['repository']}  {commit}  {scan['stars']} / 5  ({scan['contracts']} contract(s))")
+        item, selected = QInputDialog.getItem(self, "Open Scan", "Previous scans:", items, 0, False)
+        if not selected:
+            return
+        scan = scans[items.index(item)]
+
+        self.reset_results()
+        self.scan_root = scan["root_dir"]
+        self.repo_path.run_button.setEnabled(False)
+
+        self.stored_scan_worker = ScanWorker.StoredScanWorker(scan["id"], self.repo_path.workers_input.value(), self.use_cache,
+                                                              self.max_tasks, self.memory_limit,
+                                                              self.contract_timeout, self.scan_timeout)
+        self.stored_scan_worker.signals.contracts_found.connect(self.on_contracts_found)
+        self.stored_scan_worker.signals.contract_scanned.connect(self.on_contract_scanned)
+        self.stored_scan_worker.signals.progress.connect(self.repo_path.show_progress)
+        self.stored_scan_worker.signals.finished.connect(self.on_scan_finished)
+        QThreadPool.globalInstance().start(self.stored_scan_worker)
+
     def set_api_key(self):
         print("Private API Key set!")
 
@@ -139,64 +287,142 @@ class MainWindow(QMainWindow):
 
         if file_path != "":
             try:
-                with open(file_path, "r+") as currentFile:
-                    content = currentFile.read()
-
-                    file_path_split = file_path.split("/")
-
-                    file_name = file_path_split[len(file_path_split) - 1]
-
-                    if file_name != "security_report.txt" and file_name != "API_KEY.txt":
-                        self.analyzed_code_area.affected_lines = self.file_tree.affected_lines_mapping[WindowsPath(file_path)]
-                        self.analyzed_code_area.file_to_errors_mapping = self.file_to_errors_mapping[WindowsPath(file_path)]
-                        if not self.alreadyZoomed:
-                            self.analyzed_code_area.zoomOut(5)
-                            self.alreadyZoomed = True
-
-                    else:
-                        self.analyzed_code_area.affected_lines.clear()
-
+                # Large files are memory-mapped and loaded in chunks, so the window doesn't freeze
+                large_file = os.path.getsize(file_path) >= CodeArea.LARGE_FILE_SIZE
+                if not large_file:
+                    with open(file_path, "r+") as currentFile:
+                        content = currentFile.read()
+
+                file_path_split = file_path.split("/")
+
+                file_name = file_path_split[len(file_path_split) - 1]
+
+                if file_name != "security_report.txt" and file_name != "API_KEY.txt":
+                    _, errors, affected_lines = self.file_tree.results_of(file_path) or (None, [], [])
+                    self.analyzed_code_area.affected_lines = affected_lines
+                    self.analyzed_code_area.setErrors(errors)
+                    if not self.alreadyZoomed:
+                        self.analyzed_code_area.zoomOut(5)
+                        self.alreadyZoomed = True
+
+                else:
+                    self.analyzed_code_area.affected_lines.clear()
+
+                if large_file:
+                    self.analyzed_code_area.loadLargeFile(file_path)
+                else:
                     self.analyzed_code_area.setPlainText(content)
-                    self.currentFilePath = file_path
+                self.currentFilePath = file_path
             except Exception as e:
                 print(f"Error reading file: {e}")
 
-    def on_run_button_clicked(self):
-        analisys_time_start = time.time()
+    def reset_results(self):
         # Reset the star rating
         for i in range(5):
             self.star_actions[i].setEnabled(False)
 
-        contracts = self.repo_path.on_run_button_clicked() # get the smart contracts
+        # Reset the results of the previous scan
+        self.file_to_errors_mapping = dict()
+        self.file_tree.clear_results()
 
-        if self.repo_path.failed:
-            content = "The cloning process failed."
-            content += "\n\nPlease make sure you are connected to the internet and that the repository link is valid and try again."
-            self.analyzed_code_area.affected_lines = []
-            self.analyzed_code_area.setPlainText(content)
-            return
+    def on_run_button_clicked(self):
+        self.reset_results()
+        self.scan_root = Repository.clone_directory()
+
+        self.repo_path.run_button.setEnabled(False)
+        self.repo_path.show_cloning()
+
+        # The clone and the analysis run on a background worker, the results come back through signals
+        self.scan_worker = ScanWorker.ScanWorker(self.repo_path.text_input.text(),
+                                                 self.repo_path.workers_input.value(),
+                                                 self.repo_path.project_mode_input.isChecked(),
+                                                 self.use_cache,
+                                                 self.repo_path.profile_input.currentText(),
+                                                 self.detector_include,
+                                                 self.detector_exclude,
+                                                 self.profiling,
+                                                 self.include_files,
+                                                 self.exclude_files,
+                                                 self.all_files,
+                                                 self.max_tasks,
+                                                 self.memory_limit,
+                                                 self.contract_timeout,
+                                                 self.scan_timeout)
+        self.scan_worker.signals.clone_failed.connect(self.on_clone_failed)
+        self.scan_worker.signals.contracts_found.connect(self.on_contracts_found)
+        self.scan_worker.signals.contract_scanned.connect(self.on_contract_scanned)
+        self.scan_worker.signals.progress.connect(self.repo_path.show_progress)
+        self.scan_worker.signals.finished.connect(self.on_scan_finished)
+        self.scan_worker.signals.cancelled.connect(self.on_scan_cancelled)
+        self.set_running_worker(self.scan_worker)
+        QThreadPool.globalInstance().start(self.scan_worker)
+
+    def on_clone_failed(self):
+        self.set_running_worker(None)
+        self.repo_path.failed = True
+        self.repo_path.hide_progress()
+        self.repo_path.run_button.setEnabled(True)
+
+        content = "The cloning process failed."
+        content += "\n\nPlease make sure you are connected to the internet and that the repository link is valid and try again."
+        self.analyzed_code_area.affected_lines = []
+        self.analyzed_code_area.setPlainText(content)
+        self.currentFilePath = None
 
+    def on_contracts_found(self, contracts_count):
+        self.repo_path.failed = False
+        self.file_tree.set_root(self.scan_root) # the repository exists once it is cloned
+
+        if contracts_count == 0:
+            self.set_running_worker(None)
+            self.repo_path.hide_progress()
+            self.repo_path.run_button.setEnabled(True)
 
-        if len(contracts) == 0:
             content = f"No Solidity file found in the cloned repository.\n"
             content += "Please try again with another project."
 
             self.analyzed_code_area.setPlainText(content)
+            self.currentFilePath = None
             return
 
-        self.SlitherScanner = SlitherScanner.SlitherScanner()
-        for contract in contracts:
-            self.SlitherScanner.solidity_analysis(contract)
-            errors_list = self.SlitherScanner.errors_list
-            self.file_to_errors_mapping[contract] = errors_list
+        self.repo_path.show_progress(0, contracts_count, 0)
+
+    # Partial results: each contract becomes available as soon as it was analyzed
+    def on_contract_scanned(self, contract, errors, affected_lines):
+        self.file_to_errors_mapping[contract] = errors
+        self.file_tree.set_results(contract, errors, affected_lines) # badge shown as soon as the file is analyzed
+
+        # Update the highlights in place if the contract is the opened file
+        if self.currentFilePath is not None and FileTree.path_key(self.currentFilePath) == FileTree.path_key(contract):
+            self.analyzed_code_area.affected_lines = affected_lines
+            self.analyzed_code_area.setErrors(errors)
+            self.analyzed_code_area.highlightCurrentLine()
 
-        self.file_tree.affected_lines_mapping = self.SlitherScanner.affected_lines_mapping
-        analisys_time_end = time.time()
-        elapsed_time = round(analisys_time_end - analisys_time_start, 2)
-        print("Repository scanned successfuly!")
+    # Cancelled before any contract was analyzed
+    def on_scan_cancelled(self):
+        self.set_running_worker(None)
+        self.repo_path.hide_progress()
+        self.repo_path.run_button.setEnabled(True)
+        self.statusBar().showMessage("Scan cancelled.", 5000)
 
-        content = f"Repository scanned successfuly! (in {elapsed_time} second(s))\n\n"
-        content += self.SlitherScanner.generate_severity_report()
+        self.analyzed_code_area.affected_lines = []
+        self.analyzed_code_area.setPlainText("The scan was cancelled.")
+        self.currentFilePath = None
+
+    def on_scan_finished(self, slither_scanner, report, elapsed_time):
+        self.set_running_worker(None)
+        self.SlitherScanner = slither_scanner
+        self.repo_path.hide_progress()
+        self.repo_path.run_button.setEnabled(True)
+
+        if len(slither_scanner.cancelled_contracts) > 0:
+            print("Scan cancelled, the results of the contracts analyzed so far are shown.")
+            self.statusBar().showMessage("Scan cancelled.", 5000)
+            content = f"Scan cancelled after {elapsed_time} second(s), the results of the contracts analyzed so far are shown.\n\n"
+        else:
+            print("Repository scanned successfuly!")
+            content = f"Repository scanned successfuly! (in {elapsed_time} second(s))\n\n"
+        content += report
         content += "\n The cloned project can be accessed in the ClonedRepo directory."
         content += "\n\n Double click any .sol file to see its code."
         content += "\n\n All the affected lines will be highlighted."
@@ -204,17 +430,57 @@ class MainWindow(QMainWindow):
 
         self.analyzed_code_area.affected_lines = []
         self.analyzed_code_area.setPlainText(content)
+        self.currentFilePath = None
+
+        self.show_star_rating(self.SlitherScanner.stars)
+
+    # The opened file keeps its content, only the rating is updated
+    def on_rescan_finished(self, slither_scanner, report, elapsed_time):
+        self.set_running_worker(None)
+        self.repo_path.run_button.setEnabled(True)
+        print(f"Saved file analyzed again in {elapsed_time} second(s)")
+        self.show_star_rating(slither_scanner.stars)
 
+    def show_star_rating(self, stars):
         # Reset the stars color
         for i in range(5):
             self.star_actions[i].setEnabled(False)
 
         # Set the stars color based on the severity score
-        for i in range(self.SlitherScanner.stars):
+        for i in range(stars):
             self.star_actions[i].setEnabled(True)
 
 if __name__ == "__main__":
-    app = QApplication([])
-    window = MainWindow()
+    multiprocessing.freeze_support() # the analysis worker processes start from the frozen executable
+
+    parser = argparse.ArgumentParser(description="SmartScan - Solidity vulnerability scanner")
+    parser.add_argument("--no-cache", action="store_true", help="analyze every contract again, ignoring the scan cache")
+    parser.add_argument("--profile", choices=list(DetectorRegistry.PROFILES.keys()), help="detector profile selected at start")
+    parser.add_argument("--include", default="", help="comma separated detector names or impacts to add to the profile")
+    parser.add_argument("--exclude", default="", help="comma separated detector names or impacts to remove from the profile")
+    parser.add_argument("--profiling", action="store_true", help="write the wall / CPU time of every scan stage and detector to scan_profile.csv and scan_profile.json")
+    parser.add_argument("--include-files", default="", help="comma separated globs of the Solidity files to scan (e.g. \"src/**,*.sol\")")
+    parser.add_argument("--exclude-files", default="", help="comma separated globs of the Solidity files to skip")
+    parser.add_argument("--all-files", action="store_true", help="also scan the test, mock and script contracts")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=WorkerPool.DEFAULT_MAX_TASKS, metavar="N", help=f"replace an analysis process after N analyses (default: {WorkerPool.DEFAULT_MAX_TASKS})")
+    parser.add_argument("--worker-memory", type=int, metavar="MB", help="stop an analysis process using more than MB megabytes (its contract fails) and replace it")
+    parser.add_argument("--contract-timeout", type=float, metavar="SECONDS", help="stop the analysis of a contract (of a compiler group in project mode) after SECONDS")
+    parser.add_argument("--scan-timeout", type=float, metavar="SECONDS", help="stop the analyses still running SECONDS after the start of the scan")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(use_cache=not args.no_cache,
+                        profile=args.profile,
+                        include=DetectorRegistry.parse_list(args.include),
+                        exclude=DetectorRegistry.parse_list(args.exclude),
+                        profiling=args.profiling,
+                        include_files=DetectorRegistry.parse_list(args.include_files),
+                        exclude_files=DetectorRegistry.parse_list(args.exclude_files),
+                        all_files=args.all_files,
+                        max_tasks=args.max_tasks_per_worker,
+                        memory_limit=ScanPipeline.memory_limit_bytes(args.worker_memory),
+                        contract_timeout=args.contract_timeout,
+                        scan_timeout=args.scan_timeout)
     window.show()
+    QTimer.singleShot(0, window.on_first_paint)
     app.exec()
\ No newline at end of file
@@ -0,0 +1,409 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import DetectorRegistry, FindingsStore, FindingsWriter, Repository, ScanProfiler, WorkerPool
+
+"""
+Headless command line entry point of SmartScan (no Qt import):
+clone -> discover -> analyze -> report, for CI runners and pre-commit hooks.
+
+    python SmartScanCLI.py scan https://github.com/user/repo.git --format json
+    python SmartScanCLI.py scan path/to/local/project --fail-on 3
+    python SmartScanCLI.py scan path/to/local/project --quiet --output findings.sarif
+    python SmartScanCLI.py batch repositories.txt --clone-workers 8 --quiet
+    python SmartScanCLI.py query https://github.com/user/repo.git --severity High
+    python SmartScanCLI.py query --list
+    python SmartScanCLI.py diff --repository https://github.com/user/repo.git --base-commit 4f2a9c1 --fail-on-new
+    python SmartScanCLI.py diff 12 15
+
+Exit codes:
+0 -> the star rating is below --fail-on
+1 -> the star rating is --fail-on or higher (of any repository for batch),
+     or for diff with --fail-on-new, a finding was introduced
+2 -> the scan could not be done (clone failed, invalid arguments, no recorded scan to query)
+"""
+
+EXIT_OK = 0
+EXIT_FAILED_RATING = 1
+EXIT_ERROR = 2
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smartscan", description="SmartScan - Solidity vulnerability scanner (command line)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="scan a GitHub repository or a local directory")
+    scan_parser.add_argument("target", help="repository URL (cloned into ClonedRepo) or local directory (scanned in place)")
+    add_scan_arguments(scan_parser)
+    scan_parser.add_argument("--profiling", action="store_true", help="write the time of every stage to scan_profile.csv and scan_profile.json")
+    scan_parser.add_argument("--output", metavar="PATH", help="stream every finding to PATH while the contracts are analyzed (the findings are then left out of the stdout result)")
+    scan_parser.add_argument("--output-format", choices=FindingsWriter.FORMATS, help="format of --output (default: sarif for .sarif files, jsonl otherwise)")
+
+    batch_parser = subparsers.add_parser("batch", help="scan every repository of a list, each one in its own workspace")
+    batch_parser.add_argument("url_list", help="file with one repository URL per line")
+    add_scan_arguments(batch_parser)
+    batch_parser.add_argument("--workspaces", metavar="DIR", help="directory of the workspaces and reports (default: Workspaces)")
+    batch_parser.add_argument("--clone-workers", type=int, default=4, help="repositories cloned at the same time (default: 4)")
+    batch_parser.add_argument("--analysis-threads", type=int, default=2, help="repositories analyzed at the same time, sharing the --workers processes (default: 2)")
+    batch_parser.add_argument("--queue-size", type=int, default=4, help="cloned repositories waiting for the analysis before the clones pause (default: 4)")
+    batch_parser.add_argument("--keep-workspaces", action="store_true", help="keep the cloned repositories after their analysis")
+
+    query_parser = subparsers.add_parser("query", help="list the findings of a recorded scan, read from the findings store (nothing is analyzed)")
+    query_parser.add_argument("repository", nargs="?", help="repository URL or scanned directory, its latest scan is queried")
+    query_parser.add_argument("--scan", type=int, metavar="ID", help="query the scan with this id instead")
+    query_parser.add_argument("--list", action="store_true", help="list the recorded scans (of the repository if given) instead of findings")
+    query_parser.add_argument("--file", help="only the findings of this file (path relative to the repository)")
+    query_parser.add_argument("--severity", help="only the findings of this severity (e.g. High)")
+    query_parser.add_argument("--detector", help="only the findings of this detector (e.g. reentrancy-eth)")
+    query_parser.add_argument("--confidence", help="only the findings of this confidence (e.g. Medium)")
+    query_parser.add_argument("--format", choices=["text", "json"], default="text", help="output format written to stdout")
+
+    diff_parser = subparsers.add_parser("diff", help="compare two recorded scans: the introduced, fixed and unchanged findings")
+    diff_parser.add_argument("base", type=int, nargs="?", help="id of the base scan (see query --list)")
+    diff_parser.add_argument("head", type=int, nargs="?", help="id of the head scan (default: the latest scan of the repository)")
+    diff_parser.add_argument("--repository", help="repository URL or scanned directory of --base-commit / --head-commit")
+    diff_parser.add_argument("--base-commit", metavar="SHA", help=f"compare from the latest scan of this commit of --repository (at least {FindingsStore.MIN_COMMIT_PREFIX} characters of its hash)")
+    diff_parser.add_argument("--head-commit", metavar="SHA", help=f"compare to the latest scan of this commit of --repository (at least {FindingsStore.MIN_COMMIT_PREFIX} characters of its hash)")
+    diff_parser.add_argument("--show-unchanged", action="store_true", help="also list the unchanged findings")
+    diff_parser.add_argument("--fail-on-new", action="store_true", help="exit with 1 when the head scan introduced a finding")
+    diff_parser.add_argument("--format", choices=["text", "json"], default="text", help="output format written to stdout")
+
+    return parser
+
+# Options shared by every command that runs an analysis
+def add_scan_arguments(parser):
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of analysis processes (1 = serial)")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=WorkerPool.DEFAULT_MAX_TASKS, metavar="N", help=f"replace an analysis process after N analyses (default: {WorkerPool.DEFAULT_MAX_TASKS})")
+    parser.add_argument("--worker-memory", type=int, metavar="MB", help="stop an analysis process using more than MB megabytes (its contract fails) and replace it")
+    parser.add_argument("--contract-timeout", type=float, metavar="SECONDS", help="stop the analysis of a contract (of a compiler group in project mode) after SECONDS")
+    parser.add_argument("--scan-timeout", type=float, metavar="SECONDS", help="stop the analyses still running SECONDS after the start of the scan (of every repository for batch)")
+    parser.add_argument("--project-mode", action="store_true", help="compile the whole repository once per solc version (without it every contract is compiled on its own, with the solc of its pragmas)")
+    parser.add_argument("--no-cache", action="store_true", help="analyze every contract again, ignoring the scan cache")
+    parser.add_argument("--profile", choices=list(DetectorRegistry.PROFILES.keys()), default=DetectorRegistry.DEFAULT_PROFILE, help="detector profile")
+    parser.add_argument("--include", default="", help="comma separated detector names or impacts to add to the profile")
+    parser.add_argument("--exclude", default="", help="comma separated detector names or impacts to remove from the profile")
+    parser.add_argument("--include-files", default="", help="comma separated globs of the Solidity files to scan (e.g. \"src/**,*.sol\")")
+    parser.add_argument("--exclude-files", default="", help="comma separated globs of the Solidity files to skip")
+    parser.add_argument("--all-files", action="store_true", help="also scan the test, mock and script contracts")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="output format written to stdout")
+    parser.add_argument("--quiet", action="store_true", help="don't print every finding while scanning")
+    parser.add_argument("--fail-on", type=int, default=4, choices=range(1, 6), metavar="STARS", help="exit with 1 when the rating reaches this many stars (default: 4)")
+
+# Consumes the (contract, errors) of a scan, returns the findings as dicts (none are kept when keep is False)
+def collect_findings(scanned, root_dir, keep=True):
+    findings = []
+    for contract, errors in scanned:
+        if not keep:
+            continue
+        for error in errors:
+            findings.append({
+                "file": os.path.relpath(str(contract), root_dir),
+                "first_line": error.first_line,
+                "last_line": error.last_line,
+                "severity": error.severity,
+                "detector": error.detector,
+                "confidence": error.confidence,
+                "description": error.description
+            })
+    return findings
+
+# Runs clone -> discover -> analyze -> report and returns the scan result as a dict
+def run_scan(target, args):
+    import ScanPipeline, SlitherScanner, RepoMirror # imports Slither, only needed once the arguments are valid
+
+    scan_time_start = time.time()
+    profiler = ScanProfiler.ScanProfiler() if args.profiling else None
+    timer = profiler if profiler is not None else ScanProfiler.StageTimer(enabled=False)
+
+    include = DetectorRegistry.parse_list(args.include)
+    exclude = DetectorRegistry.parse_list(args.exclude)
+    include_files = DetectorRegistry.parse_list(args.include_files)
+    exclude_files = DetectorRegistry.parse_list(args.exclude_files)
+    options = ScanPipeline.scan_options(args.project_mode, args.profile, include, exclude,
+                                        include_files, exclude_files, args.all_files)
+    discovery = None
+    mirror, stored_files = None, None
+
+    # A local directory is scanned in place, anything else is cloned
+    # (through the mirror, and not at all when the commit was already scanned with the same options)
+    if os.path.isdir(target):
+        root_dir = os.path.abspath(target)
+    else:
+        root_dir = Repository.clone_directory()
+        if args.no_cache:
+            mirror = RepoMirror.RepoMirror(target)
+        else:
+            mirror, _, stored_files = ScanPipeline.stored_scan(target, options)
+
+        if stored_files is None:
+            with timer.measure("", "clone"):
+                cloned = Repository.clone(target, mirror)
+            if cloned is False:
+                return None
+
+    # With --output the findings are streamed to the file instead of being collected for the result
+    writer = None
+    if args.output:
+        output_format = args.output_format or FindingsWriter.format_of(args.output)
+        writer = FindingsWriter.open_writer(output_format, args.output, root_dir)
+
+    try:
+        if stored_files is not None:
+            scanner = SlitherScanner.SlitherScanner(writer=writer, quiet=args.quiet)
+            contracts = list(stored_files)
+            scanned = ScanPipeline.restore_scan(scanner, stored_files, root_dir)
+        else:
+            with timer.measure("", "discovery"):
+                discovery = Repository.discover_contracts(root_dir, include_files, exclude_files, not args.all_files)
+            contracts = discovery.contracts
+            scanner = ScanPipeline.build_scanner(root_dir, args.workers, args.project_mode, not args.no_cache,
+                                                 args.profile, include, exclude, profiler, writer, args.quiet,
+                                                 max_tasks=args.max_tasks_per_worker,
+                                                 memory_limit=ScanPipeline.memory_limit_bytes(args.worker_memory),
+                                                 contract_timeout=args.contract_timeout, scan_timeout=args.scan_timeout)
+            scanned = scanner.scan(contracts)
+
+        findings = collect_findings(scanned, root_dir, writer is None)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    report = scanner.generate_severity_report()
+    scan_id = None
+    if stored_files is not None:
+        report += "No new commits since the last scan, the stored findings are reported.\n"
+    else: # a local directory is recorded by its path
+        scan_id = ScanPipeline.store_scan(target if mirror is not None else root_dir, scanner, root_dir, options,
+                                          round(time.time() - scan_time_start, 2))
+        report += ScanPipeline.changes_report(scan_id)
+
+    if profiler is not None:
+        profiler.write()
+
+    result = {
+        "target": target,
+        "contracts": len(contracts),
+        "stars": scanner.stars,
+        "score": scanner.score,
+        "severity_frequency": scanner.severity_type_frequency,
+        "elapsed_seconds": round(time.time() - scan_time_start, 2),
+        "report": report,
+        "findings": findings
+    }
+    if scan_id is not None:
+        result["scan_id"] = scan_id
+    if writer is not None:
+        result["output"] = {"path": args.output, "format": output_format, "findings": writer.count}
+    if discovery is not None:
+        result["discovery"] = discovery.stats()
+    if scanner.cache is not None:
+        result["cache"] = {"hits": scanner.cache.hits, "misses": scanner.cache.misses}
+    # The contracts without complete results, the timed out ones separately
+    timed_out = [os.path.relpath(str(contract), root_dir) for contract in scanner.timed_out_contracts]
+    result["timed_out"] = timed_out
+    result["failed"] = [os.path.relpath(str(contract), root_dir) for contract in scanner.failed_contracts
+                        if os.path.relpath(str(contract), root_dir) not in timed_out]
+    if len(scanner.peak_memory) > 0:
+        result["peak_memory_mb"] = round(max(scanner.peak_memory.values()) / WorkerPool.MEGABYTE, 1)
+    return result
+
+def exit_code(stars, fail_on):
+    return EXIT_FAILED_RATING if stars >= fail_on else EXIT_OK
+
+# Scans every repository of the list, prints the per repository results and the aggregate summary
+def run_batch(args):
+    import BatchScanner, ScanPipeline # imports Slither, only needed once the arguments are valid
+
+    batch_scanner = BatchScanner.BatchScanner(args.workspaces, args.clone_workers, args.workers, args.analysis_threads,
+                                              args.queue_size, args.project_mode, not args.no_cache, args.profile,
+                                              DetectorRegistry.parse_list(args.include),
+                                              DetectorRegistry.parse_list(args.exclude),
+                                              DetectorRegistry.parse_list(args.include_files),
+                                              DetectorRegistry.parse_list(args.exclude_files),
+                                              args.all_files, args.quiet, args.keep_workspaces,
+                                              args.max_tasks_per_worker, ScanPipeline.memory_limit_bytes(args.worker_memory),
+                                              args.contract_timeout, args.scan_timeout)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            results = batch_scanner.run(BatchScanner.read_url_list(args.url_list))
+        except (OSError, ValueError) as e: # unreadable list, unknown detector profile
+            print(f"Error: {e}")
+            return EXIT_ERROR
+    summary = batch_scanner.summary(results)
+    summary_path = batch_scanner.write_summary(results)
+
+    if args.format == "json":
+        json.dump({"summary": summary, "repositories": results}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for result in results:
+            if "error" in result:
+                print(f"  failed  {result['repository']}: {result['error']}")
+            else:
+                print(f"{result['stars']} / 5  score {result['score']:>5}  {result['contracts']:>4} contract(s)  {result['repository']}")
+        print(f"Scanned {summary['scanned']} of {summary['repositories']} repositories in {summary['elapsed_seconds']} second(s) "
+              f"({summary['repositories_per_minute']} per minute), {summary['findings']} finding(s)")
+        print(f"Severity frequency: {summary['severity_frequency']}")
+        print(f"Reports: {os.path.dirname(summary_path)}")
+
+    if any("error" not in result and result["stars"] >= args.fail_on for result in results):
+        return EXIT_FAILED_RATING
+    return EXIT_ERROR if summary["failed"] > 0 else EXIT_OK
+
+# Local directories are recorded by their absolute path
+def recorded_repository(repository):
+    if repository is not None and os.path.isdir(repository):
+        return os.path.abspath(repository)
+    return repository.strip() if repository is not None else None
+
+# Dict of a finding of the findings store
+def finding_dict(path, finding):
+    first_line, last_line, description, severity, detector, confidence = finding
+    return {"file": path, "first_line": first_line, "last_line": last_line, "severity": severity,
+            "detector": detector, "confidence": confidence, "description": description}
+
+# Prints the recorded scans, or the findings of a recorded scan matching the filters
+def run_query(args):
+    repository = recorded_repository(args.repository)
+
+    with FindingsStore.FindingsStore() as store:
+        if args.list:
+            scans = store.scans(repository)
+            if args.format == "json":
+                json.dump(scans, sys.stdout, indent=2)
+                sys.stdout.write("\n")
+                return EXIT_OK
+            for scan in scans:
+                started = time.strftime("%Y-%m-%d %H:%M", time.localtime(scan["started"]))
+                status = "" if scan["complete"] else "  (incomplete)"
+                print(f"{scan['id']:>5}  {started}  {scan['stars']} / 5  {scan['contracts']:>4} contract(s)  "
+                      f"{(scan['commit_hash'] or '')[:8]:8}  {scan['repository']}{status}")
+            return EXIT_OK
+
+        scan_id = args.scan
+        if scan_id is None and repository is not None:
+            scan_id = store.latest_scan(repository)
+        scan = store.scan(scan_id) if scan_id is not None else None
+        if scan is None:
+            print("No recorded scan found, give a scanned repository or a --scan id (see --list).", file=sys.stderr)
+            return EXIT_ERROR
+
+        rows = store.query(scan_id, args.file, args.severity, args.detector, args.confidence)
+
+    findings = [finding_dict(path, finding) for path, finding in rows]
+    if args.format == "json":
+        json.dump({"scan": scan, "findings": findings}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for finding in findings:
+            print(f"{finding['file']}:{finding['first_line']}-{finding['last_line']}  {finding['severity']}  "
+                  f"{finding['detector']} ({finding['confidence']})")
+            print("    " + finding["description"].strip().replace("\n", "\n    "))
+        print(f"{len(findings)} finding(s) in scan {scan_id} of {scan['repository']}")
+    return EXIT_OK
+
+# Id of a scan given by its id or by its commit (--base-commit / --head-commit), None if there is no such scan
+def resolve_scan(store, scan_id, commit, repository):
+    if commit is not None:
+        return store.scan_of_commit(repository, commit)
+    return scan_id if store.scan(scan_id) is not None else None
+
+def scan_name(scan):
+    return f"scan {scan['id']}" + (f" ({scan['commit_hash'][:8]})" if scan["commit_hash"] else "")
+
+# Prints the findings introduced, fixed (and unchanged) between two recorded scans
+def run_diff(args):
+    # Every scan is given in one explicit form: a scan id, or a commit of --repository
+    if (args.base is None) == (args.base_commit is None) or (args.head is not None and args.head_commit is not None):
+        print("Give the base scan by its id or by --base-commit, and the head scan by its id, --head-commit or not at all.", file=sys.stderr)
+        return EXIT_ERROR
+    repository = recorded_repository(args.repository)
+    if repository is None and (args.base_commit is not None or args.head_commit is not None):
+        print("--base-commit and --head-commit need the --repository they belong to.", file=sys.stderr)
+        return EXIT_ERROR
+
+    with FindingsStore.FindingsStore() as store:
+        try:
+            base_id = resolve_scan(store, args.base, args.base_commit, repository)
+            if base_id is None:
+                print(f"No recorded scan found for {args.base_commit or args.base} (see query --list).", file=sys.stderr)
+                return EXIT_ERROR
+
+            if args.head is not None or args.head_commit is not None:
+                head_id = resolve_scan(store, args.head, args.head_commit, repository)
+            else:
+                head_id = store.latest_scan(repository if repository is not None else store.scan(base_id)["repository"])
+            if head_id is None:
+                print(f"No recorded scan found for {args.head_commit or args.head} (see query --list).", file=sys.stderr)
+                return EXIT_ERROR
+        except ValueError as e: # invalid or ambiguous commit
+            print(f"Error: {e}", file=sys.stderr)
+            return EXIT_ERROR
+
+        base, head = store.scan(base_id), store.scan(head_id)
+        changes = store.diff(base_id, head_id)
+
+    if args.format == "json":
+        result = {"base": base, "head": head}
+        for change, findings in changes.items():
+            if change != "unchanged" or args.show_unchanged:
+                result[change] = [finding_dict(path, finding) for path, finding in findings]
+        result["counts"] = {change : len(findings) for change, findings in changes.items()}
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for change in ("introduced", "fixed", "unchanged"):
+            if change == "unchanged" and not args.show_unchanged:
+                continue
+            for path, (first_line, last_line, description, severity, detector, confidence) in changes[change]:
+                print(f"{change:10}  {path}:{first_line}-{last_line}  {severity}  {detector} ({confidence})")
+        print(f"{scan_name(base)} -> {scan_name(head)}: "
+              f"{len(changes['introduced'])} introduced, {len(changes['fixed'])} fixed, "
+              f"{len(changes['unchanged'])} unchanged finding(s)")
+
+    if args.fail_on_new and len(changes["introduced"]) > 0:
+        return EXIT_FAILED_RATING
+    return EXIT_OK
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        return run_batch(args)
+    if args.command == "query":
+        return run_query(args)
+    if args.command == "diff":
+        return run_diff(args)
+
+    # The scanner prints every finding, stdout is kept for the result only
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            result = run_scan(args.target, args)
+        except ValueError as e: # e.g. unknown detector profile
+            print(f"Error: {e}")
+            return EXIT_ERROR
+
+    if result is None:
+        print("The cloning process failed.", file=sys.stderr)
+        return EXIT_ERROR
+
+    if args.format == "json":
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(f"Scanned {result['contracts']} contract(s) in {result['elapsed_seconds']} second(s)")
+        if len(result["timed_out"]) > 0:
+            print(f"Timed out: {', '.join(result['timed_out'])}")
+        if "peak_memory_mb" in result:
+            print(f"Peak memory of an analysis: {result['peak_memory_mb']} MB")
+        print(result["report"], end="")
+
+    return exit_code(result["stars"], args.fail_on)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # the analysis worker processes start from the frozen executable
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import SolidityImports, ScanCache
+from functools import lru_cache
+import os
+import re
+import shutil
+
+"""
+    Picks a locally installed solc for every contract, from the `pragma solidity` lines of the contract
+and of the files it imports, without solc-select switching versions for every file.
+In project mode the contracts are grouped by compiler and every group is compiled in a single invocation;
+otherwise every contract is still compiled on its own, with the solc picked for it.
+
+    Only local compilers are used (no download): the ones installed by solc-select and py-solc-x,
+and the solc on the PATH. The newest installed version satisfying every pragma is chosen.
+"""
+
+# pragma solidity ^0.8.0;  pragma solidity >=0.6.0 <0.9.0;
+PRAGMA_PATTERN = re.compile(r'^\s*pragma\s+solidity\s+([^;]+);', re.MULTILINE)
+
+VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)\.(\d+)')
+
+COMPARATOR_PATTERN = re.compile(r'(>=|<=|>|<|=|\^|~)?\s*v?(\d+|x|\*)(?:\.(\d+|x|\*))?(?:\.(\d+|x|\*))?')
+
+# Returns the version constraints written in a Solidity source
+def parse_pragmas(source):
+    return [pragma.strip() for pragma in PRAGMA_PATTERN.findall(source)]
+
+def parse_version(text):
+    match = VERSION_PATTERN.search(text)
+    return tuple(int(part) for part in match.groups()) if match else None
+
+def version_name(version):
+    return ".".join(str(part) for part in version)
+
+# (lowest allowed version, lowest excluded version) of a comparator, None = unbounded
+def comparator_range(operator, parts):
+    numbers = [int(part) for part in parts if part is not None and part not in ("x", "*")]
+    padded = tuple(numbers + [0] * (3 - len(numbers)))
+
+    # Version following the first length parts: (0.8.19, 3) -> 0.8.20, (0.8, 2) -> 0.9.0
+    def next_of(length):
+        if length == 0:
+            return None
+        bumped = numbers[:length]
+        bumped[-1] += 1
+        return tuple(bumped + [0] * (3 - length))
+
+    if operator == ">=":
+        return padded, None
+    if operator == ">":
+        return next_of(len(numbers)), None
+    if operator == "<":
+        return None, padded
+    if operator == "<=":
+        return None, next_of(len(numbers))
+    if operator == "^":
+        # the first non zero part can't change: ^0.8.1 -> <0.9.0, ^1.2.3 -> <2.0.0
+        length = next((index + 1 for index, number in enumerate(numbers) if number != 0), len(numbers))
+        return padded, next_of(length)
+    if operator == "~":
+        # the minor version can't change: ~0.8.1 -> <0.9.0
+        return padded, next_of(min(len(numbers), 2))
+    # exact version, or a partial one matching all its patches (0.8 -> 0.8.x)
+    return padded, next_of(len(numbers))
+
+# True if the version (tuple) satisfies the constraint (e.g. ">=0.6.0 <0.9.0 || ^0.4.24")
+def satisfies(version, constraint):
+    for alternative in constraint.split("||"):
+        alternative = alternative.strip()
+        # hyphen range: 0.6.0 - 0.8.0
+        hyphen = re.fullmatch(r'(\S+)\s+-\s+(\S+)', alternative)
+        if hyphen:
+            alternative = f">={hyphen.group(1)} <={hyphen.group(2)}"
+
+        matched = True
+        for operator, major, minor, patch in COMPARATOR_PATTERN.findall(alternative):
+            lower, upper = comparator_range(operator, [part or None for part in (major, minor, patch)])
+            if (lower is not None and version < lower) or (upper is not None and version >= upper):
+                matched = False
+                break
+        if matched:
+            return True
+    return False
+
+# Directories where solc-select and py-solc-x keep the compilers they installed
+def compiler_dirs():
+    home = os.path.expanduser("~")
+    dirs = [os.path.join(home, ".solc-select", "artifacts"), os.path.join(home, ".solcx")]
+    if os.environ.get("VIRTUAL_ENV"):
+        dirs.insert(0, os.path.join(os.environ["VIRTUAL_ENV"], ".solc-select", "artifacts"))
+    return dirs
+
+# The executable of an installed compiler entry: a file, or a directory holding it
+def compiler_executable(entry_path):
+    if os.path.isfile(entry_path):
+        return entry_path
+    if os.path.isdir(entry_path):
+        name = os.path.basename(entry_path)
+        for candidate in (name, name + ".exe", "solc", "solc.exe"):
+            candidate_path = os.path.join(entry_path, candidate)
+            if os.path.isfile(candidate_path):
+                return candidate_path
+    return None
+
+# {version : solc executable} of every locally installed compiler, looked up once per process
+@lru_cache(maxsize=None)
+def installed_compilers():
+    compilers = dict()
+    for compilers_dir in compiler_dirs():
+        try:
+            entries = sorted(os.scandir(compilers_dir), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            version = parse_version(entry.name)
+            executable = compiler_executable(entry.path)
+            if version is not None and executable is not None:
+                compilers.setdefault(version, executable)
+
+    # The solc on the PATH (may be the solc-select shim of the selected version)
+    path_solc = shutil.which("solc")
+    path_version = parse_version(ScanCache.solc_version())
+    if path_solc is not None and path_version is not None:
+        compilers.setdefault(path_version, path_solc)
+
+    return compilers
+
+class SolcResolver:
+    def __init__(self, root_dir=None, import_resolver=None, compilers=None):
+        self.import_resolver = import_resolver if import_resolver is not None else SolidityImports.ImportResolver(root_dir)
+        self.compilers = compilers if compilers is not None else installed_compilers()
+        self.pragmas = dict()       # path -> its own constraints
+        self.resolutions = dict()   # constraints -> (version, solc executable), same constraints resolved once
+
+    def file_pragmas(self, path):
+        path = os.path.normpath(str(path))
+        if path not in self.pragmas:
+            self.pragmas[path] = parse_pragmas(self.import_resolver.source(path).decode("utf-8", errors="replace"))
+        return self.pragmas[path]
+
+    # Constraints of the contract and of every file it imports (they are compiled by the same solc)
+    def constraints(self, path):
+        paths = [os.path.normpath(str(path))] + self.import_resolver.transitive_imports(path)
+        return frozenset(constraint for source_path in paths for constraint in self.file_pragmas(source_path))
+
+    # (version name, solc executable) of the newest installed compiler for the contract, (None, None) if none fits
+    def resolve(self, path):
+        try:
+            constraints = self.constraints(path)
+        except OSError:
+            return None, None
+
+        if constraints not in self.resolutions:
+            resolution = (None, None)
+            for version in sorted(self.compilers, reverse=True):
+                if all(satisfies(version, constraint) for constraint in constraints):
+                    resolution = (version_name(version), self.compilers[version])
+                    break
+            self.resolutions[constraints] = resolution
+        return self.resolutions[constraints]
+
+    # Forgets the pragmas of edited contracts (the resolutions only depend on the constraints, they stay valid)
+    def invalidate(self, paths):
+        self.import_resolver.invalidate(paths)
+        for path in paths:
+            self.pragmas.pop(os.path.normpath(str(path)), None)
+
+    # Groups the contracts by compiler: [(version name, solc executable, contracts)], newest version first
+    # (the contracts without an installed compiler are grouped with version None, for the default solc)
+    def group(self, paths):
+        groups = dict()
+        for path in paths:
+            groups.setdefault(self.resolve(path), []).append(path)
+        return [(version, solc, group_paths) for (version, solc), group_paths
+                in sorted(groups.items(), key=lambda item: parse_version(item[0][0] or "") or (-1,), reverse=True)]
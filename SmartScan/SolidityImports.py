@@ -0,0 +1,117 @@
+import os
+import re
+
+# import "./A.sol";  import {A} from "./A.sol";  import * as A from "./A.sol";  import "./A.sol" as A;
+IMPORT_PATTERN = re.compile(r'^\s*import\s+(?:[^;"\']*?\s+from\s+)?["\']([^"\']+)["\']', re.MULTILINE)
+
+# Directories where non relative imports (e.g. "@openzeppelin/...", "forge-std/...") are looked up
+LIBRARY_DIRS = ["", "node_modules", "lib"]
+
+# Returns the import paths written in a Solidity source
+def parse_imports(source):
+    return IMPORT_PATTERN.findall(source)
+
+# Returns the file an import points to, or None if it can't be found on disk
+def resolve_import(file_path, import_path, root_dir):
+    if import_path.startswith("."):
+        candidate = os.path.normpath(os.path.join(os.path.dirname(str(file_path)), import_path))
+        return candidate if os.path.isfile(candidate) else None
+
+    if root_dir is None:
+        return None
+
+    for library_dir in LIBRARY_DIRS:
+        candidate = os.path.normpath(os.path.join(str(root_dir), library_dir, import_path))
+        if os.path.isfile(candidate):
+            return candidate
+
+    return None
+
+# solc remappings of the libraries, so solc finds the non relative imports where resolve_import does:
+# ["@openzeppelin/=node_modules/@openzeppelin/", "forge-std/=lib/forge-std/"] (relative to root_dir)
+def library_remappings(root_dir):
+    remappings = dict()
+    for library_dir in LIBRARY_DIRS[1:]:
+        try:
+            entries = sorted(os.scandir(os.path.join(str(root_dir), library_dir)), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith("."):
+                # The first library directory holding a name wins, as in resolve_import
+                remappings.setdefault(entry.name, f"{entry.name}/={library_dir}/{entry.name}/")
+    return list(remappings.values())
+
+"""
+    Reads the Solidity files once and keeps their content hash and resolved imports,
+so the transitive imports of many files can be computed without reading a file twice.
+"""
+class ImportResolver:
+    def __init__(self, root_dir=None):
+        self.root_dir = root_dir
+        self.sources = dict()   # path -> bytes
+        self.imports = dict()   # path -> ([resolved paths], [unresolved import strings])
+
+    def source(self, path):
+        path = os.path.normpath(str(path))
+        if path not in self.sources:
+            with open(path, "rb") as source_file:
+                self.sources[path] = source_file.read()
+        return self.sources[path]
+
+    def direct_imports(self, path):
+        path = os.path.normpath(str(path))
+        if path not in self.imports:
+            resolved, unresolved = [], []
+            for import_path in parse_imports(self.source(path).decode("utf-8", errors="replace")):
+                resolved_path = resolve_import(path, import_path, self.root_dir)
+                if resolved_path is None:
+                    unresolved.append(import_path)
+                else:
+                    resolved.append(resolved_path)
+            self.imports[path] = (resolved, unresolved)
+        return self.imports[path]
+
+    # All the files imported by path, directly or through other imports (path itself not included)
+    def transitive_imports(self, path):
+        start = os.path.normpath(str(path))
+        visited = {start}
+        to_visit = [start]
+        while to_visit:
+            resolved, _ = self.direct_imports(to_visit.pop())
+            for imported_path in resolved:
+                if imported_path not in visited:
+                    visited.add(imported_path)
+                    to_visit.append(imported_path)
+        visited.remove(start)
+        return sorted(visited)
+
+    # The files from paths that import path, directly or through other imports (path itself not included)
+    def importers(self, path, paths):
+        target = os.path.normpath(str(path))
+        paths_by_key = {os.path.normpath(str(other_path)) : other_path for other_path in paths}
+
+        # Reverse import graph: imported file -> files importing it
+        imported_by = dict()
+        for key in paths_by_key:
+            resolved, _ = self.direct_imports(key)
+            for imported_path in resolved:
+                imported_by.setdefault(imported_path, []).append(key)
+
+        found = []
+        visited = {target}
+        to_visit = [target]
+        while to_visit:
+            for importer in imported_by.get(to_visit.pop(), []):
+                if importer not in visited:
+                    visited.add(importer)
+                    to_visit.append(importer)
+                    found.append(paths_by_key[importer])
+        return found
+
+    # Forgets what was read from the given files, so their new content is read on the next use
+    def invalidate(self, paths):
+        for path in paths:
+            path = os.path.normpath(str(path))
+            self.sources.pop(path, None)
+            self.imports.pop(path, None)
@@ -0,0 +1,172 @@
+from pathlib import Path
+import os
+import random
+import shutil
+import subprocess
+
+"""
+    Deterministic generator of Solidity projects for the benchmarks: the same parameters and seed
+always give the same files, and the same commit once they are committed to a bare repository.
+
+    src/       files contracts of about lines lines, every contract imports the previous one in chains
+               of import_depth files and one file of a vendored library
+    lib/       libraries vendored libraries of library_files files (listed in .gitmodules, like Foundry submodules)
+    test/      one test contract for every 10 contracts (left out by the default discovery)
+
+    The contracts contain the usual findings of Slither (reentrancy, tx.origin, unchecked calls, timestamps)
+so the analysis and the report have something to work on.
+"""
+
+PRAGMA = "pragma solidity ^0.8.0;"
+
+# Fixed author and dates, so the commit of the same corpus always has the same hash
+COMMIT_ENVIRONMENT = {
+    "GIT_AUTHOR_NAME": "SmartScan Benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@smartscan.invalid",
+    "GIT_AUTHOR_DATE": "2000-01-01T00:00:00+0000",
+    "GIT_COMMITTER_NAME": "SmartScan Benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@smartscan.invalid",
+    "GIT_COMMITTER_DATE": "2000-01-01T00:00:00+0000"
+}
+
+# Function bodies the contracts are made of, {name} is replaced by a unique function name
+FUNCTION_TEMPLATES = [
+    # reentrancy: the balance is updated after the external call
+    """    function {name}() public {{
+        uint256 amount = balances[msg.sender];
+        (bool success, ) = msg.sender.call{{value: amount}}("");
+        require(success);
+        balances[msg.sender] = 0;
+    }}
+""",
+    # tx.origin authentication
+    """    function {name}(address newOwner) public {{
+        require(tx.origin == owner);
+        owner = newOwner;
+    }}
+""",
+    # block.timestamp comparison
+    """    function {name}() public view returns (bool) {{
+        return block.timestamp % 2 == 0;
+    }}
+""",
+    # unchecked low level call
+    """    function {name}(address target, bytes memory data) public {{
+        target.call(data);
+    }}
+""",
+    # plain arithmetic, no finding
+    """    function {name}(uint256 a, uint256 b) public pure returns (uint256) {{
+        uint256 total = a + b;
+        for (uint256 i = 0; i < b % 8; i++) {{
+            total += i * a;
+        }}
+        return total;
+    }}
+""",
+    # state update and event
+    """    function {name}(uint256 amount) public {{
+        balances[msg.sender] += amount;
+        emit Updated(msg.sender, amount);
+    }}
+"""
+]
+
+def contract_source(name, imports, lines, rng, base=None):
+    source = "// SPDX-License-Identifier: MIT\n" + PRAGMA + "\n\n"
+    for import_path in imports:
+        source += f'import "{import_path}";\n'
+
+    source += f"\ncontract {name}" + (f" is {base}" if base is not None else "") + " {\n"
+    if base is None:
+        source += "    address public owner;\n"
+        source += "    mapping(address => uint256) public balances;\n"
+        source += "    event Updated(address indexed account, uint256 amount);\n\n"
+
+    functions = []
+    line_count = source.count("\n")
+    while line_count < lines:
+        template = FUNCTION_TEMPLATES[rng.randrange(len(FUNCTION_TEMPLATES))]
+        functions.append(template.format(name=f"{name[0].lower()}{name[1:]}Function{len(functions)}") + "\n")
+        line_count += functions[-1].count("\n")
+
+    return source + "".join(functions) + "}\n"
+
+def library_source(name, lines, rng):
+    source = "// SPDX-License-Identifier: MIT\n" + PRAGMA + "\n\n" + f"library {name} {{\n"
+    functions = []
+    while 4 + 4 * len(functions) < lines:
+        functions.append(f"""    function function{len(functions)}(uint256 a, uint256 b) internal pure returns (uint256) {{
+        return a * {rng.randrange(1, 100)} + b;
+    }}
+
+""")
+    return source + "".join(functions) + "}\n"
+
+def write_file(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as source_file:
+        source_file.write(content)
+
+# Writes the corpus into corpus_dir (replacing its content), returns the paths of the src contracts
+def generate(corpus_dir, files=100, lines=150, import_depth=3, libraries=2, library_files=5, seed=0):
+    rng = random.Random(seed)
+    corpus_dir = Path(corpus_dir)
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+
+    library_paths = []
+    gitmodules = ""
+    for library in range(libraries):
+        library_name = f"Library{library}"
+        gitmodules += f'[submodule "lib/{library_name}"]\n\tpath = lib/{library_name}\n\turl = https://example.invalid/{library_name}.git\n'
+        for library_file in range(library_files):
+            path = corpus_dir / "lib" / library_name / "src" / f"{library_name}Math{library_file}.sol"
+            write_file(path, library_source(f"{library_name}Math{library_file}", lines // 2, rng))
+            library_paths.append(path)
+    if libraries > 0:
+        write_file(corpus_dir / ".gitmodules", gitmodules)
+
+    contracts = []
+    for index in range(files):
+        name = f"Contract{index}"
+        path = corpus_dir / "src" / f"{name}.sol"
+        imports = []
+        base = None
+        # Chains of import_depth imports: Contract1 imports Contract0, Contract2 imports Contract1...
+        if import_depth > 0 and index % (import_depth + 1) != 0:
+            base = f"Contract{index - 1}"
+            imports.append(f"./{base}.sol")
+        if len(library_paths) > 0:
+            imports.append(os.path.relpath(rng.choice(library_paths), path.parent).replace(os.sep, "/"))
+        write_file(path, contract_source(name, imports, lines, rng, base))
+        contracts.append(path)
+
+    for index in range(0, files, 10):
+        write_file(corpus_dir / "test" / f"Contract{index}.t.sol",
+                   contract_source(f"Contract{index}Test", [f"../src/Contract{index}.sol"], lines // 2, rng))
+
+    return contracts
+
+def git(arguments, cwd=None):
+    environment = dict(os.environ, **COMMIT_ENVIRONMENT)
+    return subprocess.run(["git"] + arguments, cwd=cwd, env=environment, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+# Commits the corpus and serves it from a bare repository in bare_dir, returns (clone URL, commit)
+def publish(corpus_dir, bare_dir):
+    git(["init", "--quiet"], corpus_dir)
+    git(["-c", "core.autocrlf=false", "add", "--all"], corpus_dir)
+    git(["-c", "commit.gpgsign=false", "commit", "--quiet", "--message", "Synthetic corpus"], corpus_dir)
+    commit = git(["rev-parse", "HEAD"], corpus_dir)
+
+    if os.path.exists(bare_dir):
+        shutil.rmtree(bare_dir)
+    git(["clone", "--bare", "--quiet", str(corpus_dir), str(bare_dir)])
+    # The clones of GitHubImport are blob-filtered
+    git(["config", "uploadpack.allowFilter", "true"], bare_dir)
+    return Path(bare_dir).resolve().as_uri(), commit
+
+# Writes one large contract of about lines lines (the big files opened in the CodeArea)
+def generate_large_file(path, lines=100000, seed=0):
+    write_file(Path(path), contract_source("LargeContract", [], lines, random.Random(seed)))
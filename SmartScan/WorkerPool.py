@@ -0,0 +1,278 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+"""
+    Pool of analysis processes with a bounded memory footprint, used like a ProcessPoolExecutor (submit / map).
+
+    Slither and crytic-compile keep compilation units, IR and results alive, so a process that analyzes
+contract after contract keeps growing. Every worker process of the pool is replaced by a fresh one:
+- after max_tasks analyses,
+- after an analysis that left it above RECYCLE_FRACTION of memory_limit.
+While an analysis runs, a worker going over memory_limit (RSS, in bytes) is stopped and the analysis fails
+with a WorkerError, instead of the whole scan being killed by the system. A worker that dies during an
+analysis (e.g. killed by the system) fails that analysis the same way, and the next one gets a new worker.
+
+    An analysis running for more than task_timeout seconds fails with a WorkerTimeout, and cancel() stops
+analyses with a WorkerCancelled. Their worker is killed together with the processes it started
+(e.g. a hung solc), every worker being the leader of its own process group (POSIX).
+
+    The RSS of the workers is read from /proc (Linux). Elsewhere the limit is only checked by the workers
+themselves after every analysis.
+"""
+
+DEFAULT_MAX_TASKS = 50
+
+# Workers left above this fraction of the memory limit by an analysis are replaced before the next one
+RECYCLE_FRACTION = 0.75
+
+# Seconds between two memory checks of a running analysis
+POLL_INTERVAL = 0.5
+
+MEGABYTE = 1024 * 1024
+
+class WorkerError(RuntimeError):
+    pass
+
+class WorkerTimeout(WorkerError):
+    pass
+
+class WorkerCancelled(WorkerError):
+    pass
+
+# Resident memory of the process in bytes (None where /proc is not available)
+def rss_of(pid=None):
+    try:
+        with open(f"/proc/{pid if pid is not None else 'self'}/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+# Resets the peak resident memory of this process (Linux, no effect elsewhere)
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+# Peak resident memory of this process in bytes, since the last reset_peak_rss on Linux
+# (since the start of the process elsewhere, None if unknown)
+def peak_rss():
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # bytes on macOS, kilobytes elsewhere
+
+# Records the peak memory of the block in records[key] (bytes)
+@contextmanager
+def measure_peak_memory(records, key):
+    reset_peak_rss()
+    try:
+        yield
+    finally:
+        peak = peak_rss()
+        if peak is not None:
+            records[key] = peak
+
+# Kills the worker and the processes it started (only the worker where process groups don't exist)
+def kill_worker(process):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError: # the worker didn't lead its own group yet
+            pass
+    process.terminate()
+
+# Main loop of a worker process: runs the tasks sent through the connection until it has to be replaced
+def worker_main(connection, max_tasks, memory_limit):
+    # Own process group, so the compilers started by an analysis are killed with the worker
+    if hasattr(os, "setsid"):
+        os.setsid()
+
+    tasks_done = 0
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError: # the pool is gone
+            return
+        if task is None:
+            return
+
+        function, arguments = task
+        try:
+            outcome = (True, function(*arguments))
+        except Exception as e: # sent as text, the exception itself may not be picklable
+            outcome = (False, WorkerError(f"{type(e).__name__}: {e}"))
+
+        tasks_done += 1
+        rss = rss_of()
+        retire = ((max_tasks is not None and tasks_done >= max_tasks) or
+                  (memory_limit is not None and rss is not None and rss > memory_limit * RECYCLE_FRACTION))
+        connection.send((outcome, retire))
+        if retire:
+            return
+
+class WorkerPool:
+    def __init__(self, workers=None, max_tasks=DEFAULT_MAX_TASKS, memory_limit=None, task_timeout=None):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit # bytes, None = no limit
+        self.task_timeout = task_timeout # seconds, None = no limit
+
+        self.lock = threading.Lock()
+        self.running = dict() # future -> worker process running it
+        self.cancelled = set() # running futures stopped by cancel()
+
+        self.tasks = queue.Queue() # (future, function, arguments), None stops a worker thread
+        self.recycled = 0 # workers replaced after max_tasks or over the memory limit
+        self.stopped = 0  # workers stopped or died during an analysis
+
+        # Every worker process is driven by its own thread, started on its first task
+        self.threads = [threading.Thread(target=self.serve, daemon=True) for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, function, *arguments):
+        future = Future()
+        self.tasks.put((future, function, arguments))
+        return future
+
+    # Same as ProcessPoolExecutor.map: every call is submitted at once, the results come back in order
+    def map(self, function, *iterables):
+        futures = [self.submit(function, *arguments) for arguments in zip(*iterables)]
+        return (future.result() for future in futures)
+
+    # Stops the workers once the submitted tasks are done (the ones not started yet are cancelled with cancel_futures)
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            while True:
+                try:
+                    task = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+
+        for _ in self.threads:
+            self.tasks.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    # Stops the given futures: the ones not started are cancelled, the running ones fail with a WorkerCancelled
+    def cancel(self, futures):
+        for future in futures:
+            if future.cancel():
+                continue
+            with self.lock:
+                process = self.running.get(future)
+                if process is not None:
+                    self.cancelled.add(future)
+            if process is not None:
+                kill_worker(process)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True, cancel_futures=True)
+        return False
+
+    def start_worker(self):
+        connection, worker_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=worker_main, args=(worker_connection, self.max_tasks, self.memory_limit), daemon=True)
+        process.start()
+        worker_connection.close()
+        return process, connection
+
+    def stop_worker(self, process, connection, terminate=False):
+        if terminate:
+            kill_worker(process)
+        else:
+            try:
+                connection.send(None)
+            except OSError: # already exited
+                pass
+        process.join()
+        connection.close()
+
+    # Waits for the result of the running task, stops the worker if it goes over the memory limit or the timeout
+    def wait_result(self, process, connection, future):
+        start = time.monotonic()
+        while not connection.poll(POLL_INTERVAL):
+            if not process.is_alive():
+                break
+            if self.task_timeout is not None and time.monotonic() - start > self.task_timeout:
+                raise WorkerTimeout(f"The analysis took more than {self.task_timeout} second(s) and was stopped.")
+            rss = rss_of(process.pid) if self.memory_limit is not None else None
+            if rss is not None and rss > self.memory_limit:
+                raise WorkerError(f"The analysis process used {rss // MEGABYTE} MB, over the memory limit of "
+                                  f"{self.memory_limit // MEGABYTE} MB, and was stopped.")
+        try:
+            return connection.recv()
+        except (EOFError, OSError):
+            process.join()
+            with self.lock:
+                if future in self.cancelled:
+                    raise WorkerCancelled("The analysis was cancelled.")
+            raise WorkerError(f"The analysis process exited unexpectedly (exit code {process.exitcode}), "
+                              f"it may have been killed for using too much memory.")
+
+    def serve(self):
+        process, connection = None, None
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                if process is not None:
+                    self.stop_worker(process, connection)
+                return
+
+            future, function, arguments = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            if process is None:
+                process, connection = self.start_worker()
+
+            with self.lock:
+                self.running[future] = process
+            try:
+                connection.send((function, arguments))
+                (succeeded, value), retire = self.wait_result(process, connection, future)
+            except Exception as e: # the worker died or was stopped, or the task could not be sent to it
+                self.stop_worker(process, connection, terminate=True)
+                process, connection = None, None
+                self.stopped += 1
+                future.set_exception(e if isinstance(e, WorkerError) else WorkerError(f"{type(e).__name__}: {e}"))
+                continue
+            finally:
+                with self.lock:
+                    self.running.pop(future, None)
+                    self.cancelled.discard(future)
+
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+            if retire:
+                self.stop_worker(process, connection)
+                process, connection = None, None
+                self.recycled += 1
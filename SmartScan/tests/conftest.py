@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of SmartScan are imported by name, like SmartScan.py and SmartScanCLI.py do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import types
+
+import pytest
+
+import BatchScanner, DetectorRegistry, SlitherScanner, SyntheticCorpus
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="the repositories are cloned with git")
+
+# Detector class as DetectorRegistry.select reads it
+class TxOriginDetector:
+    ARGUMENT = "tx-origin"
+    IMPACT = types.SimpleNamespace(name="MEDIUM")
+
+# Slither stand-in run in the worker processes: a finding for every line using tx.origin
+def analysis(path, detectors, profile, solc):
+    with open(str(path), encoding="utf-8") as source_file:
+        lines = source_file.read().splitlines()
+    findings = [(number, number, f"{os.path.basename(str(path))}#{number} uses tx.origin", "Medium", "tx-origin", "Medium")
+                for number, line in enumerate(lines, 1) if "tx.origin" in line]
+    return findings, None, {"profile": [], "memory": {}}
+
+def expected_findings(corpus_dir):
+    findings = []
+    src_dir = os.path.join(corpus_dir, "src")
+    for name in os.listdir(src_dir):
+        with open(os.path.join(src_dir, name), encoding="utf-8") as source_file:
+            findings.extend((f"src/{name}", number) for number, line in enumerate(source_file.read().splitlines(), 1)
+                            if "tx.origin" in line)
+    return sorted(findings)
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as jsonl_file:
+        return sorted((record["file"], record["first_line"]) for record in map(json.loads, jsonl_file))
+
+@pytest.fixture
+def repositories(tmp_path):
+    corpora = []
+    for seed in range(2):
+        corpus_dir = str(tmp_path / "corpora" / f"corpus{seed}")
+        SyntheticCorpus.generate(corpus_dir, files=4 + seed, lines=40, import_depth=1, libraries=1, library_files=2, seed=seed)
+        url, _ = SyntheticCorpus.publish(corpus_dir, str(tmp_path / "corpora" / f"corpus{seed}.git"))
+        corpora.append((url, corpus_dir))
+    return corpora
+
+def test_batch_scan_of_two_repositories(tmp_path, repositories, monkeypatch):
+    monkeypatch.chdir(tmp_path) # the mirrors, the scan cache and the findings store
+    monkeypatch.setattr(DetectorRegistry, "detector_classes", lambda: (TxOriginDetector,))
+    monkeypatch.setattr(SlitherScanner, "analyze_contract", analysis)
+    urls = [url for url, _ in repositories]
+
+    batch = BatchScanner.BatchScanner(str(tmp_path / "Workspaces"), clone_workers=2, analysis_workers=2, queue_size=1)
+    results = batch.run(urls)
+    assert all(len(expected_findings(corpus_dir)) > 0 for _, corpus_dir in repositories)
+    summary_path = batch.write_summary(results)
+
+    for result, (url, corpus_dir) in zip(results, repositories):
+        assert "error" not in result
+        assert result["repository"] == url
+        assert result["contracts"] == len(os.listdir(os.path.join(corpus_dir, "src")))
+        assert result["failed_contracts"] == 0
+        assert not result["from_stored_scan"]
+        assert read_jsonl(result["findings_file"]) == expected_findings(corpus_dir)
+        assert result["findings"] == len(expected_findings(corpus_dir))
+        assert os.path.dirname(result["report"]) == batch.reports_dir
+        with open(result["report"], encoding="utf-8") as report_file:
+            assert "Security report:" in report_file.read()
+        assert not os.path.exists(os.path.join(batch.workspace_dir, BatchScanner.workspace_name(url)))
+
+    with open(summary_path, encoding="utf-8") as summary_file:
+        written = json.load(summary_file)
+    assert written["repositories"] == results
+    summary = written["summary"]
+    assert (summary["repositories"], summary["scanned"], summary["failed"], summary["from_stored_scan"]) == (2, 2, 0, 0)
+    assert summary["contracts"] == sum(result["contracts"] for result in results)
+    assert summary["findings"] == sum(result["findings"] for result in results)
+    assert summary["severity_frequency"]["Medium"] == summary["findings"]
+
+    # Same commits: the second batch reads the stored scans back instead of cloning and analyzing again
+    # (it writes the same report files)
+    first_findings = [read_jsonl(result["findings_file"]) for result in results]
+    for result in results:
+        os.remove(result["findings_file"])
+    again = BatchScanner.BatchScanner(str(tmp_path / "Workspaces"), clone_workers=2, analysis_workers=2)
+    again_results = again.run(urls + ["file:///missing/repository.git"])
+    for result, findings in zip(again_results, first_findings):
+        assert result["from_stored_scan"]
+        assert read_jsonl(result["findings_file"]) == findings
+    assert "error" in again_results[2]
+    summary = again.summary(again_results)
+    assert (summary["repositories"], summary["scanned"], summary["failed"], summary["from_stored_scan"]) == (3, 2, 1, 2)
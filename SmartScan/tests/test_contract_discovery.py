@@ -0,0 +1,47 @@
+import ContractDiscovery
+
+def write(root, relative_path, content=""):
+    path = root.joinpath(*relative_path.split("/"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+def discovered(root, include=(), exclude=(), default_excludes=True):
+    discovery = ContractDiscovery.ContractDiscovery(root, include, exclude, default_excludes)
+    return sorted(path.relative_to(root).as_posix() for path in discovery.run())
+
+def test_compile_glob():
+    assert ContractDiscovery.compile_glob("*.t.sol").fullmatch("test/Vault.t.sol")
+    assert ContractDiscovery.compile_glob("src/**").fullmatch("src/a/B.sol")
+    assert not ContractDiscovery.compile_glob("src/*.sol").fullmatch("src/a/B.sol")
+    assert ContractDiscovery.compile_glob("mocks/").fullmatch("src/mocks/M.sol")
+
+def test_dependencies_build_outputs_and_tests_are_skipped(tmp_path):
+    for path in ["contracts/Vault.sol", "contracts/mocks/MockToken.sol", "contracts/VaultMock.sol",
+                 "node_modules/@oz/ERC20.sol", "artifacts/Vault.sol", "test/Vault.t.sol", "script/Deploy.s.sol"]:
+        write(tmp_path, path)
+    assert discovered(tmp_path) == ["contracts/Vault.sol"]
+    assert discovered(tmp_path, default_excludes=False) == [
+        "contracts/Vault.sol", "contracts/VaultMock.sol", "contracts/mocks/MockToken.sol",
+        "script/Deploy.s.sol", "test/Vault.t.sol"]
+
+def test_foundry_source_root_and_libraries(tmp_path):
+    write(tmp_path, "foundry.toml", "[profile.default]\nsrc = 'contracts'\n")
+    write(tmp_path, ".gitmodules")
+    for path in ["contracts/Vault.sol", "src/Unused.sol", "lib/forge-std/src/Test.sol"]:
+        write(tmp_path, path)
+    discovery = ContractDiscovery.ContractDiscovery(tmp_path)
+    discovery.run()
+    assert discovery.roots == ["contracts"]
+    assert discovered(tmp_path) == ["contracts/Vault.sol"]
+
+def test_gitignore_rules_and_negation(tmp_path):
+    write(tmp_path, ".gitignore", "generated/\n*.draft.sol\n!Keep.draft.sol\n")
+    for path in ["src/A.sol", "src/B.draft.sol", "src/Keep.draft.sol", "generated/G.sol"]:
+        write(tmp_path, path)
+    assert discovered(tmp_path) == ["src/A.sol", "src/Keep.draft.sol"]
+
+def test_include_and_exclude_globs(tmp_path):
+    for path in ["src/A.sol", "src/utils/B.sol", "test/A.t.sol"]:
+        write(tmp_path, path)
+    assert discovered(tmp_path, include=["test/**"]) == ["test/A.t.sol"]
+    assert discovered(tmp_path, exclude=["src/utils/"]) == ["src/A.sol"]
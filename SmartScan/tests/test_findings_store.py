@@ -0,0 +1,91 @@
+import pytest
+
+import FindingsStore, SecurityVulnerability
+
+# The results of a scan, as record_scan reads them from a SlitherScanner
+class RecordedScan:
+    def __init__(self, files):
+        self.findings = SecurityVulnerability.FindingsTable()
+        for path, findings in files.items():
+            self.findings.add_file(path)
+            for finding in findings:
+                self.findings.add(path, *finding)
+        self.failed_contracts = []
+        self.timed_out_contracts = []
+        self.cancelled_contracts = []
+        self.stars = 1
+        self.score = 1
+
+SOURCE = """pragma solidity ^0.8.0;
+contract Vault {
+    function withdraw() public {
+        msg.sender.call("");
+        msg.sender.call("");
+    }
+    function auth() public {
+        require(tx.origin == owner);
+    }
+}
+"""
+
+def finding(source, text, detector, occurrence=0):
+    lines = [index + 1 for index, line in enumerate(source.splitlines()) if text in line]
+    return (lines[occurrence], lines[occurrence], f"{detector} finding", "High", detector, "High")
+
+def record(store, root_dir, source, findings, commit=None):
+    contract = root_dir / "src" / "Vault.sol"
+    contract.parent.mkdir(parents=True, exist_ok=True)
+    contract.write_text(source)
+    return store.record_scan("repository", commit, {"profile": "full"}, RecordedScan({str(contract): findings}), root_dir)
+
+@pytest.fixture
+def store(tmp_path):
+    with FindingsStore.FindingsStore(str(tmp_path / "SmartScan.db")) as store:
+        yield store
+
+def test_files_and_query_read_back_a_scan(store, tmp_path):
+    findings = [finding(SOURCE, "msg.sender.call", "low-level-calls"), finding(SOURCE, "tx.origin", "tx-origin")]
+    scan_id = record(store, tmp_path / "repo", SOURCE, findings)
+    assert store.files(scan_id) == {"src/Vault.sol": findings}
+    assert store.query(scan_id, detector="tx-origin") == [("src/Vault.sol", findings[1])]
+    assert store.count_by(scan_id, "severity") == {"High": 2}
+
+def test_diff_matches_findings_moved_by_other_changes(store, tmp_path):
+    base_id = record(store, tmp_path / "base", SOURCE,
+                     [finding(SOURCE, "msg.sender.call", "low-level-calls"), finding(SOURCE, "tx.origin", "tx-origin")])
+    head_source = SOURCE.replace("contract Vault {\n", "contract Vault {\n    uint256 total;\n\n").replace(
+        "tx.origin == owner", "msg.sender == owner")
+    head_id = record(store, tmp_path / "head", head_source,
+                     [finding(head_source, "msg.sender.call", "low-level-calls"), finding(head_source, "msg.sender ==", "timestamp")])
+
+    changes = store.diff(base_id, head_id)
+    assert [change[1][4] for change in changes["unchanged"]] == ["low-level-calls"]
+    assert [change[1][4] for change in changes["introduced"]] == ["timestamp"]
+    assert [change[1][4] for change in changes["fixed"]] == ["tx-origin"]
+
+def test_diff_matches_identical_findings_as_a_multiset(store, tmp_path):
+    # The two calls have the same fingerprint: one of them is still matched when the other is removed
+    both = [finding(SOURCE, "msg.sender.call", "low-level-calls", 0), finding(SOURCE, "msg.sender.call", "low-level-calls", 1)]
+    base_id = record(store, tmp_path / "base", SOURCE, both)
+    head_source = SOURCE.replace('        msg.sender.call("");\n', "", 1)
+    head_id = record(store, tmp_path / "head", head_source, [finding(head_source, "msg.sender.call", "low-level-calls")])
+
+    changes = store.diff(base_id, head_id)
+    assert (len(changes["unchanged"]), len(changes["introduced"]), len(changes["fixed"])) == (1, 0, 1)
+    changes = store.diff(head_id, base_id)
+    assert (len(changes["unchanged"]), len(changes["introduced"]), len(changes["fixed"])) == (1, 1, 0)
+
+def test_scan_of_commit_needs_an_unambiguous_hash_prefix(store, tmp_path):
+    first = record(store, tmp_path / "a", SOURCE, [], commit="1234567aaaa")
+    record(store, tmp_path / "b", SOURCE, [], commit="1234567bbbb")
+    third = record(store, tmp_path / "c", SOURCE, [], commit="1234567bbbb")
+
+    assert store.scan_of_commit("repository", "1234567a") == first
+    assert store.scan_of_commit("repository", "1234567BBBB") == third # newest scan of the commit
+    assert store.scan_of_commit("repository", "89abcdef") is None
+    with pytest.raises(ValueError):
+        store.scan_of_commit("repository", "1234567") # both commits
+    with pytest.raises(ValueError):
+        store.scan_of_commit("repository", "12") # too short, e.g. a scan id
+    with pytest.raises(ValueError):
+        store.scan_of_commit("repository", "1234567%")
@@ -0,0 +1,93 @@
+import random
+
+import SecurityVulnerability
+
+SEVERITIES = ["High", "Medium", "Low", "Informational"]
+DETECTORS = ["reentrancy-eth", "tx-origin", "unused-return", "naming-convention"]
+CONFIDENCES = ["High", "Medium", "Low"]
+
+def build(files=6, findings=40, seed=0):
+    rng = random.Random(seed)
+    table = SecurityVulnerability.FindingsTable()
+    expected = dict() # path -> findings
+    for file_index in range(files):
+        path = f"src/C{file_index}.sol"
+        table.add_file(path)
+        expected[path] = []
+        for _ in range(rng.randrange(findings)):
+            first_line = rng.randrange(1, 500)
+            finding = (first_line, first_line + rng.randrange(5), f"finding {rng.randrange(10)}",
+                       rng.choice(SEVERITIES), rng.choice(DETECTORS), rng.choice(CONFIDENCES))
+            table.add(path, *finding)
+            expected[path].append(finding)
+    return table, expected
+
+# The findings matching the filters, from a plain scan of the expected findings
+def matching(expected, path=None, severity=None, detector=None, confidence=None):
+    return [finding for file_path, findings in expected.items() if path in (None, file_path) for finding in findings
+            if severity in (None, finding[3]) and detector in (None, finding[4]) and confidence in (None, finding[5])]
+
+def check_rows(table, expected):
+    for path in [None, "src/C1.sol", "src/Missing.sol"]:
+        for severity in [None, "High", "Critical"]:
+            for detector in [None, "tx-origin"]:
+                for confidence in [None, "Low"]:
+                    rows = table.rows(path, severity, detector, confidence)
+                    assert rows == sorted(rows)
+                    assert [table.finding(row) for row in rows] == matching(expected, path, severity, detector, confidence)
+
+def check_counts(table, expected):
+    findings = [finding for file_findings in expected.values() for finding in file_findings]
+    assert len(table) == len(findings)
+    assert table.count_by_severity() == {severity : count for severity, count in
+                                         SecurityVulnerability.Counter(finding[3] for finding in findings).items()}
+    assert table.count_by_detector() == {detector : count for detector, count in
+                                         SecurityVulnerability.Counter(finding[4] for finding in findings).items()}
+    assert table.count_by_file() == {path : len(file_findings) for path, file_findings in expected.items()}
+
+def test_rows_match_a_plain_scan():
+    table, expected = build()
+    check_rows(table, expected)
+    check_counts(table, expected)
+
+def test_removed_files_leave_dead_rows_until_compact():
+    table, expected = build()
+    total = len(table.live)
+    table.remove_file("src/C2.sol")
+    del expected["src/C2.sol"]
+
+    assert len(table.live) == total # fewer dead rows than live ones: not compacted yet
+    assert "src/C2.sol" not in table
+    assert table.file_findings("src/C2.sol") == []
+    check_rows(table, expected)
+    check_counts(table, expected)
+
+def test_compact_renumbers_the_rows():
+    table, expected = build()
+    for path in ["src/C0.sol", "src/C1.sol", "src/C3.sol", "src/C4.sol"]:
+        table.remove_file(path)
+        del expected[path]
+
+    # Compacted once more than half of the rows were dead
+    assert table.dead_rows == 0
+    assert len(table.live) == len(table)
+    assert table.paths() == list(expected)
+    for path, findings in expected.items():
+        assert table.file_findings(path) == findings
+        assert list(table.file_rows[table.file_ids[path]]) == table.rows(path)
+    check_rows(table, expected)
+    check_counts(table, expected)
+
+def test_a_removed_file_can_be_added_again():
+    table, expected = build()
+    table.remove_file("src/C1.sol")
+    table.add_file("src/C1.sol")
+    table.add("src/C1.sol", 3, 4, "again", "High", "tx-origin", "Low")
+    expected["src/C1.sol"] = [(3, 4, "again", "High", "tx-origin", "Low")]
+
+    # C1 is listed where it was first added, its new rows come after the others
+    assert table.paths() == list(expected)
+    assert table.file_findings("src/C1.sol") == expected["src/C1.sol"]
+    expected["src/C1.sol"] = expected.pop("src/C1.sol")
+    check_rows(table, expected)
+    check_counts(table, expected)
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+import FindingsWriter
+
+ROOT = os.path.join(os.sep, "workspace", "repo")
+
+CONTRACTS = {
+    os.path.join(ROOT, "src", "Vault.sol"): [
+        (12, 20, "Reentrancy in Vault.withdraw()", "High", "reentrancy-eth", "Medium"),
+        (31, 31, "Vault.auth() uses tx.origin", "Medium", "tx-origin", "Medium"),
+        (40, 42, "Vault.claim() ignores the return value", "Medium", "unused-return", "Medium"),
+    ],
+    os.path.join(ROOT, "src", "Empty.sol"): [],
+    os.path.join(ROOT, "src", "token", "Token.sol"): [
+        (5, 5, "Token.mint() uses tx.origin", "Medium", "tx-origin", "High"),
+        (9, 9, "Variable Token.x_ is not in mixedCase", "Informational", "naming-convention", "High"),
+    ],
+}
+
+def write_all(writer):
+    for contract, findings in CONTRACTS.items():
+        writer.write_contract(contract, findings)
+    writer.close()
+
+def expected_records():
+    return [(os.path.relpath(contract, ROOT).replace(os.sep, "/"), finding)
+            for contract, findings in CONTRACTS.items() for finding in findings]
+
+def test_json_lines_round_trip(tmp_path):
+    output_path = tmp_path / "findings.jsonl"
+    write_all(FindingsWriter.JsonLinesWriter(output_path, ROOT))
+
+    records = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [(record["file"], (record["first_line"], record["last_line"], record["description"], record["severity"],
+                              record["detector"], record["confidence"])) for record in records] == expected_records()
+
+def test_sarif_log(tmp_path):
+    output_path = tmp_path / "findings.sarif"
+    write_all(FindingsWriter.SarifWriter(output_path, ROOT))
+
+    log = json.loads(output_path.read_text(encoding="utf-8"))
+    assert log["$schema"] == FindingsWriter.SARIF_SCHEMA
+    assert log["version"] == "2.1.0"
+    run, = log["runs"]
+    rules = [rule["id"] for rule in run["tool"]["driver"]["rules"]]
+    assert rules == ["reentrancy-eth", "tx-origin", "unused-return", "naming-convention"]
+
+    results = run["results"]
+    assert len(results) == len(expected_records())
+    for result, (file_name, finding) in zip(results, expected_records()):
+        first_line, last_line, description, severity, detector, confidence = finding
+        assert result["ruleId"] == detector
+        assert rules[result["ruleIndex"]] == detector
+        assert result["level"] == FindingsWriter.SARIF_LEVELS[severity]
+        assert result["message"]["text"] == description
+        location, = result["locations"]
+        assert location["physicalLocation"]["artifactLocation"]["uri"] == file_name
+        assert location["physicalLocation"]["region"] == {"startLine": first_line, "endLine": last_line}
+        assert result["properties"] == {"severity": severity, "confidence": confidence}
+
+def test_sarif_log_without_findings(tmp_path):
+    output_path = tmp_path / "findings.sarif"
+    writer = FindingsWriter.SarifWriter(output_path, ROOT)
+    writer.write_contract(os.path.join(ROOT, "src", "Empty.sol"), [])
+    writer.close()
+
+    log = json.loads(output_path.read_text(encoding="utf-8"))
+    assert log["runs"][0]["results"] == []
+    assert log["runs"][0]["tool"]["driver"]["rules"] == []
+
+def test_format_of_the_output_path(tmp_path):
+    assert FindingsWriter.format_of("out/findings.sarif") == "sarif"
+    assert FindingsWriter.format_of("out/Findings.SARIF.json") == "sarif"
+    assert FindingsWriter.format_of("out/findings.jsonl") == "jsonl"
+    writer = FindingsWriter.open_writer("sarif", tmp_path / "a.sarif")
+    writer.close()
+    assert isinstance(writer, FindingsWriter.SarifWriter)
+    with pytest.raises(ValueError, match="Unknown output format"):
+        FindingsWriter.open_writer("xml", tmp_path / "a.xml")
@@ -0,0 +1,95 @@
+import Fingerprint
+
+SOURCE = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract Vault {
+    mapping(address => uint256) balances;
+
+    function withdraw() public {
+        uint256 amount = balances[msg.sender];
+        (bool success, ) = msg.sender.call{value: amount}("");
+        require(success);
+        balances[msg.sender] = 0;
+    }
+
+    modifier onlyOwner() {
+        require(tx.origin == owner);
+        _;
+    }
+}
+
+contract Token {
+    function withdraw() public {
+        msg.sender.call("");
+    }
+}
+"""
+
+def test_scopes_follow_contracts_and_functions():
+    scopes = Fingerprint.SourceScopes(SOURCE)
+    assert scopes.scope(4) == "Vault"
+    assert scopes.scope(7) == "Vault.withdraw"
+    assert scopes.scope(9) == "Vault.withdraw"
+    assert scopes.scope(12) == "Vault.withdraw" # its closing brace
+    assert scopes.scope(13) == "Vault"
+    assert scopes.scope(15) == "Vault.onlyOwner"
+    assert scopes.scope(20) == "Token"
+    assert scopes.scope(22) == "Token.withdraw"
+    assert scopes.scope(100) == ""
+
+def test_scopes_ignore_keywords_in_strings_and_comments():
+    source = """contract Pausable {
+    function withdraw() public {
+        require(!paused, "contract paused");
+        if (locked) { revert('Initializable: contract is already initialized'); }
+        /* contract Fake {
+           function fake() { */
+    }
+
+    function other() public {
+        string memory url = "https://example.com"; // function notAFunction() {
+    }
+}
+"""
+    scopes = Fingerprint.SourceScopes(source)
+    assert scopes.scope(3) == "Pausable.withdraw"
+    assert scopes.scope(4) == "Pausable.withdraw"
+    assert scopes.scope(8) == "Pausable"
+    assert scopes.scope(9) == "Pausable.other"
+    assert scopes.scope(10) == "Pausable.other"
+    assert scopes.scope(13) == ""
+
+def test_normalize_keeps_strings_and_drops_comments():
+    assert Fingerprint.normalize('x = "a // b";  // comment\n  y = 1; /* z */') == 'x="a//b";y=1;'
+
+def fingerprint_of_line(source, text, detector="reentrancy-eth"):
+    scopes = Fingerprint.SourceScopes(source)
+    line = next(index + 1 for index, line in enumerate(source.splitlines()) if text in line)
+    return Fingerprint.finding_fingerprint(scopes, line, line, detector)
+
+def test_fingerprint_is_stable_when_lines_shift():
+    shifted = SOURCE.replace("    mapping(address => uint256) balances;\n",
+                             "    mapping(address => uint256) balances;\n    uint256 total;\n\n    // more state\n")
+    call = "msg.sender.call{value: amount}"
+    assert fingerprint_of_line(SOURCE, call) == fingerprint_of_line(shifted, call)
+
+def test_fingerprint_changes_with_code_function_and_detector():
+    call = "msg.sender.call{value: amount}"
+    original = fingerprint_of_line(SOURCE, call)
+    assert fingerprint_of_line(SOURCE.replace("value: amount", "value: amount / 2"), "msg.sender.call{value") != original
+    assert fingerprint_of_line(SOURCE.replace("function withdraw() public {\n        uint256",
+                                              "function drain() public {\n        uint256"), call) != original
+    assert fingerprint_of_line(SOURCE, call, "low-level-calls") != original
+
+def test_same_code_in_functions_of_different_contracts_differs():
+    source = SOURCE.replace('msg.sender.call("");', 'msg.sender.call{value: amount}("");')
+    scopes = Fingerprint.SourceScopes(source)
+    lines = [index + 1 for index, line in enumerate(source.splitlines()) if "msg.sender.call{value: amount}" in line]
+    assert len(lines) == 2
+    fingerprints = {Fingerprint.finding_fingerprint(scopes, line, line, "reentrancy-eth") for line in lines}
+    assert len(fingerprints) == 2
+
+def test_fallback_fingerprint_ignores_line_numbers():
+    assert (Fingerprint.fallback_fingerprint("tx-origin", "Vault.auth() (src/Vault.sol#10-12) uses tx.origin") ==
+            Fingerprint.fallback_fingerprint("tx-origin", "Vault.auth() (src/Vault.sol#30-32) uses tx.origin"))
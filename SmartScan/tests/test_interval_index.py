@@ -0,0 +1,31 @@
+import random
+
+import IntervalIndex
+
+def test_at_returns_the_covering_intervals_in_order():
+    index = IntervalIndex.IntervalIndex([(5, 10, "a"), (1, 3, "b"), (8, 20, "c"), (10, 10, "d")])
+    assert len(index) == 4
+    assert index.at(2) == ["b"]
+    assert index.at(4) == []
+    assert index.at(9) == ["a", "c"]
+    assert index.at(10) == ["a", "c", "d"]
+    assert index.at(21) == []
+
+def test_empty_index():
+    index = IntervalIndex.IntervalIndex()
+    assert len(index) == 0
+    assert index.at(1) == []
+
+def test_at_matches_a_linear_search():
+    rng = random.Random(0)
+    intervals = []
+    for value in range(300):
+        first = rng.randrange(1, 1000)
+        intervals.append((first, first + rng.randrange(0, 50), value))
+    index = IntervalIndex.IntervalIndex(intervals)
+    for line in range(0, 1060, 7):
+        assert index.at(line) == [value for first, last, value in intervals if first <= line <= last]
+
+def test_merge_ranges_merges_overlapping_and_adjacent_ranges():
+    assert IntervalIndex.merge_ranges([(10, 12), (1, 3), (4, 5), (11, 15), (20, 20)]) == [(1, 5), (10, 15), (20, 20)]
+    assert IntervalIndex.merge_ranges([]) == []
@@ -0,0 +1,91 @@
+import os
+
+import ScanCache
+
+DETECTORS = ["reentrancy-eth", "tx-origin"]
+
+def write(path, source=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source)
+    return path
+
+def cache_key(cache_dir, root_dir, path, detectors=DETECTORS, mode="contract", compiler="0.8.19"):
+    # A new ScanCache reads the sources again, like the next scan does
+    return ScanCache.ScanCache(cache_dir, root_dir=root_dir).key(path, detectors, mode, compiler)
+
+def test_key_changes_with_a_transitive_import(tmp_path):
+    root = tmp_path / "repo"
+    vault = write(root / "src" / "Vault.sol", 'import "./Base.sol";\ncontract Vault is Base {}\n')
+    write(root / "src" / "Base.sol", 'import "@oz/Ownable.sol";\ncontract Base is Ownable {}\n')
+    ownable = write(root / "node_modules" / "@oz" / "Ownable.sol", "contract Ownable {}\n")
+    cache_dir = tmp_path / "cache"
+
+    key = cache_key(cache_dir, root, vault)
+    assert cache_key(cache_dir, root, vault) == key
+
+    ownable.write_text("contract Ownable { address owner; }\n")
+    assert cache_key(cache_dir, root, vault) != key
+
+def test_key_changes_with_the_detectors_the_mode_and_the_compiler(tmp_path):
+    root = tmp_path / "repo"
+    vault = write(root / "Vault.sol", "contract Vault {}\n")
+    cache_dir = tmp_path / "cache"
+
+    key = cache_key(cache_dir, root, vault)
+    assert cache_key(cache_dir, root, vault, detectors=list(reversed(DETECTORS))) == key
+    assert cache_key(cache_dir, root, vault, detectors=DETECTORS[:1]) != key
+    assert cache_key(cache_dir, root, vault, mode="project") != key
+    assert cache_key(cache_dir, root, vault, compiler="0.8.20") != key
+
+def test_key_holds_the_path_in_the_repository(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = write(tmp_path / "first" / "src" / "Vault.sol", "contract Vault {}\n")
+    second = write(tmp_path / "second" / "src" / "Vault.sol", "contract Vault {}\n")
+    moved = write(tmp_path / "second" / "contracts" / "Vault.sol", "contract Vault {}\n")
+
+    key = cache_key(cache_dir, tmp_path / "first", first)
+    assert cache_key(cache_dir, tmp_path / "second", second) == key
+    assert cache_key(cache_dir, tmp_path / "second", moved) != key
+
+def test_descriptions_are_rebased_on_the_root_reading_them(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first_root = os.path.join(str(tmp_path), "workspace", "a")
+    second_root = os.path.join(str(tmp_path), "workspace", "b")
+    description = (f"Vault.withdraw() ({first_root}/src/Vault.sol#12-20) sends eth to an arbitrary user\n"
+                   f"\tDangerous calls: {first_root}/src/Vault.sol#15 and {first_root}x/Other.sol#1\n")
+    finding = (12, 20, description, "High", "arbitrary-send-eth", "Medium")
+
+    ScanCache.ScanCache(cache_dir, root_dir=first_root).store("key", [finding])
+    with open(os.path.join(cache_dir, "key.json"), encoding="utf-8") as entry_file:
+        stored = entry_file.read()
+    assert first_root + "/" not in stored
+
+    findings = ScanCache.ScanCache(cache_dir, root_dir=second_root).load("key")
+    assert findings == [(12, 20, description.replace(first_root + "/", second_root + "/"), "High", "arbitrary-send-eth", "Medium")]
+    # Only the root itself is replaced, not another path starting with the same characters
+    assert f"{second_root}x/Other.sol" not in findings[0][2]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = ScanCache.ScanCache(cache_dir)
+    finding = (1, 1, "description", "High", "reentrancy-eth", "Medium")
+    for index in range(4):
+        cache.store(f"key{index}", [finding])
+        os.utime(os.path.join(cache_dir, f"key{index}.json"), (1000 + index, 1000 + index))
+    entry_size = os.path.getsize(os.path.join(cache_dir, "key0.json"))
+    assert cache.total_size == 4 * entry_size
+
+    # A hit makes key0 the most recently used entry
+    assert cache.load("key0") == [finding]
+
+    cache.max_size = 3 * entry_size
+    cache.store("key4", [finding])
+    assert sorted(os.listdir(cache_dir)) == ["key0.json", "key3.json", "key4.json"]
+    assert cache.total_size == 3 * entry_size
+
+    # The cache is also brought under max_size when it is opened
+    os.utime(os.path.join(cache_dir, "key0.json"), (4000, 4000))
+    os.utime(os.path.join(cache_dir, "key4.json"), (5000, 5000))
+    reopened = ScanCache.ScanCache(cache_dir, max_size=entry_size)
+    assert os.listdir(cache_dir) == ["key4.json"]
+    assert reopened.total_size == entry_size
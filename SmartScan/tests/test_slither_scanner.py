@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import types
+
+import pytest
+
+import SlitherScanner, SolcResolver, SolidityImports
+
+# crytic-compile stand-in recording what it is asked to compile
+class FakeCryticCompile:
+    calls = []
+
+    def __init__(self, target, **kwargs):
+        FakeCryticCompile.calls.append((target, kwargs))
+
+class FakeSolcStandardJson:
+    # Same handling of the target as crytic-compile 0.3: a string that is not a file is json text
+    def __init__(self, target=None, **kwargs):
+        if target is None:
+            self.json = {}
+        elif os.path.isfile(target):
+            with open(target) as json_file:
+                self.json = json.load(json_file)
+        else:
+            self.json = json.loads(target)
+        self.json.setdefault("sources", {})
+
+    def add_source_file(self, file_path):
+        self.json["sources"][file_path] = {"urls": [file_path]}
+
+@pytest.fixture
+def crytic_compile(monkeypatch):
+    FakeCryticCompile.calls = []
+    package = types.ModuleType("crytic_compile")
+    package.CryticCompile = FakeCryticCompile
+    platform = types.ModuleType("crytic_compile.platform")
+    solc_standard_json = types.ModuleType("crytic_compile.platform.solc_standard_json")
+    solc_standard_json.SolcStandardJson = FakeSolcStandardJson
+    monkeypatch.setitem(sys.modules, "crytic_compile", package)
+    monkeypatch.setitem(sys.modules, "crytic_compile.platform", platform)
+    monkeypatch.setitem(sys.modules, "crytic_compile.platform.solc_standard_json", solc_standard_json)
+    return FakeCryticCompile
+
+def write(path, source=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source)
+    return path
+
+def test_library_remappings(tmp_path):
+    write(tmp_path / "node_modules" / "@openzeppelin" / "contracts" / "ERC20.sol")
+    write(tmp_path / "node_modules" / ".bin" / "solcjs")
+    write(tmp_path / "lib" / "forge-std" / "src" / "Test.sol")
+    write(tmp_path / "lib" / "@openzeppelin" / "ERC20.sol") # shadowed by node_modules, like resolve_import does
+    assert SolidityImports.library_remappings(tmp_path) == [
+        "@openzeppelin/=node_modules/@openzeppelin/", "forge-std/=lib/forge-std/"]
+    assert SolidityImports.library_remappings(tmp_path / "missing") == []
+
+def test_compile_project_of_a_plain_directory(tmp_path, crytic_compile):
+    vault = write(tmp_path / "contracts" / "Vault.sol", 'import "@openzeppelin/contracts/ERC20.sol";\n')
+    token = write(tmp_path / "contracts" / "Token.sol")
+    write(tmp_path / "node_modules" / "@openzeppelin" / "contracts" / "ERC20.sol")
+
+    SlitherScanner.compile_project(tmp_path, [vault, token], solc="solc-0.8.19")
+
+    (standard_json, kwargs), = crytic_compile.calls
+    assert isinstance(standard_json, FakeSolcStandardJson)
+    assert sorted(standard_json.json["sources"]) == sorted([str(vault), str(token)])
+    assert kwargs == {"solc": "solc-0.8.19", "solc_working_dir": str(tmp_path),
+                      "solc_remaps": ["@openzeppelin/=node_modules/@openzeppelin/"]}
+
+def test_compile_project_with_a_framework(tmp_path, crytic_compile):
+    write(tmp_path / "foundry.toml")
+    vault = write(tmp_path / "src" / "Vault.sol")
+
+    SlitherScanner.compile_project(tmp_path, [vault], solc="solc-0.8.19")
+
+    # The framework picks its own compiler and files
+    assert crytic_compile.calls == [(str(tmp_path), {})]
+
+# Slither stand-in reporting one finding in every source of its compilation
+class FakeSlither:
+    def __init__(self, compilation):
+        self.sources = list(compilation.json["sources"])
+
+    def run_detectors(self):
+        return [[{"elements": [{"source_mapping": {"lines": [2], "filename_absolute": source}}],
+                  "description": source, "impact": "High", "check": "reentrancy-eth", "confidence": "Medium"}
+                 for source in self.sources]]
+
+# crytic-compile stand-in keeping the sources it compiled
+class FakeCompilation:
+    def __init__(self, target, **kwargs):
+        FakeCryticCompile.calls.append((target, kwargs))
+        self.json = target.json
+
+def test_project_mode_compiles_every_compiler_group_once(tmp_path, crytic_compile, monkeypatch):
+    slither = types.ModuleType("slither")
+    slither.Slither = lambda compilation: FakeSlither(compilation)
+    monkeypatch.setitem(sys.modules, "slither", slither)
+    sys.modules["crytic_compile"].CryticCompile = FakeCompilation
+
+    new = write(tmp_path / "contracts" / "New.sol", "pragma solidity ^0.8.0;\n")
+    other_new = write(tmp_path / "contracts" / "OtherNew.sol", "pragma solidity >=0.8.0;\n")
+    old = write(tmp_path / "contracts" / "Old.sol", "pragma solidity ^0.7.0;\n")
+    resolver = SolcResolver.SolcResolver(str(tmp_path), compilers={(0, 7, 6): "solc-0.7.6", (0, 8, 19): "solc-0.8.19"})
+    scanner = SlitherScanner.SlitherScanner(project_dir=tmp_path, detectors=[], quiet=True, solc_resolver=resolver)
+
+    results = dict(scanner.scan([new, old, other_new]))
+
+    assert [(sorted(target.json["sources"]), kwargs["solc"]) for target, kwargs in crytic_compile.calls] == [
+        (sorted([str(new), str(other_new)]), "solc-0.8.19"), ([str(old)], "solc-0.7.6")]
+    assert scanner.failed_contracts == []
+    assert sorted(results) == sorted([new, old, other_new])
+    for path in (new, old, other_new):
+        assert [finding[2] for finding in scanner.findings.file_findings(path)] == [str(path)]
@@ -0,0 +1,75 @@
+import pytest
+
+import SolcResolver
+
+@pytest.mark.parametrize("constraint, version, expected", [
+    ("^0.8.0", (0, 8, 19), True),
+    ("^0.8.0", (0, 9, 0), False),
+    ("^0.8.20", (0, 8, 19), False),
+    ("^1.2.3", (1, 9, 0), True),
+    ("^1.2.3", (2, 0, 0), False),
+    ("~0.8.1", (0, 8, 30), True),
+    ("~0.8.1", (0, 9, 0), False),
+    (">=0.6.0 <0.9.0", (0, 8, 0), True),
+    (">=0.6.0 <0.9.0", (0, 9, 0), False),
+    (">0.8.0", (0, 8, 0), False),
+    (">0.8.0", (0, 8, 1), True),
+    ("<=0.8", (0, 8, 26), True),
+    ("<=0.8", (0, 9, 0), False),
+    ("0.8.19", (0, 8, 19), True),
+    ("0.8.19", (0, 8, 20), False),
+    ("=0.7.6", (0, 7, 6), True),
+    ("0.8", (0, 8, 5), True),
+    ("0.8.x", (0, 8, 5), True),
+    ("^0.4.24 || >=0.8.0", (0, 4, 26), True),
+    ("^0.4.24 || >=0.8.0", (0, 6, 0), False),
+    ("0.6.0 - 0.7.0", (0, 7, 0), True),
+    ("0.6.0 - 0.7.0", (0, 7, 1), False),
+])
+def test_satisfies(constraint, version, expected):
+    assert SolcResolver.satisfies(version, constraint) == expected
+
+def test_parse_pragmas():
+    source = "// SPDX\npragma solidity >=0.6.0 <0.9.0;\npragma abicoder v2;\n  pragma solidity ^0.8.0 ;\n"
+    assert SolcResolver.parse_pragmas(source) == [">=0.6.0 <0.9.0", "^0.8.0"]
+
+COMPILERS = {(0, 7, 6): "solc-0.7.6", (0, 8, 19): "solc-0.8.19", (0, 8, 24): "solc-0.8.24"}
+
+def write(path, source):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(source)
+    return path
+
+def test_resolve_picks_the_newest_compiler_satisfying_the_imports(tmp_path):
+    write(tmp_path / "src" / "Base.sol", "pragma solidity <=0.8.20;\n")
+    child = write(tmp_path / "src" / "Child.sol", 'pragma solidity ^0.8.0;\nimport "./Base.sol";\n')
+    old = write(tmp_path / "src" / "Old.sol", "pragma solidity ^0.7.0;\n")
+    none = write(tmp_path / "src" / "None.sol", "pragma solidity ^0.5.0;\n")
+
+    resolver = SolcResolver.SolcResolver(str(tmp_path), compilers=COMPILERS)
+    assert resolver.resolve(child) == ("0.8.19", "solc-0.8.19")
+    assert resolver.resolve(old) == ("0.7.6", "solc-0.7.6")
+    assert resolver.resolve(none) == (None, None)
+    assert resolver.resolve(tmp_path / "src" / "Missing.sol") == (None, None)
+
+def test_group_orders_the_groups_newest_first(tmp_path):
+    new = write(tmp_path / "New.sol", "pragma solidity ^0.8.21;\n")
+    old = write(tmp_path / "Old.sol", "pragma solidity ^0.7.0;\n")
+    other_new = write(tmp_path / "OtherNew.sol", "pragma solidity >=0.8.0;\n")
+    none = write(tmp_path / "None.sol", "pragma solidity ^0.5.0;\n")
+
+    resolver = SolcResolver.SolcResolver(str(tmp_path), compilers=COMPILERS)
+    assert resolver.group([new, old, other_new, none]) == [
+        ("0.8.24", "solc-0.8.24", [new, other_new]),
+        ("0.7.6", "solc-0.7.6", [old]),
+        (None, None, [none])
+    ]
+
+def test_invalidate_reads_the_edited_pragmas_again(tmp_path):
+    contract = write(tmp_path / "A.sol", "pragma solidity ^0.7.0;\n")
+    resolver = SolcResolver.SolcResolver(str(tmp_path), compilers=COMPILERS)
+    assert resolver.resolve(contract)[0] == "0.7.6"
+
+    contract.write_text("pragma solidity ^0.8.0;\n")
+    resolver.invalidate([contract])
+    assert resolver.resolve(contract)[0] == "0.8.24"
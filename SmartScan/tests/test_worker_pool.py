@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import SlitherScanner, WorkerPool
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "killpg") or not os.path.exists("/proc/self/statm"),
+                                reason="the pool stops process groups and reads the memory from /proc (Linux)")
+
+# Tasks run by the workers (module functions, so they can be sent to the worker processes)
+
+def worker_pid():
+    return os.getpid()
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def allocate(megabytes, seconds):
+    block = bytearray(megabytes * WorkerPool.MEGABYTE)
+    time.sleep(seconds)
+    return len(block)
+
+# Kept by the worker after the task, like the compilation units kept by Slither
+retained = []
+
+def retain(megabytes):
+    retained.append(bytearray(megabytes * WorkerPool.MEGABYTE))
+    return os.getpid()
+
+def fail(message):
+    raise ValueError(message)
+
+def die():
+    os._exit(3)
+
+# Starts a process in the group of the worker (like a solc run by crytic-compile), writes its pid and hangs
+def start_child(pid_path):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    with open(pid_path, "w") as pid_file:
+        pid_file.write(str(child.pid))
+    time.sleep(60)
+
+def analysis(path, detectors, profile, solc):
+    if "Slow" in path:
+        time.sleep(60)
+    return [(1, 1, path, "High", "reentrancy-eth", "Medium")], None, {"profile": [], "memory": {}}
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return False
+
+def wait_running(future):
+    deadline = time.monotonic() + 10
+    while not future.running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2) # sent to the worker
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(WorkerPool, "POLL_INTERVAL", 0.05)
+
+def test_workers_are_recycled_after_max_tasks():
+    with WorkerPool.WorkerPool(1, max_tasks=2) as pool:
+        pids = [pool.submit(worker_pid).result() for _ in range(5)]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert pool.recycled == 2
+    assert pool.stopped == 0
+
+def test_map_returns_the_results_in_order():
+    with WorkerPool.WorkerPool(3) as pool:
+        assert list(pool.map(sleep, [0.3, 0.0, 0.1, 0.0])) == [0.3, 0.0, 0.1, 0.0]
+
+def test_workers_left_over_the_memory_fraction_are_recycled():
+    limit = WorkerPool.rss_of() + 200 * WorkerPool.MEGABYTE
+    with WorkerPool.WorkerPool(1, max_tasks=None, memory_limit=limit) as pool:
+        first = pool.submit(retain, 180).result()
+        second = pool.submit(worker_pid).result()
+    assert first != second
+    assert pool.recycled == 1
+
+def test_a_worker_over_the_memory_limit_is_stopped():
+    limit = WorkerPool.rss_of() + 100 * WorkerPool.MEGABYTE
+    with WorkerPool.WorkerPool(1, max_tasks=None, memory_limit=limit) as pool:
+        over = pool.submit(allocate, 300, 30)
+        with pytest.raises(WorkerPool.WorkerError, match="memory limit"):
+            over.result(timeout=20)
+        assert pool.submit(allocate, 1, 0).result(timeout=20) == WorkerPool.MEGABYTE
+    assert pool.stopped == 1
+
+def test_a_task_over_the_timeout_is_stopped_with_the_processes_it_started(tmp_path):
+    pid_path = tmp_path / "child.pid"
+    with WorkerPool.WorkerPool(1, task_timeout=1) as pool:
+        start = time.monotonic()
+        with pytest.raises(WorkerPool.WorkerTimeout):
+            pool.submit(start_child, str(pid_path)).result(timeout=20)
+        assert time.monotonic() - start < 10
+        assert pool.submit(sleep, 0).result(timeout=20) == 0
+
+    # Killed with its process group
+    child_pid = int(pid_path.read_text())
+    deadline = time.monotonic() + 5
+    while alive(child_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(child_pid)
+
+def test_cancel_stops_the_running_tasks_and_the_waiting_ones():
+    with WorkerPool.WorkerPool(1) as pool:
+        running = pool.submit(sleep, 60)
+        waiting = pool.submit(sleep, 60)
+        wait_running(running)
+        pool.cancel([running, waiting])
+        with pytest.raises(WorkerPool.WorkerCancelled):
+            running.result(timeout=20)
+        assert waiting.cancelled()
+        assert pool.submit(sleep, 0).result(timeout=20) == 0
+
+def test_a_dying_worker_fails_its_task_and_is_replaced():
+    with WorkerPool.WorkerPool(1) as pool:
+        with pytest.raises(WorkerPool.WorkerError, match="exit code 3") as error:
+            pool.submit(die).result(timeout=20)
+        assert not isinstance(error.value, (WorkerPool.WorkerTimeout, WorkerPool.WorkerCancelled))
+        assert pool.submit(sleep, 0).result(timeout=20) == 0
+    assert pool.stopped == 1
+
+def test_an_exception_of_a_task_keeps_its_worker():
+    with WorkerPool.WorkerPool(1) as pool:
+        pid = pool.submit(worker_pid).result()
+        with pytest.raises(WorkerPool.WorkerError, match="ValueError: broken"):
+            pool.submit(fail, "broken").result(timeout=20)
+        assert pool.submit(worker_pid).result() == pid
+    assert pool.stopped == 0
+
+def test_the_contracts_left_when_the_scan_timeout_runs_out_are_timed_out(monkeypatch):
+    monkeypatch.setattr(SlitherScanner, "analyze_contract", analysis)
+    scanner = SlitherScanner.SlitherScanner(workers=2, detectors=[], quiet=True, scan_timeout=1)
+    paths = ["Fast.sol", "Slow1.sol", "Slow2.sol", "Slow3.sol"]
+
+    start = time.monotonic()
+    results = dict(scanner.scan(paths))
+
+    assert time.monotonic() - start < 15
+    assert list(results) == paths
+    assert scanner.scan_timed_out
+    assert scanner.timed_out_contracts == paths[1:]
+    assert scanner.failed_contracts == paths[1:]
+    assert [finding[2] for finding in scanner.findings.file_findings("Fast.sol")] == ["Fast.sol"]